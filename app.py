@@ -1,18 +1,26 @@
 import streamlit as st
-import sympy as sp
-from sympy.parsing.sympy_parser import (
-    parse_expr, standard_transformations, implicit_multiplication_application, convert_xor
-)
 from functools import partial
-import base64
-from io import BytesIO
-import matplotlib.pyplot as plt
-import matplotlib
 import streamlit.components.v1 as components
-import re
-import json
-
-matplotlib.use('Agg')
+from streamlit import runtime
+import base64
+import os
+import time
+from latexformula.batch import BATCH_FORMATS, read_formulas, write_batch_zip
+from latexformula.convert import CONVERSION_CACHE, formula_to_latex, is_valid_formula, looks_like_latex
+from latexformula.document import PARALLEL_MIN_LINES, Document
+from latexformula.downloads import discard_download, new_download, open_download
+from latexformula.evaluate import evaluate_csv, match_columns, read_csv_header, submit_compile
+from latexformula.examples import BUTTON_GROUPS, EXAMPLES
+from latexformula.history import FAVORITES_SIZE, HISTORY_SIZE, FormulaStore, import_history, read_history, write_history
+from latexformula.library import iter_ndjson, open_library
+from latexformula.mathml import formula_to_mathml, submit_latex_mathml
+from latexformula.metrics import METRICS, collect_stages, export_metrics_file, record_stage, timed
+from latexformula.plot import MAX_SWEEP_POINTS, PLOT_CACHE, plot_sweep
+from latexformula.render import RENDER_CACHE, cached_render, cached_render_batch, render_key
+from latexformula.syntax import validate_latex
+from latexformula.uploads import text_stream
+from latexformula.warmup import start_warmup
+from latexformula.workers import CANCELLED, DONE
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -21,6 +29,27 @@ st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded"
 )
+rerun_start = time.perf_counter()
+METRICS.inc("reruns_total")
+
+# --- Function: Preload SymPy, matplotlib and mathtext fonts once per server process ---
+@st.cache_resource
+def start_background_warmup():
+    # SymPy and matplotlib are imported lazily; this loads them while the first visitor reads the page
+    return start_warmup()
+
+start_background_warmup()
+
+# --- Function: Open the persistent formula library once per server process (None if disabled) ---
+@st.cache_resource
+def get_library():
+    return open_library()
+
+library = get_library()
+
+# Static output panel (frontend/formula_output): its iframe persists across reruns and receives only props
+formula_output = components.declare_component(
+    "formula_output", path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend", "formula_output"))
 
 # --- Initialize session state ---
 if "formula" not in st.session_state:
@@ -32,9 +61,27 @@ if "cursor_pos" not in st.session_state:
 if "latex_edited" not in st.session_state:
     st.session_state.latex_edited = False
 if "history" not in st.session_state:
-    st.session_state.history = []
+    st.session_state.history = FormulaStore(HISTORY_SIZE)
+    st.session_state.history_page = 0
 if "favorites" not in st.session_state:
-    st.session_state.favorites = []
+    st.session_state.favorites = FormulaStore(FAVORITES_SIZE)
+    st.session_state.favorites_page = 0
+    if library:
+        # New sessions start from the saved library; oldest first so the newest end up on top
+        for store, rows in ((st.session_state.history, library.recent(HISTORY_SIZE)),
+                            (st.session_state.favorites, library.recent(FAVORITES_SIZE, favorites_only=True))):
+            for row in reversed(rows):
+                store.add(row["formula"], row["latex"], row["name"] or None)
+if "history_export" not in st.session_state:
+    st.session_state.history_export = None  # Download file built on request: {"path", "file_name", "mime"}
+    st.session_state.history_import = None  # (name, size) of the last imported upload
+if "library_import" not in st.session_state:
+    st.session_state.library_import = None  # (name, size) of the last imported upload
+    st.session_state.library_pending = None  # Last conversion, saved once settled: {"formula", "latex", ...}
+if "document" not in st.session_state:
+    st.session_state.document = Document()  # Per-line results, reused until a line's text changes
+    st.session_state.document_text = ""
+    st.session_state.document_pdf = None  # Download file from "Build PDF": {"path", "pages", "text", "skipped"}
 if "theme" not in st.session_state:
     st.session_state.theme = "light"
 if "font_size" not in st.session_state:
@@ -43,18 +90,50 @@ if "show_help" not in st.session_state:
     st.session_state.show_help = False
 if "auto_render" not in st.session_state:
     st.session_state.auto_render = True
+if "transform" not in st.session_state:
+    st.session_state.transform = None
+if "solve" not in st.session_state:
+    st.session_state.solve = None  # Pending solver job: {"text", "equations", "targets", "each", "job"}
+    st.session_state.solve_results = None
+    st.session_state.solve_text = ""
+if "batch_result" not in st.session_state:
+    st.session_state.batch_result = None
+if "evaluate_result" not in st.session_state:
+    st.session_state.evaluate_result = None  # Download CSV from the last evaluation: {"path", "summary"}
+if "stage_times" not in st.session_state:
+    st.session_state.stage_times = {}  # Stage timings collected since the last rerun finished
+if "show_timings" not in st.session_state:
+    st.session_state.show_timings = False
+if "transform_expr" not in st.session_state:
+    st.session_state.transform_expr = None  # Last transform result: {"formula", "expr", "latex"}, this session only
+if "compile_job" not in st.session_state:
+    st.session_state.compile_job = None  # Background compile for plot/evaluate: {"formula", "job"}
+if "mathml_job" not in st.session_state:
+    st.session_state.mathml_job = None  # Background LaTeX -> MathML conversion: {"latex", "job"}
+if "render_memo" not in st.session_state:
+    # Last conversion and image for this session, so unchanged input skips straight to output
+    st.session_state.render_memo = {"formula": None, "latex": None, "image_key": None, "png": None}
+if "vector_export" not in st.session_state:
+    st.session_state.vector_export = False
+    st.session_state.minify_svg = True
+if "render_pending" not in st.session_state:
+    st.session_state.render_pending = False
+    st.session_state.render_burst = False
+    st.session_state.last_change = 0.0
 
-# --- Helper: Validate formula ---
-def is_valid_formula(formula):
-    if not formula.strip():
-        return False, "Formula is empty."
-    if formula.strip()[-1] in ['+', '-', '*', '/', '^']:
-        return False, "Formula ends with an incomplete operator."
-    open_parens = formula.count('(')
-    close_parens = formula.count(')')
-    if open_parens != close_parens:
-        return False, f"Unbalanced parentheses ({open_parens} open, {close_parens} close)."
-    return True, ""
+HISTORY_EXPORT_FORMATS = {  # label -> (format, gzip)
+    "NDJSON": ("ndjson", False), "NDJSON (gzip)": ("ndjson", True),
+    "JSON": ("json", False), "JSON (gzip)": ("json", True),
+}
+SOLUTIONS_SHOWN = 10  # Solutions listed per solved target
+PLOT_POINTS = [500, 2000, 10_000, 100_000, MAX_SWEEP_POINTS]  # Sweep sizes offered by the plot panel
+HISTORY_PAGE_SIZE = 10  # History / favorites buttons rendered per sidebar page
+PREVIEW_FONT_SIZE = 14  # Sidebar thumbnails
+PREVIEW_DPI = 100
+AUTO_RENDER_DEBOUNCE = 0.25  # seconds; edits closer together than this count as one burst
+LIBRARY_SETTLE = 2.0  # seconds a conversion must stay current before it is saved to the library
+
+TRANSFORM_DONE_WORDS = {"simplify": "simplified", "expand": "expanded", "factor": "factored"}
 
 # --- Function: Insert text at cursor position ---
 def insert_at_cursor(text):
@@ -73,7 +152,14 @@ def insert_at_cursor(text):
     
     st.session_state.latex_edited = False
     if st.session_state.auto_render:
-        update_latex()
+        schedule_render()
+
+# --- Function: Queue an auto-render for this rerun; rapid edits are debounced ---
+def schedule_render():
+    now = time.monotonic()
+    st.session_state.render_burst = now - st.session_state.last_change < AUTO_RENDER_DEBOUNCE
+    st.session_state.last_change = now
+    st.session_state.render_pending = True
 
 # --- Function: Update cursor position ---
 def update_cursor_pos():
@@ -86,7 +172,7 @@ def update_cursor_pos():
 def update_formula_and_cursor():
     update_cursor_pos()
     if st.session_state.auto_render:
-        update_latex()
+        schedule_render()
 
 # --- Function: Clear formula ---
 def clear_formula():
@@ -101,298 +187,393 @@ def backspace_formula():
         st.session_state.formula = st.session_state.formula[:-1]
         st.session_state.cursor_pos = len(st.session_state.formula)
         if st.session_state.auto_render:
-            update_latex()
+            schedule_render()
 
 # --- Function: Add to favorites ---
 def add_to_favorites():
     if st.session_state.formula and st.session_state.latex:
         if not st.session_state.latex.startswith("Invalid"):
-            favorite = {
-                "formula": st.session_state.formula,
-                "latex": st.session_state.latex,
-                "name": st.session_state.formula[:40]
-            }
-            if favorite not in st.session_state.favorites:
-                st.session_state.favorites.append(favorite)
+            if st.session_state.formula not in st.session_state.favorites:
+                st.session_state.favorites.add(st.session_state.formula, st.session_state.latex)
+                if library:
+                    library.save(st.session_state.formula, st.session_state.latex, favorite=True)
                 st.success("Added to favorites! ⭐")
 
-# --- Function: Export history as JSON ---
-def export_history():
-    if st.session_state.history:
-        history_data = [{"formula": f, "latex": l} for f, l in st.session_state.history]
-        return json.dumps(history_data, indent=2)
-    return None
+# --- Function: Move a sidebar pager one page back or forward ---
+def shift_page(page_key, step):
+    st.session_state[page_key] = max(0, st.session_state[page_key] + step)
+
+# --- Function: Pager controls for a formula store, returning (offset, records on the page) ---
+def paged_records(store, page_key, newest_first=True):
+    pages = store.page_count(HISTORY_PAGE_SIZE)
+    page = st.session_state[page_key] = min(st.session_state[page_key], pages - 1)
+    if pages > 1:
+        col_p1, col_p2, col_p3 = st.columns([1, 2, 1])
+        col_p1.button("◀", key=f"{page_key}_prev", on_click=shift_page, args=(page_key, -1),
+                      disabled=page == 0, use_container_width=True)
+        col_p2.caption(f"Page {page + 1} of {pages} · {len(store)} saved")
+        col_p3.button("▶", key=f"{page_key}_next", on_click=shift_page, args=(page_key, 1),
+                      disabled=page >= pages - 1, use_container_width=True)
+    return page * HISTORY_PAGE_SIZE, store.page(page, HISTORY_PAGE_SIZE, newest_first)
 
-# --- Function: Import history from JSON ---
-def import_history(json_str):
+# --- Function: Thumbnails for a page of stored formulas, rendered in one batch (None when previews are off) ---
+def record_previews(records):
+    previews = [None] * len(records)
+    if not st.session_state.get("show_previews"):
+        return previews
+    shown = [i for i, (_key, _formula, latex_str, _name) in enumerate(records)
+             if latex_str and not latex_str.startswith("Invalid")]
     try:
-        data = json.loads(json_str)
-        for item in data:
-            if "formula" in item and "latex" in item:
-                if (item["formula"], item["latex"]) not in st.session_state.history:
-                    st.session_state.history.append((item["formula"], item["latex"]))
-        st.success(f"Imported {len(data)} formulas!")
-    except:
-        st.error("Invalid JSON format")
+        pngs = cached_render_batch([records[i][2] for i in shown], PREVIEW_FONT_SIZE, dpi=PREVIEW_DPI)
+    except Exception as e:
+        st.caption(f"Previews unavailable: {str(e)}")
+        return previews
+    for i, png in zip(shown, pngs):
+        previews[i] = png
+    return previews
+
+# --- Function: Write the history to a download file (only when asked) ---
+def build_history_export(label):
+    fmt, compress = HISTORY_EXPORT_FORMATS[label]
+    if st.session_state.history_export:
+        discard_download(st.session_state.history_export["path"])
+    suffix = f".{fmt}" + (".gz" if compress else "")
+    with new_download("history_", suffix) as out_file:
+        write_history(st.session_state.history.iter_records(), out_file, fmt, compress)
+    mime = "application/gzip" if compress else ("application/json" if fmt == "json" else "application/x-ndjson")
+    st.session_state.history_export = {"path": out_file.name, "file_name": f"formula_history{suffix}", "mime": mime}
+
+# --- Function: Mirror imported entries into the persistent library in batches ---
+def saved_to_library(entries):
+    batch = []
+    for entry in entries:
+        if entry is not None:
+            batch.append({"formula": entry[0], "latex": entry[1]})
+            if len(batch) >= 1000:
+                library.import_records(batch)
+                batch = []
+        yield entry
+    if batch:
+        library.import_records(batch)
+
+# --- Function: Import history from a JSON / NDJSON (optionally gzipped) upload, streaming ---
+def import_history_file(uploaded_file):
+    entries = read_history(uploaded_file, uploaded_file.name)
+    if library:
+        entries = saved_to_library(entries)
+    try:
+        summary = import_history(st.session_state.history, entries)
+    except ValueError as e:
+        st.error(f"Invalid history file: {str(e)}")
+        return
+    st.success(f"Imported {summary['imported']} formulas!")
+    skipped = [f"{summary[k]} {k}" for k in ("duplicates", "invalid", "dropped") if summary[k]]
+    if skipped:
+        st.caption("Skipped: " + ", ".join(skipped) + (" (history is full)" if summary["dropped"] else ""))
 
 # --- Function: Update LaTeX from formula or LaTeX input ---
 def update_latex():
-    if st.session_state.latex_edited:
-        # If LaTeX was edited, use it directly if valid
-        latex_str = st.session_state.latex.strip()
-        if latex_str and (latex_str.startswith("\\") or re.search(r"\\frac|\\int|\\sqrt|\\left|\\sum", latex_str)):
-            try:
-                # Basic validation: attempt to render LaTeX
-                plt.figure()
-                plt.text(0, 0, f'${latex_str}$')
-                plt.close()
-                return  # LaTeX is valid, keep it
-            except:
-                st.session_state.latex = "Invalid LaTeX input"
+    # Parse/LaTeX/validation timings land in this session's timing panel
+    with collect_stages(st.session_state.stage_times):
+        if st.session_state.latex_edited:
+            # If LaTeX was edited, use it directly if valid
+            latex_str = st.session_state.latex.strip()
+            if looks_like_latex(latex_str):
+                with timed("validate_latex"):
+                    valid, error_msg = validate_latex(latex_str)
+                if valid:
+                    return  # LaTeX is valid, keep it
+                st.session_state.latex = f"Invalid LaTeX input: {error_msg}"
+                return
+            else:
+                st.session_state.latex = "Invalid LaTeX: Must be valid LaTeX syntax"
                 return
-        else:
-            st.session_state.latex = "Invalid LaTeX: Must be valid LaTeX syntax"
-            return
 
-    formula = st.session_state.formula.strip()
-    valid, error_msg = is_valid_formula(formula)
-    if not valid:
-        st.session_state.latex = f"Invalid formula: {error_msg}"
-        return
+        formula = st.session_state.formula.strip()
+        memo = st.session_state.render_memo
+        if formula == memo["formula"] and st.session_state.latex == memo["latex"]:
+            return  # Nothing changed since the last conversion
 
-    # Auto-detect if formula is LaTeX
-    if formula and (formula.startswith("\\") or re.search(r"\\frac|\\int|\\sqrt|\\left|\\sum", formula)):
-        st.session_state.latex = formula
-        return
+        with timed("validate"):
+            valid, error_msg = is_valid_formula(formula)
+        if not valid:
+            st.session_state.latex = f"Invalid formula: {error_msg}"
+            return
 
-    try:
-        # Step 1: Define local dictionary with all symbols
-        local_dict = {
-            "sp": sp,
-            "sqrt": sp.sqrt,
-            "log": sp.log,
-            "ln": sp.log,
-            "sin": sp.sin,
-            "cos": sp.cos,
-            "tan": sp.tan,
-            "cot": sp.cot,
-            "sec": sp.sec,
-            "csc": sp.csc,
-            "asin": sp.asin,
-            "acos": sp.acos,
-            "atan": sp.atan,
-            "sinh": sp.sinh,
-            "cosh": sp.cosh,
-            "tanh": sp.tanh,
-            "exp": sp.exp,
-            "abs": sp.Abs,
-            "floor": sp.floor,
-            "ceiling": sp.ceiling,
-            "Sum": sp.Sum,
-            "Limit": sp.Limit,
-            "Integral": sp.Integral,
-            "Derivative": sp.Derivative,
-            "oo": sp.oo,
-            "pi": sp.pi,
-            "e": sp.E,
-            "I": sp.I,
-            "phi": sp.Symbol(r'\phi'),
-            "kappa": sp.Symbol(r'\kappa'),
-            "mu": sp.Symbol(r'\mu'),
-            "alpha": sp.Symbol(r'\alpha'),
-            "beta": sp.Symbol(r'\beta'),
-            "gamma": sp.Symbol(r'\gamma'),
-            "delta": sp.Symbol(r'\delta'),
-            "Delta": sp.Symbol(r'\Delta'),
-            "epsilon": sp.Symbol(r'\epsilon'),
-            "zeta": sp.Symbol(r'\zeta'),
-            "eta": sp.Symbol(r'\eta'),
-            "theta": sp.Symbol(r'\theta'),
-            "Theta": sp.Symbol(r'\Theta'),
-            "iota": sp.Symbol(r'\iota'),
-            "lambda": sp.Symbol(r'\lambda'),
-            "Lambda": sp.Symbol(r'\Lambda'),
-            "nu": sp.Symbol(r'\nu'),
-            "xi": sp.Symbol(r'\xi'),
-            "rho": sp.Symbol(r'\rho'),
-            "sigma": sp.Symbol(r'\sigma'),
-            "Sigma": sp.Symbol(r'\Sigma'),
-            "tau": sp.Symbol(r'\tau'),
-            "Phi": sp.Symbol(r'\Phi'),
-            "omega": sp.Symbol(r'\omega'),
-            "Omega": sp.Symbol(r'\Omega'),
-            "degree": sp.Symbol(r'\degree'),
-            "approx": sp.Symbol(r'\approx'),
-            "ne": sp.Symbol(r'\ne'),
-            "ge": sp.Symbol(r'\ge'),
-            "le": sp.Symbol(r'\le'),
-            # Petroleum engineering symbols
-            "porosity": sp.Symbol(r'\phi'),
-            "permeability": sp.Symbol(r'\kappa'),
-            "viscosity": sp.Symbol(r'\mu'),
-            "density": sp.Symbol(r'\rho'),
-            "shear_rate": sp.Symbol(r'\dot{\gamma}'),
-            "k": sp.Symbol('k'),
-            "P": sp.Symbol('P'),
-            "q": sp.Symbol('q'),
-            "v": sp.Symbol('v'),
-            "S": sp.Symbol('S'),
-            "c": sp.Symbol('c'),
-            "B": sp.Symbol('B'),
-            "z": sp.Symbol('z'),
-            "R": sp.Symbol('R'),
-            "h": sp.Symbol('h'),
-        }
+        # Auto-detect if formula is LaTeX
+        if looks_like_latex(formula):
+            st.session_state.latex = formula
+            return
 
-        # Reserved names to avoid parsing conflicts
-        reserved = ['sqrt', 'log', 'ln', 'sin', 'cos', 'tan', 'cot', 'sec', 'csc', 'asin', 'acos', 'atan',
-                    'sinh', 'cosh', 'tanh', 'exp', 'abs', 'floor', 'ceiling', 
-                    'Sum', 'Limit', 'Integral', 'Derivative', 'oo', 'pi', 'e', 'I']
-
-        # Step 2: Handle subscripted variables
-        subscript_pattern = r'\b([a-zA-Z]+)_([a-zA-Z0-9]+)\b'
-        subscript_vars = set(re.findall(subscript_pattern, formula))
-        for base, subscript in subscript_vars:
-            var_name = f"{base}_{subscript}"
-            if var_name not in local_dict and base not in reserved:
-                local_dict[var_name] = sp.Symbol(var_name)
-
-        # Step 3: Replace ^ with ** for exponentiation
-        parsed_formula = formula.replace("^", "**")
-
-        # Step 4: Detect if there's an '=' (equation)
-        if "=" in parsed_formula:
-            lhs, rhs = parsed_formula.split("=", 1)
-            transformations = standard_transformations + (
-                implicit_multiplication_application,
-                convert_xor
-            )
-            lhs_expr = parse_expr(lhs.strip(), local_dict=local_dict, transformations=transformations)
-            rhs_expr = parse_expr(rhs.strip(), local_dict=local_dict, transformations=transformations)
-            expr = sp.Eq(lhs_expr, rhs_expr)
+        # A transform result shows the transform's own LaTeX; anything else comes from the
+        # cross-session conversion cache (errors included)
+        kept = st.session_state.transform_expr
+        if kept and formula == kept["formula"]:
+            latex_str, error = kept["latex"], None
         else:
-            transformations = standard_transformations + (
-                implicit_multiplication_application,
-                convert_xor
-            )
-            expr = parse_expr(parsed_formula, local_dict=local_dict, transformations=transformations)
+            latex_str, error = formula_to_latex(formula)
+        if error:
+            st.session_state.latex = f"Invalid formula: {error}"
+            return
 
-        # Step 5: Convert to LaTeX
-        latex_str = sp.latex(expr, order='none')
         st.session_state.latex = latex_str
         st.session_state.latex_edited = False
-        
-        # Add to history
+        memo["formula"], memo["latex"] = formula, latex_str
+
+        # Add to history (or move it back to the top); the oldest entries drop out at capacity
         if latex_str and not latex_str.startswith("Invalid"):
-            if st.session_state.formula not in [h[0] for h in st.session_state.history]:
-                st.session_state.history.insert(0, (st.session_state.formula, latex_str))
-                st.session_state.history = st.session_state.history[:20]  # Keep last 20
+            st.session_state.history.add(st.session_state.formula, latex_str)
+            if library:
+                # Saved on a later rerun once settled, not for every keystroke of a burst
+                st.session_state.library_pending = {
+                    "formula": st.session_state.formula, "latex": latex_str, "converted": time.monotonic(),
+                    "render_hash": render_key(latex_str, st.session_state.font_size)}
 
-    except Exception as e:
-        st.session_state.latex = f"Invalid formula: {str(e)}"
+# --- Function: Save the last conversion to the library once no newer one replaced it for LIBRARY_SETTLE s ---
+def save_settled_conversion():
+    pending = st.session_state.library_pending
+    if pending and time.monotonic() - pending["converted"] >= LIBRARY_SETTLE:
+        st.session_state.library_pending = None
+        library.save(pending["formula"], pending["latex"], render_hash=pending["render_hash"])
+
+# --- Function: Library search results and row count, shared by sessions until the library changes ---
+@st.cache_data(max_entries=256, show_spinner=False)
+def library_search(query, version):
+    return library.search(query, limit=20), library.count()
+
+# --- Function: Saved library row for a formula, shared by sessions until the library changes ---
+@st.cache_data(max_entries=256, show_spinner=False)
+def library_entry(formula, version):
+    return library.get(formula)
 
 # --- Function: Handle LaTeX input change ---
 def update_from_latex():
     st.session_state.latex_edited = True
     update_latex()
 
-# --- Function: Convert LaTeX to image with customizable font size ---
+# --- Function: Convert LaTeX to PNG bytes with customizable font size ---
 def latex_to_image(latex_str, font_size=20, bg_color='white', text_color='black'):
+    memo = st.session_state.render_memo
+    image_key = (latex_str, font_size, bg_color, text_color)
+    if memo["image_key"] == image_key:
+        return memo["png"]
     try:
-        # Create a temporary figure to measure the text
-        fig, ax = plt.subplots(figsize=(1, 1))
-        ax.axis('off')
-        text = ax.text(0.5, 0.5, f'${latex_str}$', fontsize=font_size, 
-                      ha='center', va='center', color=text_color)
-        fig.canvas.draw()
-        
-        # Get the bounding box in pixels
-        bbox = text.get_window_extent(renderer=fig.canvas.get_renderer())
-        
-        # Convert to inches (with padding)
-        dpi = fig.dpi
-        width_inches = (bbox.width / dpi) + 0.5
-        height_inches = (bbox.height / dpi) + 0.3
-        
-        plt.close(fig)
-        
-        # Create the final figure with correct size
-        fig = plt.figure(figsize=(width_inches, height_inches), facecolor=bg_color)
-        ax = fig.add_axes([0, 0, 1, 1])
-        ax.axis('off')
-        ax.text(0.5, 0.5, f'${latex_str}$', fontsize=font_size, 
-               ha='center', va='center', color=text_color)
-        
-        buf = BytesIO()
-        plt.savefig(buf, format='png', dpi=200, bbox_inches='tight', 
-                   pad_inches=0.1, facecolor=bg_color)
-        plt.close(fig)
-        buf.seek(0)
-        
-        return base64.b64encode(buf.read()).decode()
+        # Rendered bytes come from the shared memory/disk render cache
+        with collect_stages(st.session_state.stage_times):
+            with timed("latex_to_image"):
+                png_data = cached_render(latex_str, font_size, bg_color, text_color)
+        memo["image_key"], memo["png"] = image_key, png_data
+        return png_data
     except Exception as e:
         st.error(f"Image generation error: {str(e)}")
         return None
 
-# --- Function: Simplify expression ---
-def simplify_expression():
+# --- Function: Media URL the output panel loads the PNG from, so reruns send a short URL, not the bytes ---
+# Streamlit has no public call that returns a media URL (st.image only renders its own element), so this
+# uses the runtime's media file manager the way st.image does. Its add() is unchanged across the streamlit
+# range pinned in requirements.txt; if it is missing or fails, the PNG is sent inline as a data URL.
+def output_image_url(png_data):
+    if not png_data:
+        return None
+    try:
+        # Registered again on every run, as st.image does, so Streamlit keeps serving it; the name is a content hash
+        url = runtime.get_instance().media_file_mgr.add(png_data, "image/png", "formula_output")
+    except Exception:
+        return "data:image/png;base64," + base64.b64encode(png_data).decode("ascii")
+    # Media URLs are server-root paths; prefix the configured base path instead of guessing it in the browser
+    base_path = st.get_option("server.baseUrlPath").strip("/")
+    return f"/{base_path}{url}" if base_path and url.startswith("/") else url
+
+# --- Function: SVG and PDF bytes for the current formula, from the shared render cache ---
+def vector_exports(latex_str, font_size=20, bg_color='white', text_color='black', minify=False):
+    files = {}
+    with collect_stages(st.session_state.stage_times):
+        for fmt in ("svg", "pdf"):
+            try:
+                with timed(f"export_{fmt}"):
+                    files[fmt] = cached_render(latex_str, font_size, bg_color, text_color, fmt=fmt, minify=minify)
+            except Exception as e:
+                st.error(f"{fmt.upper()} export error: {str(e)}")
+    return files
+
+# --- Function: MathML for "Copy for Word", from the cross-session MathML cache ---
+def output_mathml(latex_str):
+    memo = st.session_state.render_memo
+    with collect_stages(st.session_state.stage_times):
+        with timed("to_mathml"):
+            if memo["formula"] and memo["latex"] == latex_str:
+                mathml, _error = formula_to_mathml(memo["formula"])  # Same parse that produced the LaTeX
+                return mathml
+    # Edited or typed-in LaTeX: parse_latex can take seconds, so it runs in a worker. Until it is done
+    # (or if it fails) the component gets None and the browser falls back to its own converter.
+    pending = st.session_state.mathml_job
+    if pending and pending["latex"] == latex_str:
+        job = pending["job"]
+        if job.done() and job.status == DONE:
+            return job.result[0]
+        return None  # Still running, or failed: not resubmitted on every rerun
+    if pending:
+        pending["job"].cancel()
+    result, job = submit_latex_mathml(latex_str)
+    st.session_state.mathml_job = {"latex": latex_str, "job": job} if job else None
+    return result[0] if result else None
+
+# --- Function: Apply a finished transform to the formula ---
+def apply_transform_result(op, result):
+    st.session_state.formula = result[0]
+    st.session_state.transform_expr = {"formula": result[0].strip(), "expr": result[2], "latex": result[1]}
+    update_cursor_pos()
+    st.session_state.latex_edited = False
+    update_latex()  # Uses the transform's LaTeX: no re-parse of the result text
+    st.success(f"Expression {TRANSFORM_DONE_WORDS[op]}!")
+
+# --- Function: Run a transform in the background worker pool ---
+def run_transform(op):
+    from latexformula.transforms import submit_transform
+    cancel_transform()
     try:
         formula = st.session_state.formula.strip()
-        parsed_formula = formula.replace("^", "**")
-        local_dict = {"sp": sp, "sqrt": sp.sqrt, "pi": sp.pi, "e": sp.E}
-        
-        transformations = standard_transformations + (
-            implicit_multiplication_application,
-            convert_xor
-        )
-        expr = parse_expr(parsed_formula, local_dict=local_dict, transformations=transformations)
-        simplified = sp.simplify(expr)
-        
-        st.session_state.formula = str(simplified).replace("**", "^")
-        update_formula_and_cursor()
-        st.success("Expression simplified!")
+        kept = st.session_state.transform_expr
+        # Chained transforms continue from this session's result expression, not a re-parse of its text
+        result, job = submit_transform(op, formula, kept["expr"] if kept and kept["formula"] == formula else None)
     except Exception as e:
-        st.error(f"Cannot simplify: {str(e)}")
+        st.error(f"Cannot {op}: {str(e)}")
+        return
+    if result is not None:
+        apply_transform_result(op, result)  # Cached from an earlier run
+    else:
+        st.session_state.transform = {"op": op, "formula": st.session_state.formula, "job": job}
+
+# --- Function: Cancel the running transform ---
+def cancel_transform():
+    if st.session_state.transform:
+        st.session_state.transform["job"].cancel()
+        st.session_state.transform = None
+
+# --- Function: Report on / collect the running transform ---
+def poll_transform():
+    pending = st.session_state.transform
+    if not pending:
+        return
+    op, job = pending["op"], pending["job"]
+    if st.session_state.formula != pending["formula"]:
+        cancel_transform()  # The user edited the formula, so the result is stale
+        return
+    if not job.done():
+        st.info(f"⏳ Still working on {op}… {job.elapsed():.0f}s (limit {job.timeout:g}s)")
+        st.button("✖ Cancel", key="cancel_transform", on_click=cancel_transform, use_container_width=True)
+        return
+    st.session_state.transform = None
+    if job.status == DONE:
+        apply_transform_result(op, job.result)
+    elif job.status != CANCELLED:
+        st.error(f"Cannot {op}: {job.error}")
+
+# --- Function: Simplify expression ---
+def simplify_expression():
+    run_transform("simplify")
 
 # --- Function: Expand expression ---
 def expand_expression():
-    try:
-        formula = st.session_state.formula.strip()
-        parsed_formula = formula.replace("^", "**")
-        local_dict = {"sp": sp, "sqrt": sp.sqrt, "pi": sp.pi, "e": sp.E}
-        
-        transformations = standard_transformations + (
-            implicit_multiplication_application,
-            convert_xor
-        )
-        expr = parse_expr(parsed_formula, local_dict=local_dict, transformations=transformations)
-        expanded = sp.expand(expr)
-        
-        st.session_state.formula = str(expanded).replace("**", "^")
-        update_formula_and_cursor()
-        st.success("Expression expanded!")
-    except Exception as e:
-        st.error(f"Cannot expand: {str(e)}")
+    run_transform("expand")
 
 # --- Function: Factor expression ---
 def factor_expression():
+    run_transform("factor")
+
+# --- Function: Append the current formula to the document ---
+def append_formula_to_document():
+    text = st.session_state.document_text.rstrip("\n")
+    st.session_state.document_text = (text + "\n" if text else "") + st.session_state.formula.strip()
+
+# --- Function: Copy the current formula into the solver ---
+def copy_formula_to_solver():
+    st.session_state.solve_text = st.session_state.formula
+
+# --- Function: Load a solution into the formula input ---
+def use_solution(formula):
+    st.session_state.formula = formula
+    update_cursor_pos()
+    st.session_state.latex_edited = False
+    update_latex()
+
+# --- Function: Solve in the background worker pool (cached results come back at once) ---
+def run_solve(equations, targets, each):
+    from latexformula.solver import submit_solve
+    cancel_solve()
     try:
-        formula = st.session_state.formula.strip()
-        parsed_formula = formula.replace("^", "**")
-        local_dict = {"sp": sp, "sqrt": sp.sqrt, "pi": sp.pi, "e": sp.E}
-        
-        transformations = standard_transformations + (
-            implicit_multiplication_application,
-            convert_xor
-        )
-        expr = parse_expr(parsed_formula, local_dict=local_dict, transformations=transformations)
-        factored = sp.factor(expr)
-        
-        st.session_state.formula = str(factored).replace("**", "^")
-        update_formula_and_cursor()
-        st.success("Expression factored!")
+        results, job = submit_solve(equations, targets, each)
     except Exception as e:
-        st.error(f"Cannot factor: {str(e)}")
+        st.error(f"Cannot solve: {str(e)}")
+        return
+    if job is None:
+        st.session_state.solve_results = results
+    else:
+        st.session_state.solve_results = None
+        st.session_state.solve = {"text": st.session_state.solve_text, "equations": equations,
+                                  "targets": targets, "each": each, "job": job}
+
+# --- Function: Cancel the running solve ---
+def cancel_solve():
+    if st.session_state.solve:
+        st.session_state.solve["job"].cancel()
+        st.session_state.solve = None
+
+# --- Function: Report on / collect the running solve ---
+def poll_solve():
+    pending = st.session_state.solve
+    if not pending:
+        return
+    job = pending["job"]
+    if st.session_state.solve_text != pending["text"]:
+        cancel_solve()  # The equations were edited, so the result is stale
+        return
+    if not job.done():
+        st.info(f"⏳ Solving… {job.elapsed():.0f}s (limit {job.timeout:g}s)")
+        st.button("✖ Cancel", key="cancel_solve", on_click=cancel_solve, use_container_width=True)
+        return
+    st.session_state.solve = None
+    if job.status == DONE:
+        run_solve(pending["equations"], pending["targets"], pending["each"])  # Now served from the cache
+    elif job.status != CANCELLED:
+        st.error(f"Cannot solve: {job.error}")
+
+# --- Function: CompiledFormula for plot/evaluate, prepared in a worker; (None, None) while it runs ---
+def compiled_formula(formula):
+    pending = st.session_state.compile_job
+    if pending and pending["formula"] == formula:
+        job = pending["job"]
+        if not job.done():
+            st.info(f"⏳ Compiling the formula… {job.elapsed():.0f}s (limit {job.timeout:g}s)")
+            return None, None
+        if job.status != DONE:
+            return None, job.error or "compilation was cancelled"  # Kept, so reruns do not resubmit it
+        st.session_state.compile_job = None  # Done: the compiled formula is in the shared cache now
+    elif pending:
+        pending["job"].cancel()  # The formula changed
+        st.session_state.compile_job = None
+    compiled, job, error = submit_compile(formula)
+    if job:
+        st.session_state.compile_job = {"formula": formula, "job": job}
+        st.info("⏳ Compiling the formula…")
+    return compiled, error
+
+# --- Helper: Count rows in an uploaded file without keeping it in memory ---
+def count_lines(uploaded_file):
+    uploaded_file.seek(0)
+    count = sum(chunk.count(b"\n") for chunk in iter(lambda: uploaded_file.read(1 << 20), b""))
+    uploaded_file.seek(0)
+    return count
+
+# --- Function: Offer a prepared file for download; files left idle past their TTL have to be built again ---
+def offer_download(record, label, file_name, mime, expired_key):
+    download = open_download(record["path"])
+    if download is None:
+        st.session_state[expired_key] = None
+        st.caption(f"{label}: the file has expired, please build it again")
+        return
+    with download:
+        st.download_button(label, data=download, file_name=file_name, mime=mime, use_container_width=True)
 
 # --- Custom CSS ---
 st.markdown("""
@@ -504,6 +685,7 @@ if st.session_state.show_help:
         - Copy as PNG image
         - Download .tex file
         - Download PNG image
+        - Download SVG / PDF vector files (tick "Vector export")
         """)
 
 # Sidebar - Advanced Features
@@ -522,26 +704,34 @@ with st.sidebar:
     with col_s3:
         if st.button("🔍 Factor", use_container_width=True, help="Factor the expression"):
             factor_expression()
+    poll_transform()
     
     st.divider()
     
     # Favorites section
     st.header("⭐ Favorites")
+    st.toggle("🖼️ Show previews", key="show_previews", help="Rendered thumbnails in Favorites and History")
     if st.button("➕ Add Current to Favorites", use_container_width=True):
         add_to_favorites()
     
     if st.session_state.favorites:
-        for i, fav in enumerate(st.session_state.favorites):
+        offset, favorites = paged_records(st.session_state.favorites, "favorites_page", newest_first=False)
+        previews = record_previews(favorites)
+        for i, (fav_key, formula, _latex, name) in enumerate(favorites, start=offset):
             col_f1, col_f2 = st.columns([4, 1])
             with col_f1:
-                display_name = fav['name'] if len(fav['name']) <= 30 else fav['name'][:27] + "..."
+                if previews[i - offset]:
+                    st.image(previews[i - offset])
+                display_name = name if len(name) <= 30 else name[:27] + "..."
                 if st.button(f"⭐ {display_name}", key=f"fav_{i}", use_container_width=True):
-                    st.session_state.formula = fav['formula']
+                    st.session_state.formula = formula
                     update_formula_and_cursor()
                     st.rerun()
             with col_f2:
                 if st.button("🗑️", key=f"del_fav_{i}", help="Remove"):
-                    st.session_state.favorites.pop(i)
+                    st.session_state.favorites.remove(fav_key)
+                    if library:
+                        library.set_favorite(formula, False)
                     st.rerun()
     else:
         st.info("No favorites yet")
@@ -550,20 +740,7 @@ with st.sidebar:
     
     # Examples
     st.header("📚 Examples")
-    examples = {
-        "Quadratic Formula": "x = (-b + sqrt(b^2 - 4*a*c))/(2*a)",
-        "Darcy's Law": "q = (k*A*(P1-P2))/(mu*L)",
-        "Pythagorean": "a^2 + b^2 = c^2",
-        "Euler's Identity": "e^(I*pi) + 1 = 0",
-        "Integral": "Integral(x^2, (x, 0, 1))",
-        "Summation": "Sum(1/n^2, (n, 1, oo))",
-        "Derivative": "Derivative(sin(x)*cos(x), x)",
-        "Limit": "Limit(sin(x)/x, x, 0)",
-        "Matrix": "((a, b), (c, d))",
-        "Binomial": "(x + y)^n",
-    }
-    
-    for name, formula in examples.items():
+    for name, formula in EXAMPLES.items():
         if st.button(f"📝 {name}", use_container_width=True, key=f"example_{name}"):
             st.session_state.formula = formula
             update_formula_and_cursor()
@@ -574,44 +751,112 @@ with st.sidebar:
     # History
     st.header("🕐 History")
     
-    # Export/Import history
+    # Export/Import history; the export file is only written when requested
     col_h1, col_h2 = st.columns(2)
     with col_h1:
         if st.session_state.history:
-            history_json = export_history()
-            if history_json:
-                st.download_button(
-                    label="📥 Export",
-                    data=history_json,
-                    file_name="formula_history.json",
-                    mime="application/json",
-                    use_container_width=True
-                )
+            if st.button("📦 Export", use_container_width=True):
+                build_history_export(st.session_state.get("history_export_format", "JSON"))
     with col_h2:
         if st.button("🗑️ Clear", use_container_width=True):
-            st.session_state.history = []
+            st.session_state.history.clear()
             st.rerun()
+    if st.session_state.history:
+        st.selectbox("Export format", list(HISTORY_EXPORT_FORMATS), key="history_export_format",
+                     label_visibility="collapsed")
+    if st.session_state.history_export:
+        offer_download(st.session_state.history_export, "📥 Download history",
+                       st.session_state.history_export["file_name"], st.session_state.history_export["mime"],
+                       "history_export")
     
     # Upload history
-    uploaded_history = st.file_uploader("📤 Import History", type=['json'], label_visibility="collapsed")
-    if uploaded_history:
-        json_str = uploaded_history.read().decode()
-        import_history(json_str)
-        st.rerun()
+    uploaded_history = st.file_uploader("📤 Import History", type=['json', 'ndjson', 'jsonl', 'gz'],
+                                        label_visibility="collapsed")
+    if uploaded_history and st.session_state.history_import != (uploaded_history.name, uploaded_history.size):
+        st.session_state.history_import = (uploaded_history.name, uploaded_history.size)
+        import_history_file(uploaded_history)
     
     # Display history
     if st.session_state.history:
-        for i, (formula, latex) in enumerate(st.session_state.history[:10]):
+        offset, entries = paged_records(st.session_state.history, "history_page")
+        previews = record_previews(entries)
+        for i, (_key, formula, _latex, _name) in enumerate(entries, start=offset):
+            if previews[i - offset]:
+                st.image(previews[i - offset])
             display_text = formula if len(formula) <= 30 else formula[:27] + "..."
             if st.button(f"{i+1}. {display_text}", key=f"history_{i}", use_container_width=True):
                 st.session_state.formula = formula
                 update_formula_and_cursor()
                 st.rerun()
-        if len(st.session_state.history) > 10:
-            st.caption(f"... and {len(st.session_state.history) - 10} more")
     else:
         st.info("No history yet")
 
+    # Persistent library (LATEXFORMULA_LIBRARY_PATH), shared by every session
+    if library:
+        with st.expander("🗄️ Library"):
+            query = st.text_input("Search saved formulas", placeholder="e.g. alpha, \\frac, P_wf, tag",
+                                  key="library_query")
+            results, saved_count = library_search(query, library.version)
+            st.caption(f"{len(results)} shown of {saved_count} saved")
+            for i, row in enumerate(results):
+                display_text = row["formula"] if len(row["formula"]) <= 30 else row["formula"][:27] + "..."
+                star = "⭐ " if row["favorite"] else ""
+                if st.button(f"{star}{display_text}", key=f"library_{i}", help=row["tags"] or None,
+                             use_container_width=True):
+                    st.session_state.formula = row["formula"]
+                    update_formula_and_cursor()
+                    st.rerun()
+
+            if st.session_state.latex and not st.session_state.latex.startswith("Invalid"):
+                saved = library_entry(st.session_state.formula, library.version)
+                tags = st.text_input("Tags for the current formula", value=saved["tags"] if saved else "",
+                                     placeholder="space or comma separated")
+                if st.button("🏷️ Save tags", use_container_width=True):
+                    # One transaction; replace_tags also clears the tags when the field was emptied
+                    library.save(st.session_state.formula, st.session_state.latex, tags=tags, replace_tags=True)
+                    st.rerun()
+
+            if st.button("📦 Prepare export (NDJSON)", use_container_width=True):
+                with new_download("library_", ".ndjson", "w", encoding="utf-8") as export_file:
+                    library.export_ndjson(export_file)
+                with open(export_file.name, "rb") as f:
+                    st.download_button("📥 Download library", data=f, file_name="formula_library.ndjson",
+                                       mime="application/x-ndjson", use_container_width=True)
+                discard_download(export_file.name)  # The button already holds the bytes
+
+            uploaded_library = st.file_uploader("📤 Import NDJSON", type=["ndjson", "jsonl"], key="library_file")
+            if uploaded_library and st.session_state.library_import != (uploaded_library.name, uploaded_library.size):
+                stream = text_stream(uploaded_library)
+                imported, skipped = library.import_records(iter_ndjson(stream))
+                st.session_state.library_import = (uploaded_library.name, uploaded_library.size)
+                st.success(f"Imported {imported} formulas ({skipped} duplicates or invalid rows skipped)")
+
+    st.divider()
+
+    # Cache statistics (shared by all sessions on this server)
+    with st.expander("⚙️ Cache Stats"):
+        stats = CONVERSION_CACHE.stats()
+        st.caption(f"Conversions: {stats['size']}/{stats['maxsize']} cached")
+        col_c1, col_c2, col_c3 = st.columns(3)
+        col_c1.metric("Hits", stats["hits"])
+        col_c2.metric("Misses", stats["misses"])
+        col_c3.metric("Evicted", stats["evictions"])
+        st.caption(f"Hit rate: {stats['hit_rate']:.0%}")
+
+        render_stats = RENDER_CACHE.stats()
+        st.caption(f"Images: {render_stats['memory_entries']} in memory "
+                   f"({render_stats['memory_bytes'] / 1024:.0f} KB), "
+                   f"{render_stats['disk_bytes'] / 1024:.0f} KB on disk")
+        col_r1, col_r2, col_r3 = st.columns(3)
+        col_r1.metric("Mem hits", render_stats["memory_hits"])
+        col_r2.metric("Disk hits", render_stats["disk_hits"])
+        col_r3.metric("Renders", render_stats["misses"])
+        st.caption(f"Render time saved: {render_stats['seconds_saved']:.2f} s")
+
+        plot_stats = PLOT_CACHE.stats()
+        st.caption(f"Plots: {plot_stats['size']}/{plot_stats['maxsize']} cached, "
+                   f"hit rate {plot_stats['hit_rate']:.0%}")
+
 # Main input area
 col1, col2, col3, col4 = st.columns([5, 1, 1, 1])
 with col1:
@@ -626,6 +871,17 @@ with col4:
         if st.button("▶️ Render", use_container_width=True, type="primary"):
             update_latex()
 
+if library:
+    save_settled_conversion()  # Before update_latex below can replace it
+
+# Debounced auto-render: in a burst of edits, pause so a newer edit can supersede this run
+if st.session_state.render_pending:
+    if st.session_state.render_burst:
+        time.sleep(AUTO_RENDER_DEBOUNCE)
+        st.empty()  # Checkpoint: Streamlit restarts the script here if another edit arrived meanwhile
+    st.session_state.render_pending = False
+    update_latex()
+
 # Status indicator with more details
 if st.session_state.latex:
     if st.session_state.latex.startswith("Invalid"):
@@ -641,149 +897,13 @@ if st.session_state.latex:
 # Tabbed interface for symbol groups
 tab1, tab2, tab3, tab4, tab5 = st.tabs(["🔢 Mathematical", "🔤 Greek", "⚙️ Engineering", "🛢️ Petroleum", "➕ Advanced"])
 
-# Button groups
-button_groups = {
-    "Mathematical": [
-        ("√", "sqrt()"),
-        ("∛", "()^(1/3)"),
-        ("÷", "/"),
-        ("×", "*"),
-        ("^", "^"),
-        ("=", "="),
-        ("≠", "ne"),
-        ("≈", "approx"),
-        ("<", "<"),
-        (">", ">"),
-        ("≤", "le"),
-        ("≥", "ge"),
-        ("±", "±"),
-        ("|x|", "abs()"),
-        ("∫", "Integral(, x)"),
-        ("d/dx", "Derivative(, x)"),
-        ("∑", "Sum(, (n, 1, oo))"),
-        ("∏", "Product(, (n, 1, oo))"),
-        ("lim", "Limit(, x, 0)"),
-        ("log", "log()"),
-        ("ln", "ln()"),
-        ("sin", "sin()"),
-        ("cos", "cos()"),
-        ("tan", "tan()"),
-        ("cot", "cot()"),
-        ("sec", "sec()"),
-        ("csc", "csc()"),
-        ("asin", "asin()"),
-        ("acos", "acos()"),
-        ("atan", "atan()"),
-        ("sinh", "sinh()"),
-        ("cosh", "cosh()"),
-        ("tanh", "tanh()"),
-        ("exp", "exp()"),
-        ("π", "pi"),
-        ("e", "e"),
-        ("∞", "oo"),
-        ("i", "I"),
-        ("_", "_"),
-        ("(", "("),
-        (")", ")"),
-        ("[", "["),
-        ("]", "]"),
-        ("{", "{"),
-        ("}", "}"),
-    ],
-    "Greek": [
-        ("α", "alpha"),
-        ("β", "beta"),
-        ("γ", "gamma"),
-        ("Γ", "Gamma"),
-        ("δ", "delta"),
-        ("Δ", "Delta"),
-        ("ε", "epsilon"),
-        ("ζ", "zeta"),
-        ("η", "eta"),
-        ("θ", "theta"),
-        ("Θ", "Theta"),
-        ("ι", "iota"),
-        ("κ", "kappa"),
-        ("λ", "lambda"),
-        ("Λ", "Lambda"),
-        ("μ", "mu"),
-        ("ν", "nu"),
-        ("ξ", "xi"),
-        ("ρ", "rho"),
-        ("σ", "sigma"),
-        ("Σ", "Sigma"),
-        ("τ", "tau"),
-        ("υ", "upsilon"),
-        ("φ", "phi"),
-        ("Φ", "Phi"),
-        ("χ", "chi"),
-        ("ψ", "psi"),
-        ("ω", "omega"),
-        ("Ω", "Omega"),
-    ],
-    "Engineering": [
-        ("°", "degree"),
-        ("σ (stress)", "sigma"),
-        ("τ (torque)", "tau"),
-        ("E (modulus)", "E"),
-        ("μ (friction)", "mu"),
-        ("ν (Poisson)", "nu"),
-        ("G (shear)", "G"),
-        ("F (force)", "F"),
-        ("M (moment)", "M"),
-        ("V (shear)", "V"),
-        ("ε (strain)", "epsilon"),
-    ],
-    "Petroleum": [
-        ("φ (porosity)", "phi"),
-        ("κ (perm)", "kappa"),
-        ("σ (tension)", "sigma"),
-        ("τ (shear)", "tau"),
-        ("γ̇ (shear rate)", "shear_rate"),
-        ("k (perm)", "k"),
-        ("μ (viscosity)", "mu"),
-        ("ρ (density)", "rho"),
-        ("γ (sp. gravity)", "gamma"),
-        ("P (pressure)", "P"),
-        ("q (flow rate)", "q"),
-        ("v (velocity)", "v"),
-        ("S (saturation)", "S"),
-        ("c (compress)", "c"),
-        ("B (FVF)", "B"),
-        ("z (Z-factor)", "z"),
-        ("R (GOR)", "R"),
-        ("h (net pay)", "h"),
-    ],
-    "Advanced": [
-        ("∂", "partial"),
-        ("∇", "nabla"),
-        ("∇²", "laplacian"),
-        ("⊗", "otimes"),
-        ("⊕", "oplus"),
-        ("∈", "in"),
-        ("∉", "notin"),
-        ("⊂", "subset"),
-        ("⊆", "subseteq"),
-        ("∪", "cup"),
-        ("∩", "cap"),
-        ("∅", "emptyset"),
-        ("∀", "forall"),
-        ("∃", "exists"),
-        ("¬", "neg"),
-        ("∧", "wedge"),
-        ("∨", "vee"),
-        ("⇒", "implies"),
-        ("⇔", "iff"),
-    ]
-}
-
 # Render buttons for each tab
 tab_mapping = {tab1: "Mathematical", tab2: "Greek", tab3: "Engineering", tab4: "Petroleum", tab5: "Advanced"}
 
 for tab, group_name in tab_mapping.items():
     with tab:
         cols = st.columns(6)
-        for i, (label, text) in enumerate(button_groups[group_name]):
+        for i, (label, text) in enumerate(BUTTON_GROUPS[group_name]):
             with cols[i % 6]:
                 st.button(label, key=f"{group_name}_{i}", on_click=partial(insert_at_cursor, text), 
                           help=f"Insert {text}", use_container_width=True, type="secondary")
@@ -812,7 +932,7 @@ if st.session_state.latex and not st.session_state.latex.startswith("Invalid"):
         bg_color = 'white'
         text_color = 'black'
         
-        img_b64 = latex_to_image(st.session_state.latex, st.session_state.font_size, bg_color, text_color)
+        png_data = latex_to_image(st.session_state.latex, st.session_state.font_size, bg_color, text_color)
 
         # Download buttons
         col1, col2, col3 = st.columns(3)
@@ -825,8 +945,7 @@ if st.session_state.latex and not st.session_state.latex.startswith("Invalid"):
                 use_container_width=True
             )
         with col2:
-            if img_b64:
-                png_data = base64.b64decode(img_b64)
+            if png_data:
                 st.download_button(
                     label="📥 Download PNG",
                     data=png_data,
@@ -835,7 +954,6 @@ if st.session_state.latex and not st.session_state.latex.startswith("Invalid"):
                     use_container_width=True
                 )
         with col3:
-            # Download as SVG (placeholder - would need actual SVG generation)
             st.download_button(
                 label="📥 LaTeX Source",
                 data=f"\\documentclass{{article}}\\usepackage{{amsmath}}\\begin{{document}}\n${st.session_state.latex}$\n\\end{{document}}",
@@ -844,130 +962,37 @@ if st.session_state.latex and not st.session_state.latex.startswith("Invalid"):
                 use_container_width=True
             )
 
-        # JS + HTML block for clipboard functionality
-        copy_js = """
-        <script src="https://cdnjs.cloudflare.com/ajax/libs/mathjax/3.2.2/es5/tex-mml-chtml.min.js"></script>
-        <script>
-        function copyLatexText() {
-            const button = document.getElementById('copy-latex-btn');
-            const latexCode = document.getElementById('latex-content').innerText;
-            navigator.clipboard.writeText(latexCode).then(() => {
-                button.style.backgroundColor = '#00c853';
-                button.innerText = '✓ Copied!';
-                setTimeout(() => {
-                    button.style.backgroundColor = '#0f80c1';
-                    button.innerText = '📋 Copy LaTeX';
-                }, 1500);
-            });
-        }
-
-        async function copyForWord() {
-            const button = document.getElementById('copy-word-btn');
-            const latexCode = document.getElementById('latex-content').innerText;
-            try {
-                const mathml = await MathJax.tex2mmlPromise(latexCode);
-                const htmlContent = `<!DOCTYPE html><html><body>${mathml}</body></html>`;
-                const blob = new Blob([htmlContent], { type: 'text/html' });
-                const clipboardItem = new ClipboardItem({ 'text/html': blob });
-                await navigator.clipboard.write([clipboardItem]);
-                button.style.backgroundColor = '#00c853';
-                button.innerText = '✓ Copied!';
-                setTimeout(() => {
-                    button.style.backgroundColor = '#0f80c1';
-                    button.innerText = '📄 Copy for Word';
-                }, 1500);
-            } catch (err) {
-                button.style.backgroundColor = '#ff1744';
-                button.innerText = 'Failed';
-                setTimeout(() => {
-                    button.style.backgroundColor = '#0f80c1';
-                    button.innerText = '📄 Copy for Word';
-                }, 1500);
-            }
-        }
+        # Vector export is opt-in so plain typing does not pay for two extra renders
+        col_v1, col_v2, col_v3 = st.columns(3)
+        with col_v1:
+            st.session_state.vector_export = st.checkbox("🖋️ Vector export (SVG / PDF)",
+                                                         value=st.session_state.vector_export)
+            if st.session_state.vector_export:
+                st.session_state.minify_svg = st.checkbox("Minify SVG", value=st.session_state.minify_svg,
+                                                          help="Strip metadata and round coordinates")
+        if st.session_state.vector_export:
+            vector_files = vector_exports(st.session_state.latex, st.session_state.font_size, bg_color, text_color,
+                                          st.session_state.minify_svg)
+            for col, fmt, mime in ((col_v2, "svg", "image/svg+xml"), (col_v3, "pdf", "application/pdf")):
+                with col:
+                    if fmt in vector_files:
+                        st.download_button(
+                            label=f"📥 Download {fmt.upper()} ({len(vector_files[fmt]) / 1024:.1f} KB)",
+                            data=vector_files[fmt],
+                            file_name=f"formula.{fmt}",
+                            mime=mime,
+                            use_container_width=True
+                        )
 
-        async function copyAsImage() {
-            const button = document.getElementById('copy-image-btn');
-            const imgElement = document.getElementById('latex-image');
-            if (!imgElement) {
-                button.style.backgroundColor = '#ff1744';
-                button.innerText = 'No Image';
-                setTimeout(() => {
-                    button.style.backgroundColor = '#0f80c1';
-                    button.innerText = '🖼️ Copy as Image';
-                }, 1500);
-                return;
-            }
-            try {
-                const response = await fetch(imgElement.src);
-                const blob = await response.blob();
-                const clipboardItem = new ClipboardItem({ 'image/png': blob });
-                await navigator.clipboard.write([clipboardItem]);
-                button.style.backgroundColor = '#00c853';
-                button.innerText = '✓ Copied!';
-                setTimeout(() => {
-                    button.style.backgroundColor = '#0f80c1';
-                    button.innerText = '🖼️ Copy as Image';
-                }, 1500);
-            } catch (err) {
-                button.style.backgroundColor = '#ff1744';
-                button.innerText = 'Failed';
-                setTimeout(() => {
-                    button.style.backgroundColor = '#0f80c1';
-                    button.innerText = '🖼️ Copy as Image';
-                }, 1500);
-            }
-        }
-        </script>
-        """
-
-        html_content = f"""
-        {copy_js}
-        <div style="max-height:600px; overflow-y:auto; border: 2px solid #e0e0e0; padding: 25px; 
-                    border-radius: 12px; background: linear-gradient(to bottom, #ffffff, #f8f9fa); 
-                    box-shadow: 0 4px 6px rgba(0,0,0,0.1);">
-            <div id="latex-content" style="display:none;">{st.session_state.latex}</div>
-        """
-
-        if img_b64:
-            html_content += f"""
-            <div style="text-align: center; background-color: white; padding: 30px; 
-                        border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.05);">
-                <img id="latex-image" src="data:image/png;base64,{img_b64}" 
-                     style="max-width: 100%; height: auto;" />
-            </div>
-            """
-        else:
-            html_content += "<p style='color:red; text-align:center;'>⚠️ Image generation failed</p>"
-
-        html_content += """
-            <div style="display:flex; gap:12px; margin-top:25px; justify-content: center; flex-wrap: wrap;">
-                <button id="copy-latex-btn" onclick="copyLatexText()" 
-                        style="background-color:#0f80c1;color:white;padding:14px 28px;
-                               border:none;border-radius:8px;cursor:pointer;font-weight:600;
-                               font-size:15px;transition:all 0.3s;box-shadow: 0 2px 4px rgba(0,0,0,0.2);">
-                    📋 Copy LaTeX
-                </button>
-                <button id="copy-word-btn" onclick="copyForWord()" 
-                        style="background-color:#0f80c1;color:white;padding:14px 28px;
-                               border:none;border-radius:8px;cursor:pointer;font-weight:600;
-                               font-size:15px;transition:all 0.3s;box-shadow: 0 2px 4px rgba(0,0,0,0.2);">
-                    📄 Copy for Word
-                </button>
-                <button id="copy-image-btn" onclick="copyAsImage()" 
-                        style="background-color:#0f80c1;color:white;padding:14px 28px;
-                               border:none;border-radius:8px;cursor:pointer;font-weight:600;
-                               font-size:15px;transition:all 0.3s;box-shadow: 0 2px 4px rgba(0,0,0,0.2);">
-                    🖼️ Copy as Image
-                </button>
-            </div>
-        </div>
-        """
-
-        # Better dynamic height calculation
-        latex_length = len(st.session_state.latex)
-        dynamic_height = max(450, min(750, 450 + (latex_length // 20) * 10))
-        components.html(html_content, height=dynamic_height)
+        # Copy buttons and preview live in the static component; only the props change per rerun.
+        # The PNG itself is fetched (and kept by the browser) from its media URL when the URL changes.
+        image_url = output_image_url(png_data)
+        mathml = output_mathml(st.session_state.latex)
+        METRICS.observe("payload_bytes", len(st.session_state.latex.encode("utf-8")) + len(image_url or "")
+                        + len((mathml or "").encode("utf-8")), kind="formula_output")
+        with timed("formula_output", st.session_state.stage_times):
+            formula_output(latex=st.session_state.latex, image_url=image_url, mathml=mathml,
+                           key="formula_output", default=None)
         
         # Show LaTeX code in expandable section
         with st.expander("📝 View LaTeX Source Code"):
@@ -978,6 +1003,278 @@ if st.session_state.latex and not st.session_state.latex.startswith("Invalid"):
 else:
     st.info("👆 Enter a valid formula or LaTeX code above to see the rendering.")
 
+# Batch conversion
+st.divider()
+with st.expander("📦 Batch Conversion"):
+    st.caption("Upload a TXT file (one formula per line), a CSV (a `formula` column, or the first column) "
+               "or NDJSON (`{\"formula\": ...}` per line). Rows are converted in parallel and written "
+               "to a ZIP as they finish.")
+    batch_file = st.file_uploader("Formulas file", type=["txt", "csv", "ndjson", "jsonl"], key="batch_file")
+    batch_formats = st.multiselect("Outputs", list(BATCH_FORMATS), default=list(BATCH_FORMATS))
+    if batch_file and st.button("▶️ Convert Batch", type="primary", disabled=not batch_formats):
+        total_rows = max(1, count_lines(batch_file))
+        progress_bar = st.progress(0.0, text="Starting workers…")
+
+        def report_progress(summary):
+            progress_bar.progress(min(1.0, summary["total"] / total_rows),
+                                  text=f"{summary['total']} processed, {summary['failed']} failed")
+
+        if st.session_state.batch_result:
+            discard_download(st.session_state.batch_result["path"])
+        with new_download("formulas_", ".zip") as out_file:
+            summary = write_batch_zip(read_formulas(batch_file, batch_file.name), out_file,
+                                      font_size=st.session_state.font_size, formats=batch_formats,
+                                      progress=report_progress)
+        st.session_state.batch_result = {"path": out_file.name, "summary": summary}
+
+    if st.session_state.batch_result:
+        summary = st.session_state.batch_result["summary"]
+        st.success(f"✓ Converted {summary['converted']} of {summary['total']} formulas")
+        offer_download(st.session_state.batch_result, "📥 Download ZIP", "formulas.zip", "application/zip",
+                       "batch_result")
+        if summary["errors"]:
+            st.warning(f"{summary['failed']} rows failed (also listed in errors.csv inside the ZIP)")
+            st.dataframe(summary["errors"], use_container_width=True, hide_index=True)
+
+# Multi-line document
+with st.expander("📄 Document"):
+    st.caption("Write a derivation with one formula (or LaTeX) per line; lines starting with # are comments. "
+               "Only lines whose text changed are converted again, and large pastes are converted in parallel.")
+    st.button("⬇️ Append current formula", on_click=append_formula_to_document,
+              disabled=not st.session_state.formula.strip())
+    st.text_area("Document", key="document_text", height=240,
+                 placeholder="q = permeability*A*(P_1 - P_2)/(viscosity*L)\nP_1 = P_2 + q*viscosity*L/(permeability*A)")
+    if st.session_state.document_text.strip():
+        document = st.session_state.document
+        conversion_bar = []
+
+        def report_conversion(done, total):
+            # Only a paste or first load is slow enough to need a progress bar
+            if total >= PARALLEL_MIN_LINES:
+                if not conversion_bar:
+                    conversion_bar.append(st.progress(0.0))
+                conversion_bar[0].progress(done / total, text=f"{done}/{total} lines converted")
+
+        with collect_stages(st.session_state.stage_times):
+            document_rows = document.update(st.session_state.document_text, progress=report_conversion)
+        if conversion_bar:
+            conversion_bar[0].empty()
+        document_errors = document.errors()
+        st.caption(f"{len(document_rows)} lines · {document.last_converted} converted this run · "
+                   f"{len(document_errors)} with errors")
+        if len(document_rows) > len(document_errors):
+            st.latex(document.aligned())
+        for line_number, source, error in document_errors[:20]:
+            st.warning(f"Line {line_number}: {error} (`{source}`)")
+        if len(document_errors) > 20:
+            st.caption(f"… and {len(document_errors) - 20} more lines with errors")
+
+        col_tex, col_pdf = st.columns(2)
+        with col_tex:
+            st.download_button("📥 Download .tex (align)", data=document.to_tex(), file_name="document.tex",
+                               mime="text/x-tex", use_container_width=True)
+        with col_pdf:
+            if st.button("🖨️ Build PDF", use_container_width=True):
+                render_bar = st.progress(0.0, text="Rendering lines…")
+
+                def report_render(done, total):
+                    render_bar.progress(done / total, text=f"{done}/{total} lines rendered")
+
+                if st.session_state.document_pdf:
+                    discard_download(st.session_state.document_pdf["path"])
+                with new_download("document_", ".pdf") as out_file:
+                    with collect_stages(st.session_state.stage_times):
+                        pages = document.write_pdf(out_file, st.session_state.font_size, progress=report_render)
+                render_bar.empty()
+                st.session_state.document_pdf = {"path": out_file.name, "pages": pages,
+                                                 "text": st.session_state.document_text,
+                                                 "skipped": document.render_errors(st.session_state.font_size)}
+            if st.session_state.document_pdf:
+                document_pdf = st.session_state.document_pdf
+                outdated = " (outdated)" if document_pdf["text"] != st.session_state.document_text else ""
+                offer_download(document_pdf, f"📥 Download PDF ({document_pdf['pages']} pages){outdated}",
+                               "document.pdf", "application/pdf", "document_pdf")
+                for line_number, source, error in document_pdf["skipped"][:20]:
+                    st.warning(f"Line {line_number} left out of the PDF: {error} (`{source}`)")
+
+# Equation solver
+with st.expander("🧩 Solve"):
+    st.caption("Solve an equation, or a system with one equation per line, for the chosen symbols. "
+               "Solving runs in a separate process with a time limit, trying solve, then solveset, then "
+               "nsolve; results are cached, so common rearrangements come back instantly.")
+    st.button("⬇️ Use current formula", on_click=copy_formula_to_solver,
+              disabled=not st.session_state.formula.strip() or looks_like_latex(st.session_state.formula))
+    st.text_area("Equations (one per line)", key="solve_text", height=100,
+                 placeholder="e.g., q = permeability*A*(P_1 - P_2)/(viscosity*L)")
+    if st.session_state.solve_text.strip():
+        from latexformula.solver import parse_system, symbol_choices
+        equations, parse_error = parse_system(st.session_state.solve_text)
+        if parse_error:
+            st.warning(parse_error)
+        else:
+            choices = symbol_choices(equations)
+            col_targets, col_each = st.columns([3, 1])
+            with col_targets:
+                solve_targets = st.multiselect("Solve for", list(choices), default=list(choices)[:len(equations)],
+                                               key="solve_targets")
+            with col_each:
+                solve_each = st.checkbox("Each separately", key="solve_each", disabled=len(equations) > 1,
+                                         help="Solve the equation for every chosen symbol on its own "
+                                              "(e.g. Darcy's law for k, for μ, …) in one batch")
+            if st.button("🧩 Solve", type="primary", disabled=not solve_targets):
+                run_solve(equations, [choices[name] for name in solve_targets], solve_each)
+    poll_solve()
+    for i, result in enumerate(st.session_state.solve_results or []):
+        solved_for = ", ".join(result["targets"])
+        if not result["solutions"]:
+            st.warning(f"No solution for {solved_for}" + (f" ({result['note']})" if result["note"] else ""))
+            continue
+        st.caption(f"**{solved_for}**: {len(result['solutions'])} solution(s) via `{result['method']}` "
+                   f"(solved in {result['seconds']:.2f} s)")
+        for j, solution in enumerate(result["solutions"][:SOLUTIONS_SHOWN]):
+            for k, row in enumerate(solution):
+                col_eq, col_use = st.columns([5, 1])
+                col_eq.latex(row["latex"])
+                if row["formula"]:
+                    col_use.button("Use", key=f"use_solution_{i}_{j}_{k}", on_click=use_solution,
+                                   args=(row["formula"],), help="Load into the formula input",
+                                   use_container_width=True)
+        if len(result["solutions"]) > SOLUTIONS_SHOWN:
+            st.caption(f"… and {len(result['solutions']) - SOLUTIONS_SHOWN} more")
+
+# Parameter-sweep plot of the current formula
+with st.expander("📈 Plot"):
+    st.caption("Sweep one symbol (line plot) or two (heat map) while the others stay fixed by sliders. "
+               "The formula is compiled once; plots are cached, so revisiting a slider position is instant.")
+    if not st.session_state.formula.strip() or looks_like_latex(st.session_state.formula):
+        st.info("Enter a formula (not LaTeX) above to plot it.")
+    # Compiled only while the plot is switched on: reruns pass through here on every keystroke
+    elif st.toggle("Show plot", key="show_plot"):
+        compiled, compile_error = compiled_formula(st.session_state.formula)
+        if compile_error:
+            st.warning(f"Cannot plot this formula: {compile_error}")
+        elif not compiled:
+            pass  # Still compiling
+        elif not compiled.names:
+            st.info(f"The formula is constant ({compiled.expr}); there is nothing to sweep.")
+        else:
+            col_sweep, col_points, col_adaptive = st.columns([3, 2, 1])
+            with col_sweep:
+                swept = st.multiselect("Sweep", compiled.names, default=list(compiled.names[:1]),
+                                       max_selections=2, key="plot_sweep")
+            with col_points:
+                points = st.select_slider("Points", PLOT_POINTS, value=2000, key="plot_points",
+                                          format_func=lambda n: f"{n:,}")
+            with col_adaptive:
+                adaptive = st.checkbox("Adaptive", value=True, key="plot_adaptive",
+                                       help="1 symbol: add points only where the curve bends. "
+                                            "2 symbols: at most one sample per pixel.")
+            axes = []
+            for name in swept:
+                col_lo, col_hi = st.columns(2)
+                lo = col_lo.number_input(f"`{name}` from", value=0.0, format="%g", key=f"plot_lo_{name}")
+                hi = col_hi.number_input(f"`{name}` to", value=10.0, format="%g", key=f"plot_hi_{name}")
+                axes.append((name, lo, hi))
+            fixed = {}
+            others = [name for name in compiled.names if name not in swept]
+            if others:
+                col_min, col_max = st.columns(2)
+                slider_lo = col_min.number_input("Slider min", value=0.0, format="%g", key="plot_slider_min")
+                slider_hi = col_max.number_input("Slider max", value=10.0, format="%g", key="plot_slider_max")
+                if slider_hi <= slider_lo:
+                    slider_hi = slider_lo + 1.0
+                for name in others:
+                    fixed[name] = st.slider(f"`{name}`", slider_lo, slider_hi,
+                                            value=min(max(1.0, slider_lo), slider_hi),
+                                            step=(slider_hi - slider_lo) / 100, key=f"plot_fixed_{name}")
+            if not axes:
+                st.info("Pick a symbol to sweep.")
+            elif any(hi <= lo for _name, lo, hi in axes):
+                st.warning("Each sweep range needs a 'to' value above its 'from' value.")
+            else:
+                try:
+                    with collect_stages(st.session_state.stage_times):
+                        with timed("plot_sweep"):
+                            plot_png, samples = plot_sweep(compiled, axes, fixed, points, adaptive)
+                    st.image(plot_png, use_container_width=True)
+                    caption = f"{samples['evaluated']:,} points evaluated"
+                    if samples["invalid"]:
+                        caption += f", {samples['invalid']:,} undefined (gaps in the plot)"
+                    st.caption(caption)
+                except Exception as e:
+                    st.error(f"❌ Unable to plot: {str(e)}")
+
+# Numeric evaluation over CSV columns
+with st.expander("🧮 Evaluate"):
+    st.caption("Evaluate the current formula over a CSV file. Each input symbol takes a column "
+               "(matched by name or alias, e.g. `viscosity` for μ) or a constant. The file is processed "
+               "in chunks, so large tables stream through without being loaded at once.")
+    if not st.session_state.formula.strip() or looks_like_latex(st.session_state.formula):
+        st.info("Enter a formula (not LaTeX) above to evaluate it.")
+    else:
+        eval_file = st.file_uploader("Data file (CSV with a header row)", type=["csv"], key="evaluate_file")
+        # Compiled only once a file is uploaded: doit() on integrals can be slow, and reruns pass through here
+        compiled, compile_error = compiled_formula(st.session_state.formula) if eval_file else (None, None)
+        if compile_error:
+            st.warning(f"Cannot evaluate this formula: {compile_error}")
+        elif compiled:
+            st.markdown(f"Output column: `{compiled.target}` · inputs: "
+                        + (", ".join(f"`{name}`" for name in compiled.names) or "none"))
+            header = read_csv_header(eval_file)
+            defaults = match_columns(compiled, header)
+            mapping = {}
+            for name in compiled.names:
+                col_source, col_value = st.columns([2, 1])
+                with col_source:
+                    options = header + ["(constant)"]
+                    index = options.index(defaults[name]) if name in defaults else len(header)
+                    source = st.selectbox(f"`{name}`", options, index=index, key=f"evaluate_source_{name}")
+                with col_value:
+                    if source == "(constant)":
+                        mapping[name] = st.number_input("Value", value=1.0, format="%g", key=f"evaluate_value_{name}")
+                    else:
+                        mapping[name] = source
+            if st.button("▶️ Evaluate", type="primary"):
+                total_rows = max(1, count_lines(eval_file) - 1)
+                progress_bar = st.progress(0.0, text="Evaluating…")
+
+                last_report = [0.0]
+
+                def report_evaluation(summary):
+                    # Chunks are small; a few progress updates per second are enough
+                    if time.perf_counter() - last_report[0] >= 0.2:
+                        last_report[0] = time.perf_counter()
+                        progress_bar.progress(min(1.0, summary["rows"] / total_rows),
+                                              text=f"{summary['rows']:,} rows evaluated")
+
+                if st.session_state.evaluate_result:
+                    discard_download(st.session_state.evaluate_result["path"])
+                out_file = new_download("evaluated_", ".csv", "w", encoding="utf-8", newline="")
+                try:
+                    with out_file, collect_stages(st.session_state.stage_times):
+                        summary = evaluate_csv(compiled, eval_file, out_file, mapping, progress=report_evaluation)
+                    st.session_state.evaluate_result = {"path": out_file.name, "summary": summary}
+                except ValueError as e:
+                    discard_download(out_file.name)
+                    st.session_state.evaluate_result = None
+                    st.error(f"❌ Evaluation failed: {str(e)}")
+
+    if st.session_state.evaluate_result:
+        summary = st.session_state.evaluate_result["summary"]
+        rate = summary["rows"] / summary["seconds"] if summary["seconds"] else 0
+        st.success(f"✓ Evaluated {summary['rows']:,} rows in {summary['seconds']:.2f} s ({rate:,.0f} rows/s)")
+        if summary["mean"] is not None:
+            col_min, col_mean, col_max = st.columns(3)
+            col_min.metric(f"min {summary['target']}", f"{summary['min']:.6g}")
+            col_mean.metric(f"mean {summary['target']}", f"{summary['mean']:.6g}")
+            col_max.metric(f"max {summary['target']}", f"{summary['max']:.6g}")
+        if summary["invalid"]:
+            st.warning(f"{summary['invalid']:,} rows have no finite result (blank or non-numeric inputs, "
+                       "division by zero, or a complex value)")
+        st.dataframe(summary["preview"], use_container_width=True, hide_index=True)
+        offer_download(st.session_state.evaluate_result, "📥 Download results CSV", "evaluated.csv", "text/csv",
+                       "evaluate_result")
+
 # Footer with tips
 st.divider()
 st.markdown("""
@@ -990,3 +1287,31 @@ st.markdown("""
         </p>
     </div>
 """, unsafe_allow_html=True)
+
+# Stage timings for this rerun and latency across all sessions on this server
+record_stage("rerun", time.perf_counter() - rerun_start, st.session_state.stage_times)
+with st.sidebar:
+    st.divider()
+    st.checkbox("⏱️ Show stage timings", key="show_timings", help="Time each stage of this rerun")
+    if st.session_state.show_timings:
+        summary = METRICS.histogram_summary("stage_seconds", "stage")
+        rows = []
+        for stage, seconds in sorted(st.session_state.stage_times.items(), key=lambda item: -item[1]):
+            overall = summary.get(stage, {})
+            rows.append({"Stage": stage, "This run (ms)": round(seconds * 1000, 2),
+                         "All p50 (ms) ≤": overall.get("p50", 0) * 1000,
+                         "All p95 (ms) ≤": overall.get("p95", 0) * 1000,
+                         "Count": overall.get("count", 0)})
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+        st.caption("Stages skipped by a cache hit do not appear. All-session percentiles are histogram bucket bounds.")
+        st.download_button("📥 Metrics (Prometheus)", data=METRICS.to_prometheus(), file_name="metrics.prom",
+                           mime="text/plain", use_container_width=True)
+export_metrics_file()
+st.session_state.stage_times = {}
+
+# Keep polling while a background transform, solve, compile or LaTeX -> MathML conversion is running
+if any(pending and not pending["job"].done()
+       for pending in (st.session_state.transform, st.session_state.solve, st.session_state.compile_job,
+                       st.session_state.mathml_job)):
+    time.sleep(0.5)
+    st.rerun()
@@ -0,0 +1,69 @@
+"""Amortized ms/formula: one render per formula vs one batch pass over N formulas.
+
+Every formula in a run is distinct (no cache hits); batch output is byte-identical to
+single renders, so both paths share RENDER_CACHE entries.
+Run from the repository root:  python benchmarks/bench_batch_render.py [--sizes 1,10,100,1000] [--repeat N]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from latexformula.convert import formula_to_latex
+from latexformula.engine import render_image, render_png_batch
+from latexformula.examples import EXAMPLES
+
+THUMBNAIL = {"font_size": 14, "dpi": 100}  # Sidebar preview settings
+
+
+def corpus(count, run):
+    # Distinct strings each run, so mathtext's own small parse cache never hits
+    latex_strs = [latex_str for latex_str, error in map(formula_to_latex, EXAMPLES.values()) if not error]
+    return [f"{latex_strs[i % len(latex_strs)]} + {run * count + i}" for i in range(count)]
+
+
+def render_each(latex_strs):
+    results = []
+    for latex_str in latex_strs:
+        try:
+            results.append(render_image(latex_str, **THUMBNAIL))
+        except ValueError:
+            results.append(None)
+    return results
+
+
+def per_formula_ms(count, repeat):
+    # Both paths get the same strings; the batch goes first since it bypasses mathtext's parse cache
+    repeat = max(repeat, 200 // count)  # Small N: enough runs for a stable median
+    single, batch = [], []
+    for run in range(repeat):
+        latex_strs = corpus(count, run)
+        start = time.perf_counter()
+        render_png_batch(latex_strs, **THUMBNAIL)
+        middle = time.perf_counter()
+        render_each(latex_strs)
+        end = time.perf_counter()
+        batch.append((middle - start) * 1e3 / count)
+        single.append((end - middle) * 1e3 / count)
+    return statistics.median(single), statistics.median(batch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1,10,100,1000")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    sample = corpus(50, -1)
+    assert render_each(sample) == render_png_batch(sample, **THUMBNAIL), "batch output differs"
+    print(f"{'N':>6}{'single ms/formula':>19}{'batch ms/formula':>18}{'speedup':>9}")
+    for count in (int(value) for value in args.sizes.split(",")):
+        single, batch = per_formula_ms(count, args.repeat)
+        print(f"{count:>6}{single:>19.2f}{batch:>18.2f}{single / batch:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Conversion cache: cost of building the normalized key, cold conversions vs cache hits,
+and a check that every key parses to the same expression as the text it came from.
+
+Run from the repository root:  python benchmarks/bench_convert.py [--repeat N]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import build_corpus
+from latexformula.convert import CONVERSION_CACHE, EXPR_CACHE, formula_to_latex, normalize_formula
+from latexformula.parsing import parse_formula
+
+# Spacing variants whose meaning depends on the spaces the key drops (or must keep)
+SPACING_CASES = [
+    "2e - 3", "1e + 5", "1.5e - 2*x", "2e- 3", "1E - 3", "2e-3",
+    "x / / y", "x // y", "x * * 2", "x ** 2", "x < = y", "x = = y", "a - - b",
+    "sin( x ) + 3 * y", "x  =  y", "f(x , y)",
+]
+
+
+def parsed(formula):
+    try:
+        return parse_formula(formula)
+    except Exception as e:
+        return type(e).__name__
+
+
+# --- Check: the cache key must never change what a formula means ---
+def check_keys(formulas):
+    for formula in formulas:
+        key = normalize_formula(formula)
+        assert parsed(key) == parsed(formula), f"{formula!r} normalizes to {key!r}, which parses differently"
+
+
+def us_per_call(func, formulas, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for formula in formulas:
+            func(formula)
+        samples.append((time.perf_counter() - start) * 1e6 / len(formulas))
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    formulas = [formula for _category, _name, formula in build_corpus()]
+    check_keys(SPACING_CASES + formulas)
+    print(f"keys checked: {len(SPACING_CASES) + len(formulas)} formulas parse the same before and after normalizing")
+
+    spaced = [formula.replace("+", " + ").replace("*", " * ") for formula in formulas]
+    print(f"normalize_formula: {us_per_call(normalize_formula, spaced, args.repeat):8.1f} us/formula")
+    cold = []
+    for _ in range(args.repeat):
+        CONVERSION_CACHE.clear()
+        EXPR_CACHE.clear()
+        cold.append(us_per_call(formula_to_latex, formulas, 1))
+    print(f"cold conversion:   {statistics.median(cold):8.1f} us/formula")
+    print(f"cache hit:         {us_per_call(formula_to_latex, spaced, args.repeat):8.1f} us/formula")
+
+
+if __name__ == "__main__":
+    main()
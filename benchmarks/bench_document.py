@@ -0,0 +1,87 @@
+"""Multi-line documents: full reconversion per edit vs per-line incremental updates,
+serial vs worker fan-out for a cold load, and combined PDF export.
+
+Run from the repository root:  python benchmarks/bench_document.py [--lines 100,300,1000] [--pdf-lines N]
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from latexformula import document as document_module
+from latexformula.convert import CONVERSION_CACHE, EXPR_CACHE, to_latex
+from latexformula.document import Document
+
+TEMPLATES = [
+    "q_{i} = permeability*A*(P_1 - P_{i})/(viscosity*L)",
+    "y_{i} = x^{p} + {i}*sqrt(x)/(1 + mu*k)",
+    "r_{i} = exp(-x^2/{i})*sin({i}*x) + log(1 + x^{p})",
+    "V_{i} = A*h*porosity*(1 - S_w)/B + {i}",
+]
+
+
+def document_lines(count):
+    return [TEMPLATES[i % len(TEMPLATES)].format(i=i, p=i % 7 + 2) for i in range(count)]
+
+
+def clear_caches():
+    CONVERSION_CACHE.clear()
+    EXPR_CACHE.clear()
+
+
+def seconds(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+# --- Legacy: every rerun converts every line (caches cold, as for a new session or process) ---
+def full_reconvert(lines):
+    return [to_latex(line) for line in lines]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", default="100,300,1000")
+    parser.add_argument("--pdf-lines", type=int, default=300)
+    args = parser.parse_args()
+    threshold = document_module.PARALLEL_MIN_LINES
+
+    print(f"{'lines':>6}{'cold serial s':>15}{'cold fan-out s':>16}{'full reconvert ms':>19}"
+          f"{'1-line edit ms':>16}{'no-op rerun ms':>16}")
+    for count in (int(value) for value in args.lines.split(",")):
+        lines = document_lines(count)
+        text = "\n".join(lines)
+
+        clear_caches()
+        document_module.PARALLEL_MIN_LINES = 10 ** 9
+        serial_s = seconds(lambda: Document().update(text))
+        clear_caches()
+        document_module.PARALLEL_MIN_LINES = threshold
+        document = Document()
+        fan_out_s = seconds(lambda: document.update(text))
+
+        clear_caches()
+        full_ms = seconds(lambda: full_reconvert(lines)) * 1e3
+        edits = []
+        for i in range(5):
+            lines[i * 7] = f"z_{i} = sin(x)^{i + 2} - {i}"
+            edited = "\n".join(lines)
+            edits.append(seconds(lambda: document.update(edited)) * 1e3)
+        noop_ms = seconds(lambda: document.update(edited)) * 1e3
+        print(f"{count:>6}{serial_s:>15.2f}{fan_out_s:>16.2f}{full_ms:>19.0f}{sorted(edits)[2]:>16.1f}{noop_ms:>16.1f}")
+
+    document = Document()
+    document.update("\n".join(document_lines(args.pdf_lines)))
+    cold_s = seconds(lambda: document.write_pdf(io.BytesIO()))
+    buf = io.BytesIO()
+    warm_s = seconds(lambda: document.write_pdf(buf))
+    print(f"\nPDF, {args.pdf_lines} lines: cold {cold_s:.2f} s (lines rendered across workers), "
+          f"re-export {warm_s:.2f} s, {len(buf.getvalue()) / 1024:.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Numeric evaluation: naive subs/evalf per row vs one compiled NumPy call, and CSV streaming.
+
+The naive path is timed on --naive-rows rows and reported as rows/s; the vectorized path
+runs the full --rows. The CSV pass writes a --rows file and streams it through
+evaluate_csv(), reporting throughput and the peak Python heap per chunk size.
+Run from the repository root:  python benchmarks/bench_evaluate.py [--rows N] [--naive-rows N]
+"""
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from latexformula.evaluate import COMPILED_CACHE, compile_formula, evaluate_csv
+
+FORMULAS = [
+    "q = permeability*A*(P_1 - P_2)/(viscosity*L)",
+    "q = 2*pi*k*h*(P_e - P_wf)/(mu*B*ln(r_e/r_w))",
+    "V = A*h*porosity*(1 - S_w)/B",
+    "y = exp(-x^2/2)*sin(3*x) + sqrt(x^2 + 1)",
+]
+
+
+def inputs(compiled, rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return {name: rng.uniform(1.0, 10.0, rows) for name in compiled.names}
+
+
+# --- Naive: substitute each row's values and evalf(), as a per-row loop would ---
+def naive(expr, compiled, values, rows):
+    out = np.empty(rows)
+    for i in range(rows):
+        out[i] = float(expr.subs({symbol: values[name][i] for symbol, name in zip(compiled.symbols, compiled.names)}).evalf())
+    return out
+
+
+# --- Compiled, but still called once per row ---
+def compiled_rows(compiled, values, rows):
+    return np.array([compiled.func(*(values[name][i] for name in compiled.names)) for i in range(rows)])
+
+
+def write_csv(path, compiled, rows, chunk=100_000):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(compiled.names)
+        for start in range(0, rows, chunk):
+            values = inputs(compiled, min(chunk, rows - start), seed=start)
+            writer.writerows(zip(*(np.round(values[name], 6).tolist() for name in compiled.names)))
+
+
+def stream(compiled, path, chunk_rows):
+    mapping = {name: name for name in compiled.names}
+    with open(path, "rb") as f, open(os.devnull, "w", encoding="utf-8", newline="") as sink:
+        return evaluate_csv(compiled, f, sink, mapping, chunk_rows=chunk_rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--naive-rows", type=int, default=2000)
+    parser.add_argument("--chunks", default="1024,4096,65536")
+    args = parser.parse_args()
+
+    print(f"{'formula':<46}{'compile ms':>11}{'subs/evalf rows/s':>19}{'per-row call':>14}{'vectorized':>14}")
+    for formula in FORMULAS:
+        COMPILED_CACHE.clear()
+        start = time.perf_counter()
+        compiled, error = compile_formula(formula)
+        compile_s = time.perf_counter() - start
+        if error:
+            print(f"{formula:<46} error: {error}")
+            continue
+        expr = compiled.expr
+        values = inputs(compiled, args.rows)
+
+        start = time.perf_counter()
+        expected = naive(expr, compiled, values, args.naive_rows)
+        naive_rate = args.naive_rows / (time.perf_counter() - start)
+        start = time.perf_counter()
+        compiled_rows(compiled, values, args.naive_rows * 10)
+        row_rate = args.naive_rows * 10 / (time.perf_counter() - start)
+        start = time.perf_counter()
+        result = compiled.evaluate(values)
+        vector_rate = args.rows / (time.perf_counter() - start)
+        assert np.allclose(result[:args.naive_rows], expected), formula
+        print(f"{formula[:45]:<46}{compile_s * 1e3:>11.1f}{naive_rate:>19,.0f}{row_rate:>14,.0f}{vector_rate:>14,.0f}")
+
+    compiled, _ = compile_formula(FORMULAS[1])
+    print(f"\nCSV streaming, {args.rows:,} rows x {len(compiled.names)} input columns ({FORMULAS[1]})")
+    print(f"{'chunk rows':>10}{'seconds':>10}{'rows/s':>12}{'peak MiB':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "wells.csv")
+        write_csv(path, compiled, args.rows)
+        for chunk_rows in (int(value) for value in args.chunks.split(",")):
+            summary = stream(compiled, path, chunk_rows)
+            tracemalloc.start()
+            try:
+                stream(compiled, path, chunk_rows)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            print(f"{chunk_rows:>10}{summary['seconds']:>10.2f}{summary['rows'] / summary['seconds']:>12,.0f}"
+                  f"{peak / 2**20:>10.1f}")
+        print(f"file size: {os.path.getsize(path) / 2**20:.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
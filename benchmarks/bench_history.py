@@ -0,0 +1,142 @@
+"""History/favorites: the legacy list of tuples vs FormulaStore at 10k-100k entries,
+and legacy whole-string JSON import/export vs streaming (peak Python heap).
+
+Run from the repository root:  python benchmarks/bench_history.py [--sizes 10000,100000] [--legacy-max N]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from latexformula.history import FormulaStore, import_history, read_history, write_history
+
+CONVERSIONS = 1000
+PAGE_SIZE = 10
+
+
+def entries(count, prefix="x"):
+    return [(f"{prefix}_{i}^2 + {i}*y", f"{prefix}_{{{i}}}^{{2}} + {i} y") for i in range(count)]
+
+
+# --- Legacy: update_latex() / import_history() before FormulaStore ---
+def legacy_import(history, items):
+    for item in items:
+        if item not in history:
+            history.append(item)
+
+
+def legacy_convert(history, formula, latex, capacity):
+    if formula not in [h[0] for h in history]:
+        history.insert(0, (formula, latex))
+        history = history[:capacity]
+    return history
+
+
+def store_import(store, items):
+    for formula, latex in items:
+        store.add(formula, latex, recent=False)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def peak(func, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        func(*args)
+        return time.perf_counter() - start, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+# --- Import/export of a full store: legacy strings vs streaming through a temp file ---
+def io_rows(size, directory):
+    store = FormulaStore(size)
+    for formula, latex in entries(size):
+        store.add(formula, latex)
+    legacy_path = os.path.join(directory, "legacy.json")
+    rows = []
+
+    def legacy_export():
+        data = json.dumps(list(store.iter_records()), indent=2)
+        with open(legacy_path, "w", encoding="utf-8") as f:
+            f.write(data)
+
+    def legacy_import():
+        with open(legacy_path, "rb") as f:
+            data = json.loads(f.read().decode())
+        target = FormulaStore(size)
+        for item in data:
+            target.add(item["formula"], item["latex"], recent=False)
+
+    rows.append(("legacy json", peak(legacy_export), peak(legacy_import), os.path.getsize(legacy_path)))
+    for fmt, compress in (("ndjson", False), ("ndjson", True), ("json", False)):
+        path = os.path.join(directory, f"history.{fmt}{'.gz' if compress else ''}")
+
+        def export():
+            with open(path, "wb") as f:
+                write_history(store.iter_records(), f, fmt, compress)
+
+        def stream_import():
+            with open(path, "rb") as f:
+                import_history(FormulaStore(size), read_history(f, path))
+
+        label = f"stream {fmt}" + (" gz" if compress else "")
+        rows.append((label, peak(export), peak(stream_import), os.path.getsize(path)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,30000,100000")
+    parser.add_argument("--legacy-max", type=int, default=30000,
+                        help="skip the quadratic legacy import above this size")
+    args = parser.parse_args()
+
+    print(f"{'entries':>8} {'path':<8}{'import ms':>12}{f'{CONVERSIONS} converts ms':>20}{'last page ms':>14}")
+    for size in (int(value) for value in args.sizes.split(",")):
+        items = entries(size)
+        fresh = entries(CONVERSIONS, prefix="new")
+
+        store = FormulaStore(size)
+        import_s, _ = timed(store_import, store, items)
+        start = time.perf_counter()
+        for formula, latex in fresh:
+            store.add(formula, latex)
+        convert_s = time.perf_counter() - start
+        page_s, _ = timed(store.page, store.page_count(PAGE_SIZE) - 1, PAGE_SIZE)
+        print(f"{size:>8} {'store':<8}{import_s * 1e3:>12.1f}{convert_s * 1e3:>20.1f}{page_s * 1e3:>14.3f}")
+
+        if size > args.legacy_max:
+            print(f"{size:>8} {'legacy':<8}{'skipped (O(n^2) import)':>34}")
+            continue
+        history = []
+        import_s, _ = timed(legacy_import, history, items)
+        start = time.perf_counter()
+        for formula, latex in fresh:
+            history = legacy_convert(history, formula, latex, size)
+        convert_s = time.perf_counter() - start
+        page_s, _ = timed(lambda: history[-PAGE_SIZE:])
+        print(f"{size:>8} {'legacy':<8}{import_s * 1e3:>12.1f}{convert_s * 1e3:>20.1f}{page_s * 1e3:>14.3f}")
+
+    # The store itself holds the records in every row, so peaks are the extra heap on top of it
+    print(f"\n{'entries':>8} {'file format':<18}{'export ms':>10}{'peak MiB':>10}"
+          f"{'import ms':>10}{'peak MiB':>10}{'file KiB':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in (int(value) for value in args.sizes.split(",")):
+            for label, (export_s, export_peak), (import_s, import_peak), file_size in io_rows(size, directory):
+                print(f"{size:>8} {label:<18}{export_s * 1e3:>10.0f}{export_peak / 2**20:>10.1f}"
+                      f"{import_s * 1e3:>10.0f}{import_peak / 2**20:>10.1f}{file_size / 1024:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
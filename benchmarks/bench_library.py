@@ -0,0 +1,71 @@
+"""Formula library: bulk import, FTS trigram search vs LIKE scan, and streaming export.
+
+Run from the repository root:  python benchmarks/bench_library.py [--rows N]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from latexformula.library import FormulaLibrary
+
+QUERIES = ["alpha", "frac", "P_wf", "x_123", "sqrt", "mu k", "darcy"]
+GREEK = ["alpha", "beta", "gamma", "mu", "phi", "rho", "sigma", "omega"]
+
+
+def records(count):
+    for i in range(count):
+        letter = GREEK[i % len(GREEK)]
+        yield {"formula": f"x_{i} = {letter}*sqrt(P_wf + {i})/(k*mu)",
+               "latex": f"x_{{{i}}} = \\frac{{\\{letter} \\sqrt{{P_{{wf}} + {i}}}}}{{k \\mu}}",
+               "tags": "darcy" if i % 50 == 0 else ""}
+
+
+def time_queries(library, repeat):
+    rows = []
+    for query in QUERIES:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            hits = library.search(query, limit=50)
+            timings.append(time.perf_counter() - start)
+        rows.append((query, len(hits), statistics.median(timings)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        library = FormulaLibrary(os.path.join(directory, "library.db"))
+        start = time.perf_counter()
+        imported, _skipped = library.import_records(records(args.rows))
+        import_s = time.perf_counter() - start
+        print(f"import: {imported} rows in {import_s:.2f} s ({imported / import_s:,.0f} rows/s), "
+              f"FTS index: {'trigram' if library.fts else 'unavailable'}")
+
+        fts = time_queries(library, args.repeat)
+        library.fts = False  # Same queries through the LIKE fallback
+        like = time_queries(library, args.repeat)
+        library.fts = True
+        print(f"{'query':<10}{'hits':>6}{'FTS ms':>10}{'LIKE ms':>10}")
+        for (query, hits, fts_s), (_query, _hits, like_s) in zip(fts, like):
+            print(f"{query:<10}{hits:>6}{fts_s * 1e3:>10.2f}{like_s * 1e3:>10.2f}")
+
+        with open(os.devnull, "w", encoding="utf-8") as sink:
+            start = time.perf_counter()
+            exported = library.export_ndjson(sink)
+            export_s = time.perf_counter() - start
+        print(f"export: {exported} rows in {export_s:.2f} s ({exported / export_s:,.0f} rows/s)")
+        library.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Latency of "Copy for Word": server-side MathML (cold and cached) vs the vendored KaTeX on the client.
+
+The server path moves MathML generation off the click: on click the browser only
+builds a Blob. When Node is on PATH, the client fallback (frontend/formula_output/
+vendor/katex) is timed too, including the script load every new session pays
+before its first copy.
+
+Run from the repository root:  python benchmarks/bench_mathml.py [--repeat N] [--no-client]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import build_corpus
+from latexformula.convert import EXPR_CACHE, formula_to_latex
+from latexformula.mathml import MATHML_CACHE, expr_to_mathml, formula_to_mathml, latex_to_mathml
+from latexformula.parsing import parse_formula
+
+KATEX = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                     "frontend", "formula_output", "vendor", "katex", "katex.min.js")
+
+# Loads KaTeX, then converts each LaTeX string to MathML once, as the panel's fallback does
+_NODE_SCRIPT = """
+const start = process.hrtime.bigint();
+const katex = require(%(katex)s);
+const loaded = Number(process.hrtime.bigint() - start) / 1e6;
+const corpus = JSON.parse(require('fs').readFileSync(%(corpus)s, 'utf8'));
+const timings = [];
+let failed = 0;
+for (const latex of corpus) {
+    const t = process.hrtime.bigint();
+    try { katex.renderToString(latex, {output: 'mathml', displayMode: true, throwOnError: true}); }
+    catch (e) { failed += 1; }
+    timings.push(Number(process.hrtime.bigint() - t) / 1e6);
+}
+console.log(JSON.stringify({load_ms: loaded, timings_ms: timings, failed: failed}));
+"""
+
+
+def corpus_pairs():
+    pairs = []
+    for _category, _name, formula in build_corpus():
+        latex_str, error = formula_to_latex(formula)
+        if not error:
+            pairs.append((formula, latex_str))
+    return pairs
+
+
+def summarize(label, timings_ms):
+    timings_ms = sorted(timings_ms)
+    p95 = timings_ms[max(0, int(len(timings_ms) * 0.95) - 1)]
+    print(f"{label:<34}{statistics.median(timings_ms):>10.3f}{p95:>10.3f}{timings_ms[-1]:>10.3f}")
+
+
+def time_each(func, items, repeat):
+    timings = []
+    for item in items:
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func(item)
+            elapsed = (time.perf_counter() - start) * 1e3
+            best = elapsed if best is None else min(best, elapsed)
+        timings.append(best)
+    return timings
+
+
+def katex_timings(latex_list):
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump(latex_list, f)
+    try:
+        script = _NODE_SCRIPT % {"katex": json.dumps(KATEX), "corpus": json.dumps(f.name)}
+        out = subprocess.run(["node", "-e", script], check=True, capture_output=True, text=True).stdout
+        return json.loads(out)
+    finally:
+        os.remove(f.name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-client", action="store_true", help="skip the KaTeX timings (needs Node)")
+    args = parser.parse_args()
+
+    pairs = corpus_pairs()
+    formulas = [formula for formula, _latex in pairs]
+    exprs = [parse_formula(formula) for formula in formulas]
+    sizes = [len(expr_to_mathml(expr).encode("utf-8")) for expr in exprs]
+    print(f"corpus: {len(pairs)} formulas, median MathML {statistics.median(sizes) / 1024:.1f} KiB "
+          f"(max {max(sizes) / 1024:.1f} KiB) added to the component props")
+    print(f"{'path (ms per formula)':<34}{'median':>10}{'p95':>10}{'max':>10}")
+
+    summarize("server: print from parsed expr", time_each(expr_to_mathml, exprs, args.repeat))
+
+    def cold(formula):
+        MATHML_CACHE.clear()
+        EXPR_CACHE.clear()
+        formula_to_mathml(formula)
+
+    summarize("server: parse + print (cold)", time_each(cold, formulas, args.repeat))
+    for formula in formulas:
+        formula_to_mathml(formula)
+    summarize("server: cache hit", time_each(formula_to_mathml, formulas, args.repeat))
+
+    def latex_input(latex_str):
+        MATHML_CACHE.clear()
+        latex_to_mathml(latex_str)
+
+    latex_list = [latex_str for _formula, latex_str in pairs]
+    mathml, error = latex_to_mathml(latex_list[0])
+    if mathml is None and "antlr4" in (error or ""):
+        print("server: LaTeX input skipped (antlr4-python3-runtime not installed)")
+    else:
+        summarize("server: LaTeX input (parse_latex)", time_each(latex_input, latex_list, args.repeat))
+
+    if not args.no_client and shutil.which("node"):
+        result = katex_timings(latex_list)
+        print(f"client: KaTeX load {result['load_ms']:.0f} ms (once per session, before the first copy); "
+              f"{result['failed']} of {len(latex_list)} not convertible")
+        summarize("client: KaTeX MathML on click", result["timings_ms"])
+
+if __name__ == "__main__":
+    main()
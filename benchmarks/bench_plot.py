@@ -0,0 +1,80 @@
+"""Parameter-sweep plots: per-point subs/evalf vs the compiled sweep, and slider-move latency.
+
+A "slider move" changes one fixed value and re-plots; "revisit" returns to a cached position.
+Run from the repository root:  python benchmarks/bench_plot.py [--points 1000000] [--naive-points N]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from latexformula.evaluate import COMPILED_CACHE, compile_formula
+from latexformula.plot import PLOT_CACHE, SAMPLE_CACHE, plot_sweep
+
+CASES = [
+    # formula, swept axes, fixed values
+    ("q = permeability*A*(P_1 - P_2)/(viscosity*L)", (("mu", 0.1, 10),),
+     {"kappa": 100, "A": 1, "P_1": 3000, "P_2": 2000, "L": 100}),
+    ("y = a*sin(1/x)*x + exp(-x^2)", (("x", -1, 1),), {"a": 1}),
+    ("q = permeability*A*(P_1 - P_2)/(viscosity*L)", (("kappa", 1, 500), ("mu", 0.1, 5)),
+     {"A": 1, "P_1": 3000, "P_2": 2000, "L": 100}),
+]
+
+
+def ms(func):
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1e3
+
+
+# --- Naive: one subs/evalf per point, as a plain loop over the sweep would ---
+def naive_rate(compiled, axes, fixed, count):
+    expr = compiled.expr.subs({compiled.symbols[compiled.names.index(name)]: value for name, value in fixed.items()})
+    symbols = [compiled.symbols[compiled.names.index(name)] for name, _lo, _hi in axes]
+    grids = [np.linspace(lo, hi, count) for _name, lo, hi in axes]
+    start = time.perf_counter()
+    for i in range(count):
+        complex(expr.subs({symbol: grid[i] for symbol, grid in zip(symbols, grids)}).evalf())
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--naive-points", type=int, default=500)
+    args = parser.parse_args()
+
+    plot_sweep(*compile_formula("y = x")[:1], (("x", 0, 1),), {}, 100)  # Load matplotlib outside the timings
+    print(f"{'case':<34}{'mode':<10}{'naive pts/s':>12}{'compile ms':>11}{'first ms':>10}"
+          f"{'slider ms':>10}{'revisit ms':>11}{'evaluated':>11}")
+    for formula, axes, fixed in CASES:
+        label = f"{formula.split('=')[0].strip()}({', '.join(name for name, _lo, _hi in axes)})"
+        for mode, points, adaptive in (("adaptive", args.points, True), ("uniform", args.points, False)):
+            COMPILED_CACHE.clear()
+            SAMPLE_CACHE.clear()
+            PLOT_CACHE.clear()
+            compiled = None
+
+            def compile_once():
+                nonlocal compiled
+                compiled, _error = compile_formula(formula)
+
+            compile_ms = ms(compile_once)
+            naive = naive_rate(compiled, axes, fixed, args.naive_points)
+            first_ms = ms(lambda: plot_sweep(compiled, axes, fixed, points, adaptive))
+            moved = dict(fixed)
+            name = next(iter(moved))
+            moved[name] = moved[name] * 1.5
+            slider_ms = ms(lambda: plot_sweep(compiled, axes, moved, points, adaptive))
+            revisit_ms = ms(lambda: plot_sweep(compiled, axes, fixed, points, adaptive))
+            _png, samples = plot_sweep(compiled, axes, fixed, points, adaptive)
+            print(f"{label:<34}{mode:<10}{naive:>12,.0f}{compile_ms:>11.1f}{first_ms:>10.1f}"
+                  f"{slider_ms:>10.1f}{revisit_ms:>11.2f}{samples['evaluated']:>11,}")
+
+
+if __name__ == "__main__":
+    main()
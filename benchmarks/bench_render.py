@@ -0,0 +1,154 @@
+"""ms/image and peak memory: legacy measure-then-render figures vs the single-pass engine.
+
+Run from the repository root:  python benchmarks/bench_render.py [--repeat N]
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from latexformula.convert import formula_to_latex
+from latexformula.examples import EXAMPLES
+from latexformula.render import render_latex
+
+FONT_SIZES = [16, 18, 20, 22, 24, 28]
+# Output must match the legacy path: the same glyphs at the same scale, on about the same canvas
+INK_TOLERANCE_PX = 3  # Formula extent; anti-aliased edges land on neighbouring pixels
+INK_TOLERANCE_GRAY = 8  # Mean gray-level difference where both extents are equal
+CANVAS_TOLERANCE = 0.1  # Image width and height, as a fraction of the legacy size (margins are approximated)
+
+
+# --- Legacy path: latex_to_image() before the render engine ---
+def legacy_render(latex_str, font_size=20, bg_color='white', text_color='black'):
+    fig, ax = plt.subplots(figsize=(1, 1))
+    ax.axis('off')
+    text = ax.text(0.5, 0.5, f'${latex_str}$', fontsize=font_size,
+                   ha='center', va='center', color=text_color)
+    fig.canvas.draw()
+    bbox = text.get_window_extent(renderer=fig.canvas.get_renderer())
+    dpi = fig.dpi
+    width_inches = (bbox.width / dpi) + 0.5
+    height_inches = (bbox.height / dpi) + 0.3
+    plt.close(fig)
+
+    fig = plt.figure(figsize=(width_inches, height_inches), facecolor=bg_color)
+    ax = fig.add_axes([0, 0, 1, 1])
+    ax.axis('off')
+    ax.text(0.5, 0.5, f'${latex_str}$', fontsize=font_size,
+            ha='center', va='center', color=text_color)
+    buf = BytesIO()
+    plt.savefig(buf, format='png', dpi=200, bbox_inches='tight',
+                pad_inches=0.1, facecolor=bg_color)
+    plt.close(fig)
+    return buf.getvalue()
+
+
+def engine_render(latex_str, font_size=20):
+    return render_latex(latex_str, font_size)
+
+
+def renderable_corpus():
+    corpus = []
+    for formula in EXAMPLES.values():
+        latex_str, error = formula_to_latex(formula)
+        if error:
+            continue
+        try:
+            engine_render(latex_str)
+        except ValueError:
+            continue  # mathtext cannot lay this out (e.g. \limits); neither path can render it
+        corpus.append(latex_str)
+    return corpus
+
+
+# --- Helper: (image height, width) and the grayscale crop around the drawn formula ---
+def ink(png):
+    gray = np.asarray(Image.open(BytesIO(png)).convert("L"), dtype=np.float32)
+    rows, cols = np.nonzero(gray < 255)
+    return gray.shape, gray[rows.min():rows.max() + 1, cols.min():cols.max() + 1]
+
+
+# --- Check: the engine draws what the legacy path drew, returning the largest differences seen ---
+def compare_output(corpus):
+    worst_ink = worst_gray = worst_canvas = 0.0
+    for latex_str in corpus:
+        for font_size in FONT_SIZES:
+            legacy_shape, legacy_ink = ink(legacy_render(latex_str, font_size))
+            engine_shape, engine_ink = ink(engine_render(latex_str, font_size))
+            case = f"{latex_str!r} at {font_size} pt"
+            ink_px = max(abs(a - b) for a, b in zip(legacy_ink.shape, engine_ink.shape))
+            canvas = max(abs(a - b) / a for a, b in zip(legacy_shape, engine_shape))
+            assert ink_px <= INK_TOLERANCE_PX, f"{case}: formula extent {engine_ink.shape} vs {legacy_ink.shape}"
+            assert canvas <= CANVAS_TOLERANCE, f"{case}: image size {engine_shape} vs {legacy_shape}"
+            if legacy_ink.shape == engine_ink.shape:
+                gray = float(np.abs(legacy_ink - engine_ink).mean())
+                assert gray <= INK_TOLERANCE_GRAY, f"{case}: pixels differ by {gray:.1f} gray levels on average"
+                worst_gray = max(worst_gray, gray)
+            worst_ink, worst_canvas = max(worst_ink, ink_px), max(worst_canvas, canvas)
+    return worst_ink, worst_gray, worst_canvas
+
+
+def measure(func, corpus, repeat):
+    func(corpus[0], FONT_SIZES[0])  # Load fonts before timing
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = 0
+    for _ in range(repeat):
+        for latex_str in corpus:
+            for font_size in FONT_SIZES:
+                func(latex_str, font_size)
+                count += 1
+    elapsed = time.perf_counter() - start
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+    return elapsed / count, peak, rss_growth * 1024
+
+
+def measure_isolated(name, repeat):
+    # Each path runs in a fresh interpreter so RSS growth is not shared between them
+    func = {"legacy": legacy_render, "engine": engine_render}[name]
+    return measure(func, renderable_corpus(), repeat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    ink_px, gray, canvas = compare_output(renderable_corpus())
+    print(f"output checked against legacy: formula extent within {ink_px:.0f} px, mean pixel difference "
+          f"{gray:.1f}/255 where extents match, image size within {canvas:.1%}")
+
+    ctx = multiprocessing.get_context("spawn")
+    results = {}
+    for name in ("legacy", "engine"):
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            results[name] = pool.submit(measure_isolated, name, args.repeat).result()
+
+    print(f"corpus: {len(renderable_corpus())} renderable examples x font sizes {FONT_SIZES} x {args.repeat} repeats")
+    print("(time includes tracemalloc overhead; peak heap counts Python/NumPy allocations only)")
+    labels = {"legacy": "legacy (3 layout passes)", "engine": "engine (single pass)    "}
+    for name, (per_image, peak, rss_growth) in results.items():
+        print(f"{labels[name]}: {per_image * 1e3:8.2f} ms/image  peak heap {peak / 1024:7.0f} KiB"
+              f"  max RSS growth {rss_growth / 1024:7.0f} KiB")
+    print(f"speedup: {results['legacy'][0] / results['engine'][0]:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Throughput of the local HTTP rendering service (cold, hot and coalesced requests).
+
+Run from the repository root:  python benchmarks/bench_server.py [--requests N] [--clients C]
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from latexformula.server import make_server
+
+
+def fetch(base, path, params):
+    start = time.perf_counter()
+    with urlopen(f"{base}/{path}?{urlencode(params)}") as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def run(label, base, requests, clients):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        latencies = list(pool.map(lambda req: fetch(base, *req), requests))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) > 1 else latencies[0]
+    print(f"{label:<28} {len(requests) / elapsed:9.1f} req/s   "
+          f"p50 {statistics.median(latencies) * 1e3:7.1f} ms   p95 {p95 * 1e3:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    # Measure the service itself, not a render cache left over from earlier runs
+    os.environ["LATEXFORMULA_RENDER_CACHE_DIR"] = ""
+    server = make_server(port=0, workers=args.workers)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"server: {base} with {server.service.workers} warm workers, {args.clients} concurrent clients")
+
+    n = args.requests
+    run("latex, unique formulas", base,
+        [("latex", {"formula": f"x^{i} + {i}*y/(z+{i})"}) for i in range(n)], args.clients)
+    run("latex, repeated (hot)", base,
+        [("latex", {"formula": f"x^{i % 10} + y"}) for i in range(n)], args.clients)
+    run("png, unique formulas", base,
+        [("png", {"latex": f"\\frac{{x^{{{i}}}}}{{y+{i}}}", "size": 20}) for i in range(n)], args.clients)
+    run("png, repeated (hot)", base,
+        [("png", {"latex": f"\\frac{{x^{{{i % 10}}}}}{{y}}", "size": 20}) for i in range(n)], args.clients)
+
+    before = server.service.coalesced
+    run("png, identical burst", base,
+        [("png", {"latex": "\\sqrt{a^{2} + b^{2}} + burst", "size": 28})] * args.clients, args.clients)
+    print(f"coalesced in-flight duplicates during burst: {server.service.coalesced - before}")
+
+    server.shutdown()
+    server.service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Solver: cold solves in-process and through the worker pool vs cached rearrangements.
+
+"variant hit" re-submits the equation with its sides swapped, which maps to the same cache key.
+Run from the repository root:  python benchmarks/bench_solve.py [--repeat N]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from latexformula.solver import SOLVE_CACHE, parse_system, solve_equations, submit_solve, symbol_choices
+
+EQUATIONS = [
+    "q = permeability*A*(P_1 - P_2)/(viscosity*L)",
+    "q = 2*pi*k*h*(P_e - P_wf)/(mu*B*ln(r_e/r_w))",
+    "V = A*h*porosity*(1 - S_w)/B",
+    "P = rho*g*h + P_0",
+]
+
+# Lines parse_system must refuse, and the start of the error it gives
+REJECTED = {
+    "x < 3": "Line 1: only equations can be solved",
+    "x, y": "Line 1: only equations can be solved",
+    "Matrix([[x, 1]])": "Line 1: only equations can be solved",
+    "x = y\nx > 2": "Line 2: only equations can be solved",
+    "x - x": "Line 1: the equation is always true",
+    "1": "Line 1: the equation is always false",
+}
+
+
+# --- Check: inequalities, tuples and matrices are reported, not solved or crashed on ---
+def check_rejected():
+    for text, message in REJECTED.items():
+        equations, error = parse_system(text)
+        assert equations is None and error == message, f"{text!r} gave {error!r}, expected {message!r}"
+
+
+def swapped(text):
+    lhs, rhs = text.split("=", 1)
+    return f"{rhs.strip()} = {lhs.strip()}"
+
+
+def ms(func):
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1e3
+
+
+def wait(job):
+    if job is not None:
+        job.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    check_rejected()
+    print(f"rejected lines checked: {len(REJECTED)}")
+    wait(submit_solve(*parse_system("x = y")[:1], [symbol_choices(parse_system("x = y")[0])["y"]])[1])  # Start the pool
+    print(f"{'equation':<44}{'targets':>8}{'in-process ms':>15}{'pool batch ms':>15}"
+          f"{'hit ms':>9}{'variant hit ms':>16}")
+    for text in EQUATIONS:
+        equations, _error = parse_system(text)
+        choices = symbol_choices(equations)
+        targets = list(choices.values())
+        in_process = sum(ms(lambda target=target: solve_equations(equations, [target], 10)) for target in targets)
+
+        SOLVE_CACHE.clear()
+        pool_ms = ms(lambda: wait(submit_solve(equations, targets, each=True)[1]))
+        hits = [ms(lambda: submit_solve(equations, targets, each=True)) for _ in range(args.repeat)]
+        variant, _error = parse_system(swapped(text))
+        variant_targets = list(symbol_choices(variant).values())
+        variant_hits = [ms(lambda: submit_solve(variant, variant_targets, each=True)) for _ in range(args.repeat)]
+        assert submit_solve(variant, variant_targets, each=True)[1] is None, "variant missed the cache"
+        print(f"{text[:43]:<44}{len(targets):>8}{in_process:>15.1f}{pool_ms:>15.1f}"
+              f"{statistics.median(hits):>9.2f}{statistics.median(variant_hits):>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
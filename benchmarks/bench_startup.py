@@ -0,0 +1,86 @@
+"""Cold start: time to first page and time to first rendered formula, with and without warm-up.
+
+Every measurement runs in a fresh interpreter so nothing is already imported.
+Run from the repository root:  python benchmarks/bench_startup.py [--think SECONDS] [--runs N]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+FORMULA = "q = (k*A*(P1-P2))/(mu*L)"
+
+
+# --- Child: one cold session driven through streamlit's AppTest ---
+def child(think):
+    start = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    streamlit_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=120).run()
+    first_page_s = time.perf_counter() - start
+    heavy_loaded = [name for name in ("sympy", "matplotlib", "numpy") if name in sys.modules]
+
+    time.sleep(think)  # The visitor reads the page before typing
+
+    start = time.perf_counter()
+    at.text_input(key="formula").set_value(FORMULA).run()
+    first_render_s = time.perf_counter() - start
+    if at.exception or not at.session_state.render_memo["png"]:
+        raise SystemExit(f"first render failed: {at.exception}")
+    print(json.dumps({"streamlit_s": streamlit_s, "first_page_s": first_page_s,
+                      "first_render_s": first_render_s, "heavy_at_first_page": heavy_loaded}))
+
+
+# --- Child: what the old module-level imports in app.py cost ---
+def child_eager():
+    start = time.perf_counter()
+    import sympy  # noqa: F401
+    from sympy.parsing.sympy_parser import parse_expr  # noqa: F401
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot  # noqa: F401
+    print(json.dumps({"eager_imports_s": time.perf_counter() - start}))
+
+
+def run_child(args, warmup):
+    env = dict(os.environ, LATEXFORMULA_WARMUP="1" if warmup else "0", LATEXFORMULA_RENDER_CACHE_DIR="")
+    out = subprocess.run([sys.executable, __file__] + args, env=env, cwd=ROOT,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--think", type=float, default=3.0, help="seconds between page load and typing")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--child", choices=["session", "eager"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child == "session":
+        return child(args.think)
+    if args.child == "eager":
+        return child_eager()
+
+    eager = statistics.median(run_child(["--child", "eager"], False)["eager_imports_s"] for _ in range(args.runs))
+    print(f"sympy + parser + pyplot imports (formerly at app.py top): {eager * 1e3:8.0f} ms")
+    print(f"{'warm-up':<10}{'first page ms':>15}{'first render ms':>17}   heavy modules at first page")
+    for warmup in (False, True):
+        results = [run_child(["--child", "session", "--think", str(args.think)], warmup)
+                   for _ in range(args.runs)]
+        page = statistics.median(r["first_page_s"] for r in results)
+        render = statistics.median(r["first_render_s"] for r in results)
+        heavy = ", ".join(results[0]["heavy_at_first_page"]) or "none"
+        print(f"{'on' if warmup else 'off':<10}{page * 1e3:>15.0f}{render * 1e3:>17.0f}   {heavy}")
+    print(f"(median of {args.runs} fresh processes, {args.think:g} s think time before the first formula)")
+
+
+if __name__ == "__main__":
+    main()
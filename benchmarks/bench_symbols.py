@@ -0,0 +1,101 @@
+"""Per-conversion latency of the old per-call symbol table vs the shared registry.
+
+Run from the repository root:  python benchmarks/bench_symbols.py [--repeat N]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sympy as sp
+from sympy.parsing.sympy_parser import (
+    parse_expr, standard_transformations, implicit_multiplication_application, convert_xor
+)
+
+from latexformula.examples import EXAMPLES
+from latexformula.parsing import parse_formula
+
+
+# --- Legacy path: the body of update_latex() before the shared registry ---
+def legacy_convert(formula):
+    local_dict = {
+        "sp": sp, "sqrt": sp.sqrt, "log": sp.log, "ln": sp.log, "sin": sp.sin, "cos": sp.cos,
+        "tan": sp.tan, "cot": sp.cot, "sec": sp.sec, "csc": sp.csc, "asin": sp.asin,
+        "acos": sp.acos, "atan": sp.atan, "sinh": sp.sinh, "cosh": sp.cosh, "tanh": sp.tanh,
+        "exp": sp.exp, "abs": sp.Abs, "floor": sp.floor, "ceiling": sp.ceiling, "Sum": sp.Sum,
+        "Limit": sp.Limit, "Integral": sp.Integral, "Derivative": sp.Derivative, "oo": sp.oo,
+        "pi": sp.pi, "e": sp.E, "I": sp.I,
+        "phi": sp.Symbol(r'\phi'), "kappa": sp.Symbol(r'\kappa'), "mu": sp.Symbol(r'\mu'),
+        "alpha": sp.Symbol(r'\alpha'), "beta": sp.Symbol(r'\beta'), "gamma": sp.Symbol(r'\gamma'),
+        "delta": sp.Symbol(r'\delta'), "Delta": sp.Symbol(r'\Delta'),
+        "epsilon": sp.Symbol(r'\epsilon'), "zeta": sp.Symbol(r'\zeta'), "eta": sp.Symbol(r'\eta'),
+        "theta": sp.Symbol(r'\theta'), "Theta": sp.Symbol(r'\Theta'), "iota": sp.Symbol(r'\iota'),
+        "lambda": sp.Symbol(r'\lambda'), "Lambda": sp.Symbol(r'\Lambda'), "nu": sp.Symbol(r'\nu'),
+        "xi": sp.Symbol(r'\xi'), "rho": sp.Symbol(r'\rho'), "sigma": sp.Symbol(r'\sigma'),
+        "Sigma": sp.Symbol(r'\Sigma'), "tau": sp.Symbol(r'\tau'), "Phi": sp.Symbol(r'\Phi'),
+        "omega": sp.Symbol(r'\omega'), "Omega": sp.Symbol(r'\Omega'),
+        "degree": sp.Symbol(r'\degree'), "approx": sp.Symbol(r'\approx'), "ne": sp.Symbol(r'\ne'),
+        "ge": sp.Symbol(r'\ge'), "le": sp.Symbol(r'\le'),
+        "porosity": sp.Symbol(r'\phi'), "permeability": sp.Symbol(r'\kappa'),
+        "viscosity": sp.Symbol(r'\mu'), "density": sp.Symbol(r'\rho'),
+        "shear_rate": sp.Symbol(r'\dot{\gamma}'),
+        "k": sp.Symbol('k'), "P": sp.Symbol('P'), "q": sp.Symbol('q'), "v": sp.Symbol('v'),
+        "S": sp.Symbol('S'), "c": sp.Symbol('c'), "B": sp.Symbol('B'), "z": sp.Symbol('z'),
+        "R": sp.Symbol('R'), "h": sp.Symbol('h'),
+    }
+    reserved = ['sqrt', 'log', 'ln', 'sin', 'cos', 'tan', 'cot', 'sec', 'csc', 'asin', 'acos', 'atan',
+                'sinh', 'cosh', 'tanh', 'exp', 'abs', 'floor', 'ceiling',
+                'Sum', 'Limit', 'Integral', 'Derivative', 'oo', 'pi', 'e', 'I']
+    for base, subscript in set(re.findall(r'\b([a-zA-Z]+)_([a-zA-Z0-9]+)\b', formula)):
+        var_name = f"{base}_{subscript}"
+        if var_name not in local_dict and base not in reserved:
+            local_dict[var_name] = sp.Symbol(var_name)
+    parsed_formula = formula.replace("^", "**")
+    transformations = standard_transformations + (implicit_multiplication_application, convert_xor)
+    if "=" in parsed_formula:
+        lhs, rhs = parsed_formula.split("=", 1)
+        expr = sp.Eq(parse_expr(lhs.strip(), local_dict=local_dict, transformations=transformations),
+                     parse_expr(rhs.strip(), local_dict=local_dict, transformations=transformations))
+    else:
+        expr = parse_expr(parsed_formula, local_dict=local_dict, transformations=transformations)
+    return sp.latex(expr, order='none')
+
+
+def shared_convert(formula):
+    return sp.latex(parse_formula(formula), order='none')
+
+
+def time_per_call(func, corpus, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for formula in corpus:
+            func(formula)
+    return (time.perf_counter() - start) / (repeat * len(corpus))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    corpus = list(EXAMPLES.values())
+    for formula in corpus:
+        assert legacy_convert(formula) == shared_convert(formula), formula
+
+    # Warm up SymPy's caches for both paths before timing
+    time_per_call(legacy_convert, corpus, 1)
+    time_per_call(shared_convert, corpus, 1)
+
+    before = time_per_call(legacy_convert, corpus, args.repeat)
+    after = time_per_call(shared_convert, corpus, args.repeat)
+    print(f"corpus: {len(corpus)} sidebar examples x {args.repeat} repeats")
+    print(f"before (per-call table): {before * 1e3:8.3f} ms/conversion")
+    print(f"after  (shared registry): {after * 1e3:8.3f} ms/conversion")
+    print(f"speedup: {before / after:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
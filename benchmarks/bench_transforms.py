@@ -0,0 +1,114 @@
+"""Chained Simplify/Expand/Factor: legacy re-parse + string round-trip vs the shared expression.
+
+Both paths run in-process (no worker pool) so only parsing and conversion overhead differs.
+Run from the repository root:  python benchmarks/bench_transforms.py [--repeat N] [--chain expand,factor,...]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sympy as sp
+
+from benchmarks.corpus import build_corpus
+from latexformula.convert import CONVERSION_CACHE, EXPR_CACHE, formula_to_latex, parse_cached
+from latexformula.parsing import parse_formula
+from latexformula.transforms import TRANSFORM_CACHE, TRANSFORMS, apply_transform, submit_transform
+from latexformula.workers import DONE
+
+# Transforms whose result text converts to different LaTeX than the transform printed ("-(x - 1)*(x + 1)")
+CONVERSION_CASES = ["1 - x^2", "x^2 - 2*x + 1"]
+
+
+# --- Legacy: every step parses the text, transforms, stringifies, and update_latex() parses again ---
+def legacy_chain(formula, chain):
+    for op in chain:
+        result = TRANSFORMS[op](parse_formula(formula))
+        formula = str(result).replace("**", "^")
+        sp.latex(parse_formula(formula), order='none')
+    return formula
+
+
+# --- Shared expression: each step continues from the session's result expression and shows its LaTeX ---
+def shared_chain(formula, chain):
+    formula_to_latex(formula)
+    expr = parse_cached(formula)
+    for op in chain:
+        formula, _latex_str, expr = apply_transform(op, expr)
+    return formula
+
+
+def clear_caches():
+    CONVERSION_CACHE.clear()
+    EXPR_CACHE.clear()
+
+
+# --- Check: a transform (through the worker pool) never changes what its result text converts to ---
+def check_conversions(items, chain):
+    for formula in items:
+        for op in chain:
+            text = apply_transform(op, parse_cached(formula))[0]
+            clear_caches()
+            TRANSFORM_CACHE.clear()
+            before = formula_to_latex(text)
+            result, job = submit_transform(op, formula)
+            if result is None:
+                job.wait()
+                assert job.status == DONE, f"{op} failed on {formula!r}: {job.error}"
+            after = formula_to_latex(text)
+            assert after == before, f"{op}({formula!r}) changed the conversion of {text!r}: {before} -> {after}"
+            formula = text
+
+
+def corpus(chain):
+    items = []
+    for category, _name, formula in build_corpus():
+        if category in ("synthetic", "buttons"):
+            continue  # Synthetic inputs make simplify() take seconds; buttons are single symbols
+        try:
+            legacy_chain(formula, chain)
+        except Exception:
+            continue
+        items.append(formula)
+    return items
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--chain", default="expand,factor,simplify,expand")
+    args = parser.parse_args()
+    chain = args.chain.split(",")
+
+    items = corpus(chain)
+    check_conversions(CONVERSION_CASES + items, chain)
+    print(f"conversions checked: {len(CONVERSION_CASES) + len(items)} formulas convert the same before and after each transform")
+    results = {}
+    for label, func in (("legacy round-trip", legacy_chain), ("shared expression", shared_chain)):
+        timings = []
+        for formula in items:
+            best = None
+            for _ in range(args.repeat):
+                clear_caches()
+                start = time.perf_counter()
+                func(formula, chain)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            timings.append(best)
+        results[label] = timings
+
+    print(f"corpus: {len(items)} formulas, chain {' -> '.join(chain)}, best of {args.repeat}")
+    print(f"{'path':<20}{'median ms':>12}{'total ms':>12}")
+    for label, timings in results.items():
+        print(f"{label:<20}{statistics.median(timings) * 1e3:>12.2f}{sum(timings) * 1e3:>12.1f}")
+    legacy, shared = results['legacy round-trip'], results['shared expression']
+    # Total time is dominated by a few slow simplify() calls; the per-formula median shows the parse savings
+    print(f"speedup: {sum(legacy) / sum(shared):.2f}x total, "
+          f"{statistics.median(a / b for a, b in zip(legacy, shared)):.2f}x median per formula")
+
+
+if __name__ == "__main__":
+    main()
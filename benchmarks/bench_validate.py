@@ -0,0 +1,90 @@
+"""Edited-LaTeX validation: legacy figure-based check vs mathtext parse vs the grammar check.
+
+Run from the repository root:  python benchmarks/bench_validate.py [--repeat N]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from matplotlib.font_manager import FontProperties
+from matplotlib.mathtext import MathTextParser
+
+from benchmarks.corpus import build_corpus
+from latexformula.convert import formula_to_latex
+from latexformula.syntax import VALIDATE_CACHE, _validate, validate_latex
+
+_PARSER = MathTextParser('path')
+
+
+# --- Legacy path: update_latex() before the syntax checker ---
+def legacy_validate(latex_str):
+    try:
+        fig = plt.figure()
+        fig.text(0, 0, f'${latex_str}$')
+        plt.close(fig)
+        return True, ""
+    except Exception as e:
+        return False, str(e)
+
+
+def mathtext_validate(latex_str):
+    try:
+        _PARSER.parse(f'${latex_str}$', prop=FontProperties(size=20))
+        return True, ""
+    except Exception as e:
+        return False, str(e)
+
+
+def grammar_cached(latex_str):
+    return validate_latex(latex_str)
+
+
+def latex_corpus():
+    corpus = []
+    for _category, _name, formula in build_corpus():
+        latex_str, error = formula_to_latex(formula)
+        if not error:
+            corpus.append(latex_str)
+    return corpus
+
+
+def measure(func, corpus, repeat):
+    timings = []
+    rejected = 0
+    for _ in range(repeat):
+        for latex_str in corpus:
+            start = time.perf_counter()
+            valid, _error = func(latex_str)
+            timings.append(time.perf_counter() - start)
+            rejected += not valid
+    timings.sort()
+    return timings, rejected // repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    corpus = latex_corpus()
+    print(f"{len(corpus)} LaTeX strings from the benchmark corpus, {args.repeat} passes")
+    print(f"{'validator':<22}{'p50 us':>10}{'p95 us':>10}{'max us':>10}{'rejected':>10}")
+    VALIDATE_CACHE.clear()
+    for label, func in [("legacy plt.figure", legacy_validate), ("mathtext parse", mathtext_validate),
+                        ("grammar (uncached)", _validate), ("grammar (cached)", grammar_cached)]:
+        func(corpus[0])  # Warm-up
+        timings, rejected = measure(func, corpus, args.repeat)
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        print(f"{label:<22}{statistics.median(timings) * 1e6:>10.1f}{p95 * 1e6:>10.1f}"
+              f"{timings[-1] * 1e6:>10.1f}{rejected:>10}")
+
+
+if __name__ == "__main__":
+    main()
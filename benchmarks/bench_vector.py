@@ -0,0 +1,88 @@
+"""File size and ms/image for PNG vs SVG vs minified SVG vs PDF, plus cached re-download cost.
+
+Run from the repository root:  python benchmarks/bench_vector.py [--repeat N] [--precision P]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import build_corpus
+from latexformula.convert import formula_to_latex
+from latexformula.render import RENDER_CACHE, cached_render, render_latex
+from latexformula.svg import minify_svg
+
+
+def renderable_corpus():
+    corpus = []
+    for _category, _name, formula in build_corpus():
+        latex_str, error = formula_to_latex(formula)
+        if error:
+            continue
+        try:
+            render_latex(latex_str, fmt='svg')
+        except ValueError:
+            continue  # mathtext cannot lay this out
+        corpus.append(latex_str)
+    return corpus
+
+
+def measure(corpus, render, repeat):
+    sizes, timings = [], []
+    for latex_str in corpus:
+        best = first = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            data = render(latex_str)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+            # Cache entries and ETags assume the same input always gives the same bytes
+            assert first is None or data == first, f"output for {latex_str!r} is not deterministic"
+            first = data
+        sizes.append(len(data))
+        timings.append(best)
+    return sizes, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--precision", type=int, default=2, help="decimals kept by the SVG minifier")
+    args = parser.parse_args()
+
+    corpus = renderable_corpus()
+    variants = {
+        "png (200 dpi)": lambda latex_str: render_latex(latex_str),
+        "svg": lambda latex_str: render_latex(latex_str, fmt='svg'),
+        "svg minified": lambda latex_str: minify_svg(render_latex(latex_str, fmt='svg'), args.precision),
+        "pdf": lambda latex_str: render_latex(latex_str, fmt='pdf'),
+    }
+    print(f"corpus: {len(corpus)} renderable formulas, best of {args.repeat}")
+    print(f"{'format':<15}{'median KiB':>12}{'total KiB':>12}{'gzip KiB':>11}{'median ms':>12}")
+    results = {}
+    for name, render in variants.items():
+        sizes, timings = measure(corpus, render, args.repeat)
+        gzipped = sum(len(zlib.compress(render(latex_str), 6)) for latex_str in corpus)
+        results[name] = sum(sizes)
+        print(f"{name:<15}{statistics.median(sizes) / 1024:>12.1f}{sum(sizes) / 1024:>12.0f}"
+              f"{gzipped / 1024:>11.0f}{statistics.median(timings) * 1e3:>12.2f}")
+    for name in ("svg", "svg minified", "pdf"):
+        print(f"{name} / png total size: {results[name] / results['png (200 dpi)']:.2f}x")
+
+    # Repeated downloads and reruns go through the content-addressed cache
+    RENDER_CACHE.memory.clear()
+    for latex_str in corpus:
+        cached_render(latex_str, fmt='svg', minify=True)
+    start = time.perf_counter()
+    for latex_str in corpus:
+        cached_render(latex_str, fmt='svg', minify=True)
+    per_hit = (time.perf_counter() - start) / len(corpus)
+    print(f"cached minified svg: {per_hit * 1e6:.1f} us/formula on a memory hit")
+
+
+if __name__ == "__main__":
+    main()
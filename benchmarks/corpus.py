@@ -0,0 +1,56 @@
+"""Fixed benchmark corpus. Changing it invalidates saved baselines."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from latexformula.examples import BUTTON_GROUPS, EXAMPLES
+
+PETROLEUM_FORMULAS = {
+    "Darcy linear flow": "q = -(k*A/mu)*(P_2 - P_1)/L",
+    "Darcy radial flow": "q = 2*pi*k*h*(P_e - P_w)/(mu*B*ln(r_e/r_w))",
+    "Archie saturation": "S_w = ((a*R_w)/(porosity^m*R_t))^(1/n)",
+    "Gas law with Z-factor": "P*V = z*n*R*T",
+    "Oil FVF (Standing)": "B_o = 0.9759 + 0.00012*(R_s*sqrt(gamma_g/gamma_o) + 1.25*T)^1.2",
+    "Material balance": "N*(B_t - B_ti) + N*m*B_ti*(B_g/B_gi - 1) = N_p*(B_t + (R_p - R_si)*B_g) - W_e + W_p*B_w",
+    "Hydrostatic gradient": "P = 0.052*density*h",
+    "Power-law fluid": "tau = K*shear_rate^n",
+    "Productivity index": "J = q/(P_r - P_wf)",
+    "Diffusivity constant": "eta = permeability/(porosity*viscosity*c_t)",
+}
+
+
+def _long_sum(terms):
+    return " + ".join(f"a_{i}*x^{i % 7}" for i in range(terms))
+
+
+def _matrix(n):
+    rows = ", ".join("(" + ", ".join(f"m_{i}{j}" for j in range(n)) + ")" for i in range(n))
+    return f"({rows})"
+
+
+def _nested_fraction(depth):
+    formula = "x"
+    for i in range(depth):
+        formula = f"1/(1 + {formula}*y_{i})"
+    return formula
+
+
+SYNTHETIC_FORMULAS = {
+    "Long sum (200 terms)": _long_sum(200),
+    "10x10 matrix": _matrix(10),
+    "Nested fraction (depth 12)": _nested_fraction(12),
+    "Polynomial degree 30": " + ".join(f"{i + 1}*x^{i}" for i in range(31)),
+}
+
+
+# --- Function: (category, name, formula) for every corpus entry ---
+def build_corpus():
+    corpus = [("examples", name, formula) for name, formula in EXAMPLES.items()]
+    for group, buttons in BUTTON_GROUPS.items():
+        # What insert_at_cursor() produces on an empty formula, as auto-render sees it
+        for label, text in buttons:
+            corpus.append(("buttons", f"{group}: {label}", text.replace("()", "(x)")))
+    corpus += [("petroleum", name, formula) for name, formula in PETROLEUM_FORMULAS.items()]
+    corpus += [("synthetic", name, formula) for name, formula in SYNTHETIC_FORMULAS.items()]
+    return corpus
@@ -0,0 +1,171 @@
+"""Per-stage timings over a fixed corpus, with JSON results and baseline regression checks.
+
+Run from the repository root:
+    python benchmarks/suite.py --output results.json
+    python benchmarks/suite.py --baseline results.json --threshold 0.2   # exit 1 on regression
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib
+import sympy as sp
+
+from benchmarks.corpus import build_corpus
+from latexformula.convert import is_valid_formula
+from latexformula.parsing import parse_formula
+from latexformula.render import render_latex
+from latexformula.syntax import validate_latex
+
+# Each stage takes the previous stage's output; an item stops at its first failing stage
+STAGES = {
+    "is_valid_formula": lambda formula: formula if is_valid_formula(formula)[0] else None,
+    "parse": parse_formula,
+    "sp.latex": sp.latex,
+    "validate_latex": lambda latex_str: latex_str if validate_latex(latex_str)[0] else None,
+    "render": render_latex,
+}
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+# --- Helper: Run every corpus item through the stages once, optionally measuring them ---
+def run_pipeline(corpus, stages, timings=None, peaks=None):
+    completed = dict.fromkeys(stages, 0)
+    for _, _, formula in corpus:
+        value = formula
+        for stage in STAGES:
+            if peaks is not None:
+                tracemalloc.reset_peak()
+                baseline = tracemalloc.get_traced_memory()[0]
+            try:
+                start = time.perf_counter()
+                value = STAGES[stage](value)
+                elapsed = time.perf_counter() - start
+            except Exception:
+                value = None
+            if value is None:
+                break
+            if stage in stages:
+                completed[stage] += 1
+                if timings is not None:
+                    timings[stage].append(elapsed)
+                if peaks is not None:
+                    peaks[stage] = max(peaks[stage], tracemalloc.get_traced_memory()[1] - baseline)
+            if stage == stages[-1]:
+                break
+    return completed
+
+
+def peak_memory(corpus, stages):
+    # Separate pass: tracemalloc slows allocation-heavy stages too much to time them under it
+    peaks = dict.fromkeys(stages, 0)
+    tracemalloc.start()
+    try:
+        run_pipeline(corpus, stages, peaks=peaks)
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def run_suite(stages, repeat):
+    corpus = build_corpus()
+    run_pipeline(corpus, stages)  # Warm-up: imports, fonts and sympy caches
+    timings = {stage: [] for stage in stages}
+    for _ in range(repeat):
+        completed = run_pipeline(corpus, stages, timings)
+    peaks = peak_memory(corpus, stages)
+
+    results = {}
+    for stage in stages:
+        values = sorted(timings[stage])
+        if not values:
+            continue
+        results[stage] = {
+            "items": completed[stage],
+            "p50_ms": statistics.median(values) * 1e3,
+            "p95_ms": percentile(values, 0.95) * 1e3,
+            "max_ms": values[-1] * 1e3,
+            "mean_ms": statistics.fmean(values) * 1e3,
+            "peak_kib": peaks[stage] / 1024,
+        }
+    meta = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sympy": sp.__version__,
+        "matplotlib": matplotlib.__version__,
+        "corpus_items": len(corpus),
+        "repeat": repeat,
+    }
+    return {"meta": meta, "stages": results}
+
+
+def compare(results, baseline, threshold, metrics=("p50_ms", "p95_ms")):
+    regressions = []
+    for stage, current in results["stages"].items():
+        previous = baseline.get("stages", {}).get(stage)
+        if not previous:
+            continue
+        for metric in metrics:
+            if previous[metric] > 0 and current[metric] > previous[metric] * (1 + threshold):
+                regressions.append(f"{stage} {metric}: {previous[metric]:.2f} -> {current[metric]:.2f} ms "
+                                   f"(+{current[metric] / previous[metric] - 1:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="timed passes over the corpus")
+    parser.add_argument("--stages", default=",".join(STAGES),
+                        help=f"comma-separated subset of {','.join(STAGES)}")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed slowdown versus the baseline (default 0.2 = 20%%)")
+    args = parser.parse_args()
+
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = sorted(set(stages) - set(STAGES))
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+    stages = [stage for stage in STAGES if stage in stages]
+
+    results = run_suite(stages, args.repeat)
+    print(f"{results['meta']['corpus_items']} corpus items x {args.repeat} passes")
+    print(f"{'stage':<18}{'items':>6}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'mean ms':>10}{'peak KiB':>11}")
+    for stage, row in results["stages"].items():
+        print(f"{stage:<18}{row['items']:>6}{row['p50_ms']:>10.3f}{row['p95_ms']:>10.3f}"
+              f"{row['max_ms']:>10.3f}{row['mean_ms']:>10.3f}{row['peak_kib']:>11.1f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"REGRESSIONS (threshold {args.threshold:.0%}):")
+            for line in regressions:
+                print("  " + line)
+            return 1
+        print(f"no regressions versus {args.baseline} (threshold {args.threshold:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
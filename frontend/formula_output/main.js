@@ -0,0 +1,148 @@
+// Rendered-output panel. Streamlit keeps this iframe alive across reruns and only
+// posts new props, so this script (and KaTeX, once loaded) initializes once per session.
+(function () {
+    "use strict";
+
+    const KATEX_SRC = "vendor/katex/katex.min.js";
+    const BUTTON_COLOR = "#0f80c1";
+
+    const image = document.getElementById("latex-image");
+    const imageError = document.getElementById("image-error");
+    let latex = "";
+    let mathml = null;
+    let imageUrl = null;
+    let katexReady = null;
+    let preloadScheduled = false;
+
+    // --- Streamlit component protocol (what streamlit-component-lib does, without the bundle) ---
+    function sendMessage(type, data) {
+        window.parent.postMessage(Object.assign({ isStreamlitMessage: true, type: type }, data), "*");
+    }
+
+    function setFrameHeight() {
+        sendMessage("streamlit:setFrameHeight", { height: document.body.scrollHeight });
+    }
+
+    async function fetchImage() {
+        const response = await fetch(image.src);
+        if (!response.ok) {
+            throw new Error("no-image");
+        }
+        return response.blob();
+    }
+
+    function onRender(args) {
+        latex = args.latex || "";
+        mathml = args.mathml || null;
+        if ((args.image_url || null) !== imageUrl) {
+            // The URL names the PNG by content hash: it changes exactly when the image does
+            imageUrl = args.image_url || null;
+            if (imageUrl) {
+                image.src = imageUrl;  // Server-root media path (base path included) or a data: URL
+            } else {
+                image.removeAttribute("src");
+            }
+            image.hidden = !imageUrl;
+            imageError.hidden = Boolean(imageUrl);
+        }
+        setFrameHeight();
+        if (!mathml && !preloadScheduled && window.requestIdleCallback) {
+            // No server MathML (e.g. LaTeX the server cannot parse): fetch KaTeX while the user reads
+            preloadScheduled = true;
+            window.requestIdleCallback(function () {
+                loadKatex().catch(function () {});
+            });
+        }
+    }
+
+    // --- Fallback converter, served from the vendored copy next to this file, never from a CDN ---
+    function loadKatex() {
+        if (katexReady === null) {
+            katexReady = new Promise(function (resolve, reject) {
+                const script = document.createElement("script");
+                script.src = KATEX_SRC;
+                script.async = true;
+                script.onload = function () {
+                    resolve(window.katex);
+                };
+                script.onerror = function () {
+                    katexReady = null;  // Let the next click retry
+                    reject(new Error("Could not load " + KATEX_SRC));
+                };
+                document.head.appendChild(script);
+            });
+        }
+        return katexReady;
+    }
+
+    async function latexToMathml(source) {
+        const katex = await loadKatex();
+        const markup = katex.renderToString(source, { output: "mathml", displayMode: true, throwOnError: true });
+        // KaTeX wraps the <math> element in a <span class="katex">; Word only wants the <math>
+        const start = markup.indexOf("<math");
+        return markup.slice(start, markup.lastIndexOf("</math>") + "</math>".length);
+    }
+
+    // --- Button feedback ---
+    function flash(button, ok, text) {
+        const label = button.dataset.label || (button.dataset.label = button.innerText);
+        button.style.backgroundColor = ok ? "#00c853" : "#ff1744";
+        button.innerText = text;
+        setTimeout(function () {
+            button.style.backgroundColor = BUTTON_COLOR;
+            button.innerText = label;
+        }, 1500);
+    }
+
+    function bindCopy(id, copy) {
+        const button = document.getElementById(id);
+        button.addEventListener("click", async function () {
+            try {
+                await copy();
+                flash(button, true, "✓ Copied!");
+            } catch (err) {
+                flash(button, false, err.message === "no-image" ? "No Image" : "Failed");
+            }
+        });
+    }
+
+    bindCopy("copy-latex-btn", function () {
+        return navigator.clipboard.writeText(latex);
+    });
+
+    bindCopy("copy-word-btn", async function () {
+        let markup = mathml;
+        if (!markup) {
+            markup = await latexToMathml(latex);
+        }
+        const htmlContent = `<!DOCTYPE html><html><body>${markup}</body></html>`;
+        await navigator.clipboard.write([new ClipboardItem({
+            "text/html": new Blob([htmlContent], { type: "text/html" }),
+            "text/plain": new Blob([latex], { type: "text/plain" }),
+        })]);
+    });
+
+    bindCopy("copy-image-btn", async function () {
+        if (!imageUrl) {
+            throw new Error("no-image");
+        }
+        // Passing the pending fetch keeps the click's user activation for the clipboard write;
+        // the browser answers it from the cache the <img> already filled
+        await navigator.clipboard.write([new ClipboardItem({ "image/png": fetchImage() })]);
+    });
+
+    image.addEventListener("load", setFrameHeight);
+    image.addEventListener("error", function () {
+        if (imageUrl) {
+            image.hidden = true;
+            imageError.hidden = false;
+            setFrameHeight();
+        }
+    });
+    window.addEventListener("message", function (event) {
+        if (event.data && event.data.type === "streamlit:render") {
+            onRender(event.data.args || {});
+        }
+    });
+    sendMessage("streamlit:componentReady", { apiVersion: 1 });
+})();
@@ -0,0 +1,38 @@
+"""Formula ↔ LaTeX conversion core shared by the Streamlit app and tooling.
+
+Nothing in this package imports Streamlit, so it can be used from scripts and
+batch jobs (see ``python -m latexformula --help``).
+"""
+from importlib import import_module
+
+# Public API, loaded on first attribute access so `import latexformula` stays cheap
+_EXPORTS = {
+    "parse_formula": "latexformula.parsing",
+    "expr_to_formula": "latexformula.parsing",
+    "is_valid_formula": "latexformula.convert",
+    "looks_like_latex": "latexformula.convert",
+    "normalize_formula": "latexformula.convert",
+    "formula_to_latex": "latexformula.convert",
+    "to_latex": "latexformula.convert",
+    "to_mathml": "latexformula.mathml",
+    "formula_to_mathml": "latexformula.mathml",
+    "compile_formula": "latexformula.evaluate",
+    "evaluate_csv": "latexformula.evaluate",
+    "plot_sweep": "latexformula.plot",
+    "Document": "latexformula.document",
+    "validate_latex": "latexformula.syntax",
+    "render_latex": "latexformula.render",
+    "cached_render": "latexformula.render",
+    "cached_render_batch": "latexformula.render",
+    "minify_svg": "latexformula.svg",
+    "read_formulas": "latexformula.batch",
+    "write_batch_zip": "latexformula.batch",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(import_module(_EXPORTS[name]), name)
+    raise AttributeError(f"module 'latexformula' has no attribute {name!r}")
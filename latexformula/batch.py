@@ -0,0 +1,151 @@
+import csv
+import io
+import json
+import os
+import zipfile
+
+from latexformula.convert import to_latex
+from latexformula.render import cached_render, cached_render_batch
+from latexformula.uploads import text_stream
+from latexformula.workers import imap_bounded
+
+BATCH_FORMATS = ("tex", "png", "svg", "pdf")
+BATCH_CHUNK_ROWS = 8  # Rows per worker task; their PNGs are rendered together in one batch pass
+
+
+# --- Function: Yield (row number, formula) from a TXT, CSV or NDJSON file ---
+def read_formulas(fileobj, filename):
+    ext = os.path.splitext(filename.lower())[1]
+    stream = text_stream(fileobj)
+    if ext == ".csv":
+        reader = csv.reader(stream)
+        header = next(reader, None)
+        if header is None:
+            return
+        lowered = [h.strip().lower() for h in header]
+        if "formula" in lowered:
+            column, first_row = lowered.index("formula"), 2
+        else:
+            column, first_row = 0, 1
+            if header and header[0].strip():
+                yield 1, header[0].strip()
+        for row_number, row in enumerate(reader, start=first_row):
+            if len(row) > column and row[column].strip():
+                yield row_number, row[column].strip()
+    elif ext in (".ndjson", ".jsonl"):
+        for row_number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield row_number, None  # Reported as a per-row error
+                continue
+            formula = record.get("formula") if isinstance(record, dict) else record
+            yield row_number, formula if isinstance(formula, str) else None
+    else:
+        for row_number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield row_number, line
+
+
+# --- Worker: Convert and render one row ---
+def convert_row(task):
+    row_number, formula, font_size, dpi, formats = task
+    result = {"row": row_number, "formula": formula, "latex": None, "error": None, "files": {}}
+    if formula is None:
+        result["error"] = "Row is not a formula (expected text or {\"formula\": ...})"
+        return result
+    latex_str, error = to_latex(formula)
+    if error:
+        result["error"] = f"Invalid formula: {error}"
+        return result
+    result["latex"] = latex_str
+    if "tex" in formats:
+        result["files"]["tex"] = latex_str.encode("utf-8")
+    for fmt in ("png", "svg", "pdf"):
+        if fmt in formats:
+            try:
+                result["files"][fmt] = cached_render(latex_str, font_size, dpi=dpi, fmt=fmt)
+            except Exception as e:
+                result["error"] = f"Image generation error: {str(e)}"
+    return result
+
+
+# --- Worker: Convert and render a chunk of rows, laying out all of their PNGs in one batch pass ---
+def convert_rows(tasks):
+    results = [convert_row(task[:4] + (tuple(fmt for fmt in task[4] if fmt != "png"),)) for task in tasks]
+    _row_number, _formula, font_size, dpi, formats = tasks[0]
+    if "png" not in formats:
+        return results
+    converted = [result for result in results if result["latex"] is not None]
+    pngs = cached_render_batch([result["latex"] for result in converted], font_size, dpi=dpi)
+    for result, png in zip(converted, pngs):
+        if png is None:
+            try:
+                png = cached_render(result["latex"], font_size, dpi=dpi)  # Re-raises mathtext's own message
+            except Exception as e:
+                result["error"] = f"Image generation error: {str(e)}"
+                continue
+        files = result["files"]
+        files["png"] = png
+        result["files"] = {fmt: files[fmt] for fmt in BATCH_FORMATS if fmt in files}
+    return results
+
+
+# --- Helper: Group tasks into lists of `size` ---
+def _chunks(tasks, size):
+    chunk = []
+    for task in tasks:
+        chunk.append(task)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# --- Function: Convert rows in chunks (in-process when jobs == 1), yielding results in input order ---
+def iter_converted(tasks, jobs=None):
+    chunks = _chunks(tasks, BATCH_CHUNK_ROWS)
+    results = map(convert_rows, chunks) if jobs == 1 else imap_bounded(convert_rows, chunks, max_workers=jobs)
+    for chunk_results in results:
+        yield from chunk_results
+
+
+# --- Function: Convert every row in parallel, appending outputs to a ZIP as they arrive ---
+def write_batch_zip(rows, out_file, font_size=20, formats=BATCH_FORMATS, jobs=None, progress=None, dpi=200):
+    formats = tuple(formats)
+    tasks = ((row_number, formula, font_size, dpi, formats) for row_number, formula in rows)
+    summary = {"total": 0, "converted": 0, "failed": 0, "errors": []}
+    index = io.StringIO()
+    index_writer = csv.writer(index)
+    index_writer.writerow(["row", "formula", "latex", "error"])
+
+    with zipfile.ZipFile(out_file, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for result in iter_converted(tasks, jobs):
+            summary["total"] += 1
+            stem = f"formula_{result['row']:05d}"
+            for ext, data in result["files"].items():
+                # PNGs are already compressed; deflating them again only costs time
+                compress = zipfile.ZIP_STORED if ext == "png" else zipfile.ZIP_DEFLATED
+                archive.writestr(f"{stem}.{ext}", data, compress_type=compress)
+            if result["error"]:
+                summary["failed"] += 1
+                summary["errors"].append({"row": result["row"], "formula": result["formula"],
+                                          "error": result["error"]})
+            else:
+                summary["converted"] += 1
+            index_writer.writerow([result["row"], result["formula"], result["latex"] or "", result["error"] or ""])
+            if progress is not None:
+                progress(summary)
+        archive.writestr("index.csv", index.getvalue())
+        if summary["errors"]:
+            errors = io.StringIO()
+            writer = csv.DictWriter(errors, fieldnames=["row", "formula", "error"])
+            writer.writeheader()
+            writer.writerows(summary["errors"])
+            archive.writestr("errors.csv", errors.getvalue())
+    return summary
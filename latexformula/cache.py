@@ -0,0 +1,255 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+# --- Helper: Read an integer setting from the environment ---
+def env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+# --- Bounded, thread-safe LRU cache with hit/miss/eviction counters ---
+class LRUCache:
+    def __init__(self, maxsize=1024):
+        self.maxsize = max(1, int(maxsize))
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            self._evict()
+
+    def values(self):
+        with self._lock:
+            return list(self._data.values())
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def resize(self, maxsize):
+        with self._lock:
+            self.maxsize = max(1, int(maxsize))
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _evict(self):
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+
+# --- Content-addressed on-disk store with a byte budget and LRU (mtime) eviction ---
+class DiskCache:
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max(0, int(max_bytes))
+        self._lock = threading.Lock()
+        self._total_bytes = None
+        self.evictions = 0
+
+    def _path(self, digest):
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def get(self, digest):
+        path = self._path(digest)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        try:
+            os.utime(path)  # Mark as recently used
+        except OSError:
+            pass
+        return data
+
+    def put(self, digest, data):
+        path = self._path(digest)
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            self.total_bytes()  # Index the directory before this write lands in it
+        try:
+            previous_size = os.path.getsize(path)
+        except OSError:
+            previous_size = 0
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write-then-rename so concurrent readers never see a partial file
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+        with self._lock:
+            self._total_bytes += len(data) - previous_size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        entries = []
+        for root, _dirs, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    info = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((info.st_mtime, info.st_size, path))
+        return entries
+
+    def total_bytes(self):
+        if self._total_bytes is None:
+            self._total_bytes = sum(size for _mtime, size, _path in self._entries())
+        return self._total_bytes
+
+    def _evict(self):
+        # Trim to 90% of the budget so eviction scans are amortized over many writes
+        entries = sorted(self._entries())
+        total = sum(size for _mtime, size, _path in entries)
+        target = int(self.max_bytes * 0.9)
+        for _mtime, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+        self._total_bytes = total
+
+
+# --- Two-tier bytes cache: in-memory LRU in front of an optional DiskCache ---
+class TieredCache:
+    def __init__(self, memory_size=256, directory=None, max_disk_bytes=0):
+        self.memory = LRUCache(memory_size)
+        self.disk = None
+        if directory and max_disk_bytes > 0:
+            try:
+                os.makedirs(directory, exist_ok=True)
+                self.disk = DiskCache(directory, max_disk_bytes)
+            except OSError:
+                self.disk = None  # Read-only or missing home directory: memory tier only
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.seconds_saved = 0.0
+        self._compute_seconds = 0.0
+
+    def _lookup(self, digest):
+        entry = self.memory.get(digest)
+        if entry is not None:
+            data, seconds = entry
+            with self._lock:
+                self.memory_hits += 1
+                self.seconds_saved += seconds
+            return data
+
+        data = self.disk.get(digest) if self.disk else None
+        if data is not None:
+            # Disk entries carry no timing, so credit them with the mean observed render time
+            seconds = self._mean_compute_seconds()
+            self.memory.put(digest, (data, seconds))
+            with self._lock:
+                self.disk_hits += 1
+                self.seconds_saved += seconds
+        return data
+
+    def _store(self, digest, data, seconds):
+        with self._lock:
+            self.misses += 1
+            self._compute_seconds += seconds
+        self.memory.put(digest, (data, seconds))
+        if self.disk:
+            self.disk.put(digest, data)
+
+    def get_or_compute(self, digest, compute):
+        data = self._lookup(digest)
+        if data is not None:
+            return data
+        start = time.perf_counter()
+        data = compute()
+        self._store(digest, data, time.perf_counter() - start)
+        return data
+
+    # Several digests at once: compute(missing digests) returns their data in the same order,
+    # None for an item it could not produce (returned as None, not cached)
+    def get_or_compute_many(self, digests, compute):
+        found = {digest: self._lookup(digest) for digest in dict.fromkeys(digests)}
+        missing = [digest for digest, data in found.items() if data is None]
+        if missing:
+            start = time.perf_counter()
+            computed = compute(missing)
+            seconds = (time.perf_counter() - start) / len(missing)  # Batch cost, shared evenly
+            for digest, data in zip(missing, computed):
+                if data is not None:
+                    self._store(digest, data, seconds)
+                found[digest] = data
+        return [found[digest] for digest in digests]
+
+    def _mean_compute_seconds(self):
+        return self._compute_seconds / self.misses if self.misses else 0.0
+
+    def stats(self):
+        memory_bytes = sum(len(data) for data, _seconds in self.memory.values())
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_entries": len(self.memory),
+            "memory_bytes": memory_bytes,
+            "disk_bytes": self.disk.total_bytes() if self.disk else 0,
+            "disk_evictions": self.disk.evictions if self.disk else 0,
+            "seconds_saved": self.seconds_saved,
+        }
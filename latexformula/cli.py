@@ -0,0 +1,105 @@
+"""Convert formulas to LaTeX / PNG / SVG / PDF without Streamlit.
+
+Examples:
+    echo "x^2 + 2*x + 1" | python -m latexformula
+    python -m latexformula formulas.txt report.csv -o out/ --formats tex,png,svg --jobs 8
+"""
+import argparse
+import json
+import os
+import sys
+from collections import deque
+
+from latexformula.batch import BATCH_FORMATS, iter_converted, read_formulas
+
+
+# --- Helper: (source, row, formula) for every input row, stdin for "-" ---
+def _iter_inputs(paths):
+    for path in paths or ["-"]:
+        if path == "-":
+            for row_number, formula in read_formulas(sys.stdin, "stdin.txt"):
+                yield "-", row_number, formula
+        else:
+            with open(path, "rb") as f:
+                for row_number, formula in read_formulas(f, path):
+                    yield path, row_number, formula
+
+
+def _parse_formats(value):
+    formats = [fmt.strip().lower() for fmt in value.split(",") if fmt.strip()]
+    unknown = sorted(set(formats) - set(BATCH_FORMATS))
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown format(s): {', '.join(unknown)}")
+    return tuple(formats)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m latexformula",
+        description=__doc__.splitlines()[0],
+        epilog="Inputs may be .txt (one formula per line), .csv (a 'formula' column or the first "
+               "column) or .ndjson/.jsonl. Without FILE, formulas are read from stdin.",
+    )
+    parser.add_argument("files", nargs="*", metavar="FILE", help="input files ('-' for stdin)")
+    parser.add_argument("-o", "--output-dir", help="write formula_NNNNN.<ext> files here instead of "
+                                                   "printing LaTeX to stdout")
+    parser.add_argument("--formats", type=_parse_formats, default=None,
+                        help=f"comma-separated outputs from {','.join(BATCH_FORMATS)} "
+                             "(default: tex,png with -o, tex otherwise)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="worker processes (default 1; 0 = one per core)")
+    parser.add_argument("--font-size", type=int, default=20)
+    parser.add_argument("--dpi", type=int, default=200)
+    parser.add_argument("--ndjson", action="store_true",
+                        help="print one JSON record per formula instead of bare LaTeX")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    formats = args.formats or (("tex", "png") if args.output_dir else ("tex",))
+    if not args.output_dir and set(formats) - {"tex"}:
+        build_parser().error("png/svg/pdf output needs --output-dir")
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    # Sources ride alongside the tasks; results come back in the same order
+    sources = deque()
+
+    def tasks():
+        for seq, (source, row_number, formula) in enumerate(_iter_inputs(args.files), start=1):
+            sources.append((source, row_number))
+            yield seq, formula, args.font_size, args.dpi, formats
+
+    results = iter_converted(tasks(), jobs=args.jobs or os.cpu_count())
+
+    index = open(os.path.join(args.output_dir, "index.ndjson"), "w", encoding="utf-8") if args.output_dir else None
+    total = failed = 0
+    try:
+        for result in results:
+            source, row_number = sources.popleft()
+            total += 1
+            record = {"source": source, "row": row_number, "formula": result["formula"],
+                      "latex": result["latex"], "error": result["error"]}
+            if result["error"]:
+                failed += 1
+                print(f"{source}:{row_number}: {result['error']}", file=sys.stderr)
+            if args.output_dir:
+                stem = f"formula_{result['row']:05d}"
+                for ext, data in result["files"].items():
+                    with open(os.path.join(args.output_dir, f"{stem}.{ext}"), "wb") as f:
+                        f.write(data)
+                record["files"] = [f"{stem}.{ext}" for ext in result["files"]]
+                index.write(json.dumps(record) + "\n")
+            elif args.ndjson:
+                print(json.dumps(record))
+            elif result["latex"] is not None:
+                print(result["latex"])
+            else:
+                print()  # Keep output lines aligned with input rows
+    finally:
+        if index is not None:
+            index.close()
+
+    print(f"{total - failed}/{total} formulas converted", file=sys.stderr)
+    return 1 if failed else 0
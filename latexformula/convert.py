@@ -0,0 +1,122 @@
+import re
+
+from latexformula.cache import LRUCache, env_int
+from latexformula.metrics import timed
+
+_WHITESPACE = re.compile(r"\s+")
+_LATEX_MARKERS = re.compile(r"\\frac|\\int|\\sqrt|\\left|\\sum")
+_SPACED_OPERATOR = re.compile(r"( ?)([+\-*/^=(),<>])( ?)")
+# Python operators spelled with two characters; a space inside one of them must survive ("x / / y")
+_TWO_CHAR_OPERATORS = {"//", "**", "==", "<=", ">=", "!=", "<<", ">>", "->", "<>"}
+# A number ending in an exponent marker: "2e - 3" must not become the literal "2e-3"
+_EXPONENT_TAIL = re.compile(r"(?<![\w.])(\d+\.?\d*|\.\d+)[eE]$")
+
+# Shared by every session in this process; size can be tuned per deployment
+CONVERSION_CACHE = LRUCache(env_int("LATEXFORMULA_CONVERSION_CACHE_SIZE", 4096))
+# Parsed SymPy expressions by normalized formula, so transforms and MathML reuse the parse behind the LaTeX
+EXPR_CACHE = LRUCache(env_int("LATEXFORMULA_EXPR_CACHE_SIZE", 1024))
+
+
+_CLOSING = {")": "(", "]": "[", "}": "{"}
+# An operator or comma directly before a closing bracket, or an empty call: "x+)", "f(x,)", "sqrt()"
+_DANGLING = re.compile(r"[+\-*/^=,]\s*[)\]}]|\(\s*\)")
+
+
+# --- Helper: Validate formula ---
+def is_valid_formula(formula):
+    if not formula.strip():
+        return False, "Formula is empty."
+    if formula.strip()[-1] in ['+', '-', '*', '/', '^', '=']:
+        return False, "Formula ends with an incomplete operator."
+    if formula.strip()[-1] in [',', '(', '[', '{']:
+        return False, "Formula ends with an incomplete argument list."
+    open_parens = formula.count('(')
+    close_parens = formula.count(')')
+    if open_parens != close_parens:
+        return False, f"Unbalanced parentheses ({open_parens} open, {close_parens} close)."
+    if looks_like_latex(formula):
+        return True, ""  # LaTeX allows "\left[ a, b \right)" and escaped braces
+
+    # Cheap tokenizer-level checks so obviously partial input never reaches parse_expr
+    stack = []
+    for pos, char in enumerate(formula):
+        if char in "([{":
+            stack.append((char, pos))
+        elif char in _CLOSING:
+            if not stack or stack[-1][0] != _CLOSING[char]:
+                return False, f"Unexpected '{char}' at position {pos + 1}."
+            stack.pop()
+    if stack:
+        char, pos = stack[-1]
+        return False, f"Unclosed '{char}' at position {pos + 1}."
+    dangling = _DANGLING.search(formula)
+    if dangling:
+        return False, f"Incomplete argument at position {dangling.start() + 1}."
+    return True, ""
+
+
+# --- Helper: Does the input already look like LaTeX? ---
+def looks_like_latex(text):
+    return bool(text) and (text.startswith("\\") or bool(_LATEX_MARKERS.search(text)))
+
+
+# --- Helper: Drop the spaces around one operator unless that would fuse it with a neighbour ---
+def _tighten(match):
+    text, start, end = match.string, match.start(), match.end()
+    space_before, op, space_after = match.groups()
+    if op in "+-" and text[start - 1:start] in ("e", "E") and _EXPONENT_TAIL.search(text, 0, start):
+        return match.group()
+    if text[start - 1:start] + op in _TWO_CHAR_OPERATORS:
+        op = space_before + op
+    if op[-1] + text[end:end + 1] in _TWO_CHAR_OPERATORS:
+        op += space_after
+    return op
+
+
+# --- Helper: Canonical cache key for a formula (parses to the same expression as the input) ---
+def normalize_formula(formula):
+    key = _WHITESPACE.sub(" ", formula.strip())
+    return _SPACED_OPERATOR.sub(_tighten, key).replace("**", "^")
+
+
+# --- Function: Parsed SymPy expression for a formula, parsing each normalized text once ---
+def parse_cached(formula):
+    key = normalize_formula(formula)
+    expr = EXPR_CACHE.get(key)
+    if expr is None:
+        # SymPy loads with the first parse, so validation alone stays cheap to import
+        from latexformula.parsing import parse_formula
+        with timed("parse"):
+            expr = parse_formula(key)
+        EXPR_CACHE.put(key, expr)
+    return expr
+
+
+def _convert(formula):
+    valid, error_msg = is_valid_formula(formula)
+    if not valid:
+        return None, error_msg
+    import sympy as sp
+    try:
+        expr = parse_cached(formula)
+        with timed("latex"):
+            return sp.latex(expr, order='none'), None
+    except Exception as e:
+        return None, str(e)
+
+
+# --- Function: Formula text to LaTeX, returning (latex, error) ---
+def formula_to_latex(formula):
+    key = normalize_formula(formula)
+    return CONVERSION_CACHE.get_or_compute(key, lambda: _convert(key))
+
+
+# --- Function: Formula or LaTeX input to LaTeX, returning (latex, error) ---
+def to_latex(text):
+    text = text.strip()
+    valid, error_msg = is_valid_formula(text)
+    if not valid:
+        return None, error_msg
+    if looks_like_latex(text):
+        return text, None
+    return formula_to_latex(text)
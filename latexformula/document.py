@@ -0,0 +1,197 @@
+"""Multi-line documents: one formula (or LaTeX) per line, converted line by line.
+
+A Document remembers each line's result under a hash of its normalized text, so an
+edit re-converts only the lines whose content changed; large batches of new lines
+(a paste, the first load) fan out over worker processes. The whole document exports
+as an amsmath ``align`` block or as a combined PDF of the rendered lines.
+"""
+import hashlib
+import re
+from io import BytesIO
+
+from latexformula.cache import env_int
+from latexformula.convert import CONVERSION_CACHE, normalize_formula, to_latex
+from latexformula.metrics import timed
+from latexformula.render import cached_render
+from latexformula.workers import imap_bounded
+
+# Fewer changed lines than this are handled in-process; starting worker processes costs more
+PARALLEL_MIN_LINES = env_int("LATEXFORMULA_DOCUMENT_PARALLEL_MIN", 48)
+PDF_DPI = 150
+_PAGE_INCHES = (8.27, 11.69)  # A4 portrait
+_MARGIN_INCHES = 0.75
+_LINE_GAP_INCHES = 0.12
+_COMMAND = re.compile(r"\\([a-zA-Z]+|.)")  # A LaTeX command name or escaped character
+_DELIMITER = re.compile(r"\s*(\\[a-zA-Z]+|\\.|.)")  # The delimiter after \left / \right
+
+
+# --- Helper: Content hash of one line; lines that normalize the same share a result ---
+def line_key(text):
+    return hashlib.sha256(normalize_formula(text).encode("utf-8")).hexdigest()[:20]
+
+
+# --- Worker: Convert one line, returning (latex, error) ---
+def convert_line(text):
+    return to_latex(text)
+
+
+# --- Worker: Render one line's LaTeX to PNG through the shared render cache, returning (png, error) ---
+def render_line(task):
+    latex_str, font_size, dpi = task
+    try:
+        return cached_render(latex_str, font_size, dpi=dpi), None
+    except Exception as e:
+        # mathtext explains parse failures over several lines; the last one names the problem
+        lines = str(e).strip().splitlines()
+        return None, lines[-1] if lines else type(e).__name__
+
+
+# --- Helper: Map over changed items in-process, or over worker processes when there are many ---
+def _fan_out(func, items, progress=None):
+    results = map(func, items) if len(items) < PARALLEL_MIN_LINES else imap_bounded(func, items)
+    for done, result in enumerate(results, start=1):
+        if progress is not None:
+            progress(done, len(items))
+        yield result
+
+
+# --- Helper: Split a top-level "lhs = rhs" for alignment; None if there is none or groups are unbalanced ---
+# Top level means outside {}, (), [] and \left..\right; escaped characters (\{, \,) are not brackets.
+def _align_point(latex_str):
+    depth = 0
+    split = None
+    i = 0
+    while i < len(latex_str):
+        char = latex_str[i]
+        if char == "\\":
+            command = _COMMAND.match(latex_str, i)
+            name = command.group(1) if command else ""
+            i = command.end() if command else i + 1
+            if name in ("left", "right"):
+                depth += 1 if name == "left" else -1
+                delimiter = _DELIMITER.match(latex_str, i)  # "(", "\{", "." ... belongs to \left/\right
+                i = delimiter.end() if delimiter else i
+            continue
+        if char in "{([":
+            depth += 1
+        elif char in "})]":
+            depth -= 1
+        elif char == "=" and depth == 0 and split is None:
+            split = i
+        if depth < 0:
+            return None
+        i += 1
+    if split is None or depth != 0:
+        return None
+    return latex_str[:split].rstrip(), latex_str[split + 1:].lstrip()
+
+
+# --- A multi-line document whose lines are converted (and rendered) only when they change ---
+class Document:
+    def __init__(self):
+        self.lines = []  # [(line number, source text, key)] for non-blank, non-comment lines
+        self._results = {}  # key -> (latex, error)
+        self._images = {}  # (key, font_size, dpi) -> (PNG bytes, error)
+        self.last_converted = 0  # Lines converted by the most recent update()
+
+    def update(self, text, progress=None):
+        lines = []
+        for line_number, source in enumerate(text.splitlines(), start=1):
+            source = source.strip()
+            if source and not source.startswith("#"):
+                lines.append((line_number, source, line_key(source)))
+        pending = {}
+        for _line_number, source, key in lines:
+            if key not in self._results and key not in pending:
+                pending[key] = source
+        with timed("document_convert"):
+            for key, result in zip(pending, _fan_out(convert_line, list(pending.values()), progress)):
+                self._results[key] = result
+                if len(pending) >= PARALLEL_MIN_LINES and result[0] is not None:
+                    # Converted in a worker process: make the result visible to the rest of the app too
+                    CONVERSION_CACHE.put(normalize_formula(pending[key]), result)
+        # Keep only what the current text uses, so memory follows the document, not its history
+        live = {key for _line_number, _source, key in lines}
+        self._results = {key: value for key, value in self._results.items() if key in live}
+        self._images = {image_key: png for image_key, png in self._images.items() if image_key[0] in live}
+        self.lines = lines
+        self.last_converted = len(pending)
+        return self.rows()
+
+    def rows(self):
+        # [(line number, source, latex, error)] in document order
+        return [(line_number, source) + self._results[key] for line_number, source, key in self.lines]
+
+    def errors(self):
+        return [(line_number, source, error) for line_number, source, latex, error in self.rows() if error]
+
+    # --- Exports ---
+    def aligned(self, environment="aligned"):
+        # Body of an align-style environment: "lhs &= rhs" rows, other expressions start at the column
+        rows = []
+        for _line_number, _source, latex_str, _error in self.rows():
+            if latex_str is None:
+                continue
+            split = _align_point(latex_str)
+            rows.append(f"{split[0]} &= {split[1]}" if split else f"& {latex_str}")
+        return f"\\begin{{{environment}}}\n" + " \\\\\n".join(rows) + f"\n\\end{{{environment}}}"
+
+    def to_tex(self, numbered=True):
+        comments = "".join(f"% line {line_number} skipped ({error}): {source}\n"
+                           for line_number, source, error in self.errors())
+        body = self.aligned("align" if numbered else "align*")
+        return ("\\documentclass{article}\n\\usepackage{amsmath}\n\\begin{document}\n"
+                f"{comments}{body}\n\\end{{document}}\n")
+
+    def images(self, font_size=20, dpi=PDF_DPI, progress=None):
+        # PNG per converted line; lines not rendered yet at this size fan out together.
+        # Lines mathtext cannot draw are left out (see render_errors()).
+        todo = {}
+        for _line_number, _source, key in self.lines:
+            latex_str = self._results[key][0]
+            if latex_str is not None and (key, font_size, dpi) not in self._images:
+                todo[key] = latex_str
+        with timed("document_render"):
+            tasks = [(latex_str, font_size, dpi) for latex_str in todo.values()]
+            for key, rendered in zip(todo, _fan_out(render_line, tasks, progress)):
+                self._images[(key, font_size, dpi)] = rendered
+        return [png for png, _error in (self._images.get((key, font_size, dpi), (None, None))
+                                        for _line_number, _source, key in self.lines) if png is not None]
+
+    def render_errors(self, font_size=20, dpi=PDF_DPI):
+        # [(line number, source, error)] for converted lines that failed to render at this size
+        errors = []
+        for line_number, source, key in self.lines:
+            _png, error = self._images.get((key, font_size, dpi), (None, None))
+            if error:
+                errors.append((line_number, source, error))
+        return errors
+
+    def write_pdf(self, fileobj, font_size=20, dpi=PDF_DPI, progress=None):
+        # Rendered lines stacked top to bottom on A4 pages, cropped to their ink and left-aligned
+        from PIL import Image, ImageOps
+        page_w, page_h = (round(inches * dpi) for inches in _PAGE_INCHES)
+        margin, gap = round(_MARGIN_INCHES * dpi), round(_LINE_GAP_INCHES * dpi)
+        pages = []
+        page, y = None, margin
+        pngs = self.images(font_size, dpi, progress)
+        with timed("document_pdf"):
+            for png in pngs:
+                line = Image.open(BytesIO(png)).convert("L")
+                box = ImageOps.invert(line).getbbox()
+                if box is None:
+                    continue
+                line = line.crop(box)
+                if line.width > page_w - 2 * margin:
+                    scale = (page_w - 2 * margin) / line.width
+                    line = line.resize((page_w - 2 * margin, max(1, round(line.height * scale))))
+                if page is None or (y + line.height > page_h - margin and y > margin):
+                    page = Image.new("L", (page_w, page_h), 255)
+                    pages.append(page)
+                    y = margin
+                page.paste(line, (margin, y))
+                y += line.height + gap
+            if not pages:
+                pages.append(Image.new("L", (page_w, page_h), 255))
+            pages[0].save(fileobj, format="PDF", save_all=True, append_images=pages[1:], resolution=dpi)
+        return len(pages)
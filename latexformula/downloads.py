@@ -0,0 +1,73 @@
+"""Files prepared for download (batch ZIPs, exports, PDFs, evaluated CSVs).
+
+Every session writes into one directory per server process. A file is removed when
+its session replaces it, after DOWNLOAD_TTL seconds without being offered for
+download (sessions that ended never offer theirs again), or with the whole
+directory when the process exits.
+"""
+import atexit
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from latexformula.cache import env_int
+
+DOWNLOAD_TTL = env_int("LATEXFORMULA_DOWNLOAD_TTL", 3600)
+_SWEEP_INTERVAL = 60  # Seconds between scans of the directory
+
+_lock = threading.Lock()
+_directory = None
+_last_sweep = 0.0
+
+
+# --- Helper: The per-process download directory, created on first use and removed at exit ---
+def download_dir():
+    global _directory
+    with _lock:
+        if _directory is None:
+            _directory = tempfile.mkdtemp(prefix="latexformula_downloads_")
+            atexit.register(shutil.rmtree, _directory, True)
+        return _directory
+
+
+# --- Function: Delete downloads idle for longer than `ttl` seconds, returning how many ---
+def sweep_downloads(ttl=DOWNLOAD_TTL):
+    global _last_sweep
+    _last_sweep = time.time()
+    cutoff = _last_sweep - ttl
+    removed = 0
+    for entry in os.scandir(download_dir()):
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except OSError:
+            continue  # Removed concurrently
+    return removed
+
+
+# --- Function: Open a new download file (kwargs as for NamedTemporaryFile); sweeps stale files first ---
+def new_download(prefix, suffix, mode="w+b", **kwargs):
+    if time.time() - _last_sweep >= _SWEEP_INTERVAL:
+        sweep_downloads()
+    return tempfile.NamedTemporaryFile(mode, prefix=prefix, suffix=suffix, dir=download_dir(), delete=False,
+                                       **kwargs)
+
+
+# --- Function: Open a prepared download for reading, or None once it has expired ---
+def open_download(path):
+    try:
+        os.utime(path)  # Still on offer: restart its idle time
+        return open(path, "rb")
+    except OSError:
+        return None
+
+
+# --- Function: Delete a download this session no longer offers ---
+def discard_download(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
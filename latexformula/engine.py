@@ -0,0 +1,143 @@
+"""matplotlib-based render engine; imported on the first render, not at app start."""
+import threading
+from io import BytesIO
+
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg, get_hinting_flag
+from matplotlib.colors import to_rgba
+from matplotlib.figure import Figure
+from matplotlib.font_manager import FontProperties
+from matplotlib.mathtext import MathTextParser
+from PIL import Image
+
+try:
+    from matplotlib import _mathtext  # Private: only the batch path uses it, and it checks it first
+except ImportError:
+    _mathtext = None
+
+# Margin around the formula: the legacy 0.5 x 0.3 in figure slack plus the 0.1 in savefig pad
+_PAD_X_INCHES = 0.35
+_PAD_Y_INCHES = 0.25
+
+_RASTER_PARSER = MathTextParser('agg')
+_VECTOR_PARSER = MathTextParser('path')
+# mathtext and the FreeType font objects it shares are not thread-safe; anything else that
+# lays out math text in this process (e.g. plot axis labels) must hold it too
+LAYOUT_LOCK = threading.Lock()
+_BATCH_PARSER = None  # mathtext grammar for batches, built on the first one
+_BATCH_PROBE = r'\frac{a}{b} + \sqrt{x}'
+_batch_layout = None  # Whether the private batch path works here; decided by the first batch
+# Drop timestamps so identical input gives byte-identical files (and stable ETags)
+_VECTOR_METADATA = {'svg': {'Date': None}, 'pdf': {'CreationDate': None}}
+
+
+# --- Helper: Composite a glyph coverage mask onto the padded background and encode it as PNG ---
+def _compose_png(coverage, bg, fg, dpi):
+    alpha = np.asarray(coverage, dtype=np.float32)[..., np.newaxis] / 255.0
+    text_h, text_w = alpha.shape[:2]
+
+    height = text_h + 2 * round(_PAD_Y_INCHES * dpi)
+    width = text_w + 2 * round(_PAD_X_INCHES * dpi)
+    image = np.empty((height, width, 4), dtype=np.uint8)
+    image[...] = (bg + 0.5).astype(np.uint8)
+    top = (height - text_h) // 2
+    left = (width - text_w) // 2
+    # Blend only the glyph box; the margin is a flat fill
+    image[top:top + text_h, left:left + text_w] = (bg * (1.0 - alpha) + fg * alpha + 0.5).astype(np.uint8)
+
+    buf = BytesIO()
+    Image.fromarray(image, "RGBA").save(buf, format="png", dpi=(dpi, dpi))
+    return buf.getvalue()
+
+
+def _rgba255(color):
+    return np.array(to_rgba(color), dtype=np.float32) * 255.0
+
+
+# --- Helper: Raster path - one mathtext layout, composited straight into a PNG ---
+def _render_png(latex_str, font_size, bg_color, text_color, dpi):
+    with LAYOUT_LOCK:
+        parse = _RASTER_PARSER.parse(f'${latex_str}$', dpi=dpi, prop=FontProperties(size=font_size))
+    return _compose_png(parse.image, _rgba255(bg_color), _rgba255(text_color), dpi)
+
+
+# --- Helper: Glyph masks for many formulas from one font set, so glyph metrics load once per batch ---
+# Uses matplotlib's internal mathtext parser directly; formulas it cannot lay out give None.
+def _layout_batch(latex_strs, font_size, dpi):
+    global _BATCH_PARSER
+    prop = FontProperties(size=font_size)
+    antialiased = matplotlib.rcParams['text.antialiased']
+    masks = []
+    with LAYOUT_LOCK:
+        if _BATCH_PARSER is None:
+            _BATCH_PARSER = _mathtext.Parser()
+        # The font set caches every glyph it loads; it only lives for this batch, inside the lock,
+        # because other text drawing may clear the shared FreeType fonts those glyphs point into
+        fonts = MathTextParser._font_type_mapping[prop.get_math_fontfamily()](prop, get_hinting_flag())
+        for latex_str in latex_strs:
+            try:
+                box = _BATCH_PARSER.parse(f'${latex_str}$', fonts, prop.get_size_in_points(), dpi)
+            except ValueError:
+                masks.append(None)
+                continue
+            masks.append(_mathtext.ship(box).to_raster(antialiased=antialiased).image)
+    return masks
+
+
+# --- Helper: Vector path - figure sized from the measured layout, drawn once ---
+def _render_vector(latex_str, font_size, bg_color, text_color, dpi, fmt):
+    prop = FontProperties(size=font_size)
+    buf = BytesIO()
+    with LAYOUT_LOCK:
+        width, height, _depth, _glyphs, _rects = _VECTOR_PARSER.parse(f'${latex_str}$', dpi=72, prop=prop)
+
+        fig = Figure(figsize=(width / 72 + 2 * _PAD_X_INCHES, height / 72 + 2 * _PAD_Y_INCHES),
+                     dpi=dpi, facecolor=bg_color)
+        FigureCanvasAgg(fig)
+        fig.text(0.5, 0.5, f'${latex_str}$', fontproperties=prop,
+                 ha='center', va='center', color=text_color)
+        with matplotlib.rc_context({'svg.hashsalt': 'latexformula'}):
+            fig.savefig(buf, format=fmt, dpi=dpi, facecolor=bg_color, metadata=_VECTOR_METADATA.get(fmt))
+    return buf.getvalue()
+
+
+# --- Function: Render LaTeX to image bytes (png, or svg/pdf via the figure path) ---
+def render_image(latex_str, font_size=20, bg_color='white', text_color='black', dpi=200, fmt='png'):
+    if fmt == 'png':
+        return _render_png(latex_str, font_size, bg_color, text_color, dpi)
+    return _render_vector(latex_str, font_size, bg_color, text_color, dpi, fmt)
+
+
+def _render_png_or_none(latex_str, font_size, bg_color, text_color, dpi):
+    try:
+        return _render_png(latex_str, font_size, bg_color, text_color, dpi)
+    except ValueError:
+        return None
+
+
+# --- Helper: True if _layout_batch works with this matplotlib and matches single renders byte for byte ---
+def _batch_layout_works():
+    if _mathtext is None or not all(hasattr(_mathtext, name) for name in ("Parser", "ship")) \
+            or not hasattr(MathTextParser, "_font_type_mapping"):
+        return False
+    try:
+        [mask] = _layout_batch([_BATCH_PROBE], 14, 100)
+        expected = _render_png(_BATCH_PROBE, 14, 'white', 'black', 100)
+        return mask is not None and _compose_png(mask, _rgba255('white'), _rgba255('black'), 100) == expected
+    except Exception:
+        return False
+
+
+# --- Function: Render many formulas to PNG bytes in one pass (None where mathtext cannot lay one out) ---
+# The one-pass layout relies on matplotlib internals; if they changed, formulas are rendered one at a time.
+def render_png_batch(latex_strs, font_size=20, bg_color='white', text_color='black', dpi=200):
+    global _batch_layout
+    if _batch_layout is None:
+        _batch_layout = _batch_layout_works()
+    if not _batch_layout:
+        return [_render_png_or_none(latex_str, font_size, bg_color, text_color, dpi) for latex_str in latex_strs]
+    bg, fg = _rgba255(bg_color), _rgba255(text_color)
+    return [None if mask is None else _compose_png(mask, bg, fg, dpi)
+            for mask in _layout_batch(latex_strs, font_size, dpi)]
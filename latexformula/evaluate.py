@@ -0,0 +1,234 @@
+"""Numeric evaluation of formulas over NumPy arrays and CSV columns.
+
+A formula is compiled once with ``sympy.lambdify`` into a NumPy function, cached by
+the canonical expression (``srepr``), so every spelling of the same formula shares it.
+CSV files are streamed through in fixed-size row chunks: each chunk becomes one
+array per mapped column and one vectorized call, so memory stays bounded by the
+chunk size rather than the file size.
+"""
+import csv
+import math
+import time
+from itertools import islice
+
+from latexformula.cache import LRUCache, env_int
+from latexformula.convert import is_valid_formula, parse_cached
+from latexformula.metrics import timed
+from latexformula.uploads import text_stream
+from latexformula.workers import POOL
+
+# Keyed by srepr() of the evaluated expression, shared by every session
+COMPILED_CACHE = LRUCache(env_int("LATEXFORMULA_COMPILED_CACHE_SIZE", 256))
+EVALUATE_CHUNK_ROWS = env_int("LATEXFORMULA_EVALUATE_CHUNK_ROWS", 4096)
+# doit() on sums and integrals can run unbounded, so the app prepares expressions in a worker
+COMPILE_TIMEOUT = env_int("LATEXFORMULA_COMPILE_TIMEOUT", 20)
+COMPILE_MEMORY_MB = env_int("LATEXFORMULA_COMPILE_MEMORY_MB", 512)
+PREVIEW_ROWS = 20
+
+
+# --- A formula compiled to a NumPy function of its free symbols ---
+class CompiledFormula:
+    def __init__(self, key, expr, symbols, names, aliases, target, func):
+        self.key = key  # COMPILED_CACHE key; also identifies the function in downstream caches
+        self.expr = expr
+        self.symbols = symbols  # SymPy symbols in argument order
+        self.names = names  # Formula-text name per symbol ("mu", "P_wf"), used as input keys
+        self.aliases = aliases  # name -> every registry name for that symbol ("mu", "viscosity")
+        self.target = target  # Output name: the left-hand side of "q = ...", else "result"
+        self.func = func
+
+    # Values for every name (arrays or scalars) -> one result array, broadcast to the inputs' shape
+    def evaluate(self, values):
+        import numpy as np
+        args = [values[name] for name in self.names]
+        with np.errstate(all="ignore"):  # 1/0 and log(-1) become inf/nan per row, not an exception
+            result = np.asarray(self.func(*args))
+        shape = np.broadcast(*args).shape if args else result.shape
+        return np.broadcast_to(result, shape)
+
+
+# --- Helper: Name and registry aliases for each symbol, as typed in formula text ---
+def _symbol_names(symbols):
+    from latexformula.parsing import FORMULA_NAMES, SYMBOLS
+    names, aliases = [], {}
+    for symbol in symbols:
+        name = FORMULA_NAMES.get(symbol, symbol).name
+        names.append(name)
+        aliases[name] = [name] + [alias for alias, obj in SYMBOLS.items() if obj == symbol and alias != name]
+    return tuple(names), aliases
+
+
+# --- Worker: Evaluate integrals/sums with closed forms and check what is left has a NumPy equivalent ---
+def prepare_expression(expr):
+    import sympy as sp
+    from sympy.core.function import AppliedUndef
+    expr = expr.doit()
+    if expr.has(sp.Integral, sp.Sum, sp.Limit, sp.Derivative):
+        raise ValueError("Unevaluated integrals, sums, limits or derivatives cannot be evaluated numerically")
+    undefined = expr.atoms(AppliedUndef)
+    if undefined:
+        raise ValueError(f"Undefined function(s) cannot be evaluated: {', '.join(sorted(map(str, undefined)))}")
+    return expr
+
+
+# --- Helper: CompiledFormula from a prepared expression (lambdified functions cannot leave a worker) ---
+def _compile(key, expr, target):
+    import sympy as sp
+    symbols = tuple(sorted(expr.free_symbols, key=lambda symbol: symbol.name))
+    names, aliases = _symbol_names(symbols)
+    with timed("lambdify"):
+        func = sp.lambdify(symbols, expr, modules="numpy")
+    return CompiledFormula(key, expr, symbols, names, aliases, target, func)
+
+
+# --- Helper: (cache key, expression to evaluate, output name) for formula text ---
+def _compile_target(formula):
+    import sympy as sp
+    expr = parse_cached(formula)
+    target = "result"
+    if isinstance(expr, sp.Eq):
+        if isinstance(expr.lhs, sp.Symbol):
+            target = _symbol_names((expr.lhs,))[0][0]
+            expr = expr.rhs
+        else:
+            target, expr = "residual", expr.lhs - expr.rhs
+    return (sp.srepr(expr), target), expr, target
+
+
+# --- Function: Formula text to a CompiledFormula, returning (compiled, error); runs in the caller ---
+def compile_formula(formula):
+    valid, error_msg = is_valid_formula(formula)
+    if not valid:
+        return None, error_msg
+    try:
+        key, expr, target = _compile_target(formula)
+        compiled = COMPILED_CACHE.get_or_compute(key, lambda: _compile(key, prepare_expression(expr), target))
+        return compiled, None
+    except Exception as e:
+        return None, str(e)
+
+
+# --- Function: Cached CompiledFormula, or a worker job preparing it; returns (compiled, job, error) ---
+def submit_compile(formula):
+    valid, error_msg = is_valid_formula(formula)
+    if not valid:
+        return None, None, error_msg
+    try:
+        key, expr, target = _compile_target(formula)
+    except Exception as e:
+        return None, None, str(e)
+    compiled = COMPILED_CACHE.get(key)
+    if compiled is not None:
+        return compiled, None, None
+    # lambdify runs on the job's thread once the worker returns the prepared expression
+    job = POOL.submit(prepare_expression, expr, timeout=COMPILE_TIMEOUT, memory_mb=COMPILE_MEMORY_MB,
+                      on_done=lambda prepared: COMPILED_CACHE.put(key, _compile(key, prepared, target)))
+    return None, job, None
+
+
+# --- Function: Real float64 values; results with an imaginary part become NaN ---
+def real_values(result):
+    import numpy as np
+    if np.iscomplexobj(result):
+        result = np.where(np.imag(result) == 0, np.real(result), np.nan)
+    return result.astype(np.float64, copy=False)
+
+
+# --- Function: Default column for each input whose name or alias matches a CSV header ---
+def match_columns(compiled, header):
+    lowered = {column.strip().lower(): column for column in header}
+    mapping = {}
+    for name in compiled.names:
+        for alias in compiled.aliases[name]:
+            if alias.lower() in lowered:
+                mapping[name] = lowered[alias.lower()]
+                break
+    return mapping
+
+
+# --- Function: Header row of a CSV upload (the stream is rewound for the real pass) ---
+def read_csv_header(fileobj):
+    fileobj.seek(0)
+    stream = text_stream(fileobj)
+    header = next(csv.reader(stream), [])
+    if stream is not fileobj:
+        stream.detach()  # Leave the upload open for evaluate_csv()
+    fileobj.seek(0)
+    return [column.strip() for column in header]
+
+
+# --- Helper: One column of a chunk as float64; blanks and non-numbers become NaN ---
+def _column(rows, index):
+    import numpy as np
+    values = [row[index] if index < len(row) else "" for row in rows]
+    try:
+        return np.array(values, dtype=np.float64)
+    except ValueError:
+        return np.fromiter((_to_float(value) for value in values), dtype=np.float64, count=len(values))
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except ValueError:
+        return math.nan
+
+
+# --- Function: Stream a CSV through a compiled formula, writing every row plus the result column ---
+# mapping: input name -> CSV column name, or a number used for every row.
+def evaluate_csv(compiled, fileobj, out, mapping, chunk_rows=EVALUATE_CHUNK_ROWS, progress=None):
+    import numpy as np
+    missing = [name for name in compiled.names if name not in mapping]
+    if missing:
+        raise ValueError(f"No column or value for: {', '.join(missing)}")
+    reader = csv.reader(text_stream(fileobj))
+    header = [column.strip() for column in next(reader, [])]
+    columns, constants = {}, {}
+    for name in compiled.names:
+        source = mapping[name]
+        if isinstance(source, str):
+            if source not in header:
+                raise ValueError(f"Column {source!r} is not in the file")
+            columns[name] = header.index(source)
+        else:
+            constants[name] = float(source)
+    target = compiled.target if compiled.target not in header else f"{compiled.target} (evaluated)"
+    writer = csv.writer(out)
+    writer.writerow(header + [target])
+
+    summary = {"target": target, "rows": 0, "invalid": 0, "min": None, "max": None, "mean": None,
+               "preview": [], "seconds": 0.0}
+    total = 0.0
+    finite_rows = 0
+    start = time.perf_counter()
+    while True:
+        rows = list(islice(reader, chunk_rows))
+        if not rows:
+            break
+        values = dict(constants)
+        for name, index in columns.items():
+            values[name] = _column(rows, index)
+        result = compiled.evaluate(values)
+        if result.shape != (len(rows),):  # Constant formula, or every input is a constant
+            result = np.broadcast_to(result, (len(rows),))
+        result = real_values(result)
+        finite = np.isfinite(result)
+        count = int(finite.sum())
+        if count:
+            chunk = result[finite]
+            low, high = float(chunk.min()), float(chunk.max())
+            summary["min"] = low if summary["min"] is None else min(summary["min"], low)
+            summary["max"] = high if summary["max"] is None else max(summary["max"], high)
+            total += float(chunk.sum())
+            finite_rows += count
+        summary["invalid"] += len(rows) - count
+        writer.writerows(row + [value] for row, value in zip(rows, result.tolist()))
+        if len(summary["preview"]) < PREVIEW_ROWS:
+            for row, value in zip(rows[:PREVIEW_ROWS - len(summary["preview"])], result.tolist()):
+                summary["preview"].append(dict(zip(header + [target], row + [value])))
+        summary["rows"] += len(rows)
+        if progress:
+            progress(summary)
+    summary["mean"] = total / finite_rows if finite_rows else None
+    summary["seconds"] = time.perf_counter() - start
+    return summary
@@ -0,0 +1,149 @@
+# --- Sidebar example formulas ---
+EXAMPLES = {
+    "Quadratic Formula": "x = (-b + sqrt(b^2 - 4*a*c))/(2*a)",
+    "Darcy's Law": "q = (k*A*(P1-P2))/(mu*L)",
+    "Pythagorean": "a^2 + b^2 = c^2",
+    "Euler's Identity": "e^(I*pi) + 1 = 0",
+    "Integral": "Integral(x^2, (x, 0, 1))",
+    "Summation": "Sum(1/n^2, (n, 1, oo))",
+    "Derivative": "Derivative(sin(x)*cos(x), x)",
+    "Limit": "Limit(sin(x)/x, x, 0)",
+    "Matrix": "((a, b), (c, d))",
+    "Binomial": "(x + y)^n",
+}
+
+# --- Symbol palette: (button label, inserted text) per tab ---
+BUTTON_GROUPS = {
+    "Mathematical": [
+        ("√", "sqrt()"),
+        ("∛", "()^(1/3)"),
+        ("÷", "/"),
+        ("×", "*"),
+        ("^", "^"),
+        ("=", "="),
+        ("≠", "ne"),
+        ("≈", "approx"),
+        ("<", "<"),
+        (">", ">"),
+        ("≤", "le"),
+        ("≥", "ge"),
+        ("±", "±"),
+        ("|x|", "abs()"),
+        ("∫", "Integral(, x)"),
+        ("d/dx", "Derivative(, x)"),
+        ("∑", "Sum(, (n, 1, oo))"),
+        ("∏", "Product(, (n, 1, oo))"),
+        ("lim", "Limit(, x, 0)"),
+        ("log", "log()"),
+        ("ln", "ln()"),
+        ("sin", "sin()"),
+        ("cos", "cos()"),
+        ("tan", "tan()"),
+        ("cot", "cot()"),
+        ("sec", "sec()"),
+        ("csc", "csc()"),
+        ("asin", "asin()"),
+        ("acos", "acos()"),
+        ("atan", "atan()"),
+        ("sinh", "sinh()"),
+        ("cosh", "cosh()"),
+        ("tanh", "tanh()"),
+        ("exp", "exp()"),
+        ("π", "pi"),
+        ("e", "e"),
+        ("∞", "oo"),
+        ("i", "I"),
+        ("_", "_"),
+        ("(", "("),
+        (")", ")"),
+        ("[", "["),
+        ("]", "]"),
+        ("{", "{"),
+        ("}", "}"),
+    ],
+    "Greek": [
+        ("α", "alpha"),
+        ("β", "beta"),
+        ("γ", "gamma"),
+        ("Γ", "Gamma"),
+        ("δ", "delta"),
+        ("Δ", "Delta"),
+        ("ε", "epsilon"),
+        ("ζ", "zeta"),
+        ("η", "eta"),
+        ("θ", "theta"),
+        ("Θ", "Theta"),
+        ("ι", "iota"),
+        ("κ", "kappa"),
+        ("λ", "lambda"),
+        ("Λ", "Lambda"),
+        ("μ", "mu"),
+        ("ν", "nu"),
+        ("ξ", "xi"),
+        ("ρ", "rho"),
+        ("σ", "sigma"),
+        ("Σ", "Sigma"),
+        ("τ", "tau"),
+        ("υ", "upsilon"),
+        ("φ", "phi"),
+        ("Φ", "Phi"),
+        ("χ", "chi"),
+        ("ψ", "psi"),
+        ("ω", "omega"),
+        ("Ω", "Omega"),
+    ],
+    "Engineering": [
+        ("°", "degree"),
+        ("σ (stress)", "sigma"),
+        ("τ (torque)", "tau"),
+        ("E (modulus)", "E"),
+        ("μ (friction)", "mu"),
+        ("ν (Poisson)", "nu"),
+        ("G (shear)", "G"),
+        ("F (force)", "F"),
+        ("M (moment)", "M"),
+        ("V (shear)", "V"),
+        ("ε (strain)", "epsilon"),
+    ],
+    "Petroleum": [
+        ("φ (porosity)", "phi"),
+        ("κ (perm)", "kappa"),
+        ("σ (tension)", "sigma"),
+        ("τ (shear)", "tau"),
+        ("γ̇ (shear rate)", "shear_rate"),
+        ("k (perm)", "k"),
+        ("μ (viscosity)", "mu"),
+        ("ρ (density)", "rho"),
+        ("γ (sp. gravity)", "gamma"),
+        ("P (pressure)", "P"),
+        ("q (flow rate)", "q"),
+        ("v (velocity)", "v"),
+        ("S (saturation)", "S"),
+        ("c (compress)", "c"),
+        ("B (FVF)", "B"),
+        ("z (Z-factor)", "z"),
+        ("R (GOR)", "R"),
+        ("h (net pay)", "h"),
+    ],
+    "Advanced": [
+        ("∂", "partial"),
+        ("∇", "nabla"),
+        ("∇²", "laplacian"),
+        ("⊗", "otimes"),
+        ("⊕", "oplus"),
+        ("∈", "in"),
+        ("∉", "notin"),
+        ("⊂", "subset"),
+        ("⊆", "subseteq"),
+        ("∪", "cup"),
+        ("∩", "cap"),
+        ("∅", "emptyset"),
+        ("∀", "forall"),
+        ("∃", "exists"),
+        ("¬", "neg"),
+        ("∧", "wedge"),
+        ("∨", "vee"),
+        ("⇒", "implies"),
+        ("⇔", "iff"),
+    ]
+}
@@ -0,0 +1,241 @@
+import gzip
+import io
+import json
+import re
+from collections import OrderedDict
+from itertools import islice
+
+from latexformula.cache import env_int
+from latexformula.convert import normalize_formula
+from latexformula.uploads import text_stream
+
+HISTORY_SIZE = env_int("LATEXFORMULA_HISTORY_SIZE", 5000)
+FAVORITES_SIZE = env_int("LATEXFORMULA_FAVORITES_SIZE", 5000)
+CHUNK_SIZE = 1 << 16
+MAX_ITEM_CHARS = 1 << 20  # Longest single item of a JSON array import; bounds the read buffer
+_GZIP_MAGIC = b"\x1f\x8b"
+# Strings (or one cut off at the end of the buffer) and the characters that nest or separate JSON values
+_JSON_STRUCTURE = re.compile(r'"(?:[^"\\]|\\.)*"|"|[\[\]{},]')
+
+
+# --- Bounded formula records keyed by normalized formula, with O(1) dedupe and move-to-front ---
+class FormulaStore:
+    def __init__(self, capacity=HISTORY_SIZE):
+        self.capacity = max(1, int(capacity))
+        # key -> (formula, latex, name); the most recent entry is last
+        self._records = OrderedDict()
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, formula):
+        return normalize_formula(formula) in self._records
+
+    def __iter__(self):
+        # Newest first, as (key, formula, latex, name)
+        for key in reversed(self._records):
+            yield (key,) + self._records[key]
+
+    def get(self, formula):
+        return self._records.get(normalize_formula(formula))
+
+    # Returns True for a new formula. recent=False (imports) files a new record as the oldest
+    # entry, leaves an existing one in place, and drops the record when the store is full.
+    def add(self, formula, latex, name=None, recent=True):
+        key = normalize_formula(formula)
+        record = (formula, latex, name or formula[:40])
+        if key in self._records:
+            if recent:
+                self._records[key] = record
+                self._records.move_to_end(key)
+            return False
+        if not recent and len(self._records) >= self.capacity:
+            return False
+        self._records[key] = record
+        if not recent:
+            self._records.move_to_end(key, last=False)
+        while len(self._records) > self.capacity:
+            self._records.popitem(last=False)
+        return True
+
+    def remove(self, key):
+        return self._records.pop(key, None) is not None
+
+    def clear(self):
+        self._records.clear()
+
+    def page(self, number, per_page, newest_first=True):
+        start = max(0, number) * per_page
+        stop = min(start + per_page, len(self._records))
+        if start >= stop:
+            return []
+        # Walk in from whichever end is closer, so the last page costs as little as the first
+        if start < len(self._records) - stop:
+            keys = islice(reversed(self._records) if newest_first else iter(self._records), start, stop)
+        else:
+            from_end = len(self._records) - stop
+            keys = islice(iter(self._records) if newest_first else reversed(self._records),
+                          from_end, from_end + stop - start)
+            keys = reversed(list(keys))
+        return [(key,) + self._records[key] for key in keys]
+
+    def page_count(self, per_page):
+        return max(1, -(-len(self._records) // per_page))
+
+    def iter_records(self):
+        for _key, formula, latex, _name in self:
+            yield {"formula": formula, "latex": latex}
+
+
+# --- Helper: (formula, latex) from one imported record, or None if it is not a valid entry ---
+def _history_entry(item):
+    if not isinstance(item, dict):
+        return None
+    formula, latex = item.get("formula"), item.get("latex")
+    if not isinstance(formula, str) or not isinstance(latex, str) or not formula.strip():
+        return None
+    return formula, latex
+
+
+# --- Helper: Binary upload as text, transparently gunzipped ---
+def _open_text(fileobj, filename):
+    compressed = filename.lower().endswith(".gz")
+    if not compressed and fileobj.seekable():
+        compressed = fileobj.read(2) == _GZIP_MAGIC
+        fileobj.seek(0)
+    if compressed:
+        fileobj = gzip.GzipFile(fileobj=fileobj, mode="rb")
+    return text_stream(fileobj)
+
+
+# --- Helper: Index of the "," or "]" that ends the array item at pos, or None if it runs past the buffer ---
+def _item_end(buffer, pos):
+    depth = 0
+    for match in _JSON_STRUCTURE.finditer(buffer, pos):
+        token = match.group()
+        if token == '"':
+            return None  # String cut off by the end of the buffer
+        if token in "[{":
+            depth += 1
+        elif token in "]}":
+            if depth == 0:
+                return match.start()
+            depth -= 1
+        elif token == "," and depth == 0:
+            return match.start()
+    return None
+
+
+# --- Helper: Items of a top-level JSON array, decoded one at a time (None for a malformed item) ---
+def _iter_json_array(stream, buffer):
+    decoder = json.JSONDecoder()
+    pos = buffer.index("[") + 1
+    offset = 0  # Stream characters dropped before `buffer`, so errors report file positions
+    eof = False
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+        if buffer[pos:pos + 1] == "]":
+            return
+        complete = False
+        if pos < len(buffer):
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+                complete = end < len(buffer) or eof  # A number at the end may continue in the next chunk
+            except ValueError:
+                # Malformed once its closing "," or "]" is in the buffer: skip it; otherwise read on
+                item, end = None, _item_end(buffer, pos)
+                complete = end is not None
+        if complete:
+            yield item
+            pos = end
+            continue
+        if eof:
+            raise ValueError(f"JSON array is not closed (item at character {offset + pos})")
+        if len(buffer) - pos > MAX_ITEM_CHARS:
+            raise ValueError(f"Array item at character {offset + pos} is longer than {MAX_ITEM_CHARS} characters")
+        chunk = stream.read(CHUNK_SIZE)
+        offset += pos
+        buffer, pos, eof = buffer[pos:] + chunk, 0, not chunk
+
+
+# --- Function: Yield (formula, latex) or None (invalid record) from a JSON / NDJSON file, optionally gzipped ---
+def read_history(fileobj, filename=""):
+    stream = _open_text(fileobj, filename)
+    buffer = ""
+    while not buffer.strip():
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        buffer += chunk
+    if buffer.lstrip().startswith("["):
+        # A JSON array export (the legacy format) is decoded item by item, never as a whole
+        for item in _iter_json_array(stream, buffer):
+            yield _history_entry(item)
+        return
+    lines = io.StringIO(buffer)
+    pending = ""
+    while True:
+        for line in lines:
+            if not line.endswith("\n"):
+                pending = line  # Completed by the next chunk
+                break
+            line = (pending + line).strip()
+            pending = ""
+            if not line:
+                continue
+            try:
+                yield _history_entry(json.loads(line))
+            except ValueError:
+                yield None
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        lines = io.StringIO(pending + chunk)
+        pending = ""
+    if pending.strip():
+        try:
+            yield _history_entry(json.loads(pending))
+        except ValueError:
+            yield None
+
+
+# --- Function: Add imported entries behind the current ones, counting what happened to each ---
+def import_history(store, entries):
+    summary = {"imported": 0, "duplicates": 0, "invalid": 0, "dropped": 0}
+    for entry in entries:
+        if entry is None:
+            summary["invalid"] += 1
+        elif store.add(entry[0], entry[1], recent=False):
+            summary["imported"] += 1
+        elif len(store) >= store.capacity and entry[0] not in store:
+            summary["dropped"] += 1  # Store is at capacity
+        else:
+            summary["duplicates"] += 1
+    return summary
+
+
+# --- Function: Stream records to a binary file as NDJSON or a JSON array, optionally gzipped ---
+def write_history(records, fileobj, fmt="ndjson", compress=False):
+    raw = gzip.GzipFile(fileobj=fileobj, mode="wb", mtime=0) if compress else fileobj
+    out = io.TextIOWrapper(raw, encoding="utf-8", newline="\n")
+    count = 0
+    try:
+        if fmt == "json":
+            out.write("[")
+        for record in records:
+            line = json.dumps(record, ensure_ascii=False)
+            if fmt == "json":
+                line = ("\n  " if count == 0 else ",\n  ") + line
+            else:
+                line += "\n"
+            out.write(line)
+            count += 1
+        if fmt == "json":
+            out.write("\n]\n")
+    finally:
+        out.flush()
+        out.detach()
+        if compress:
+            raw.close()  # Writes the gzip trailer; the caller's file stays open
+    return count
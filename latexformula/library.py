@@ -0,0 +1,302 @@
+"""Persistent formula library: a local SQLite file (WAL) shared by every session.
+
+Set LATEXFORMULA_LIBRARY_PATH to enable it in the app. Formulas, LaTeX, tags and
+the render-cache hash are stored per normalized formula; an FTS5 trigram index
+makes substring search ("\\frac", "alpha", "P_wf") fast over tens of thousands
+of rows. Queries shorter than three characters fall back to a LIKE scan.
+"""
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from latexformula.cache import env_int
+from latexformula.convert import normalize_formula
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS formulas (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    formula TEXT NOT NULL,
+    latex TEXT NOT NULL,
+    name TEXT NOT NULL DEFAULT '',
+    tags TEXT NOT NULL DEFAULT '',
+    favorite INTEGER NOT NULL DEFAULT 0,
+    render_hash TEXT,
+    created REAL NOT NULL,
+    used REAL NOT NULL,
+    uses INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS formulas_used ON formulas (used);
+CREATE INDEX IF NOT EXISTS formulas_favorite ON formulas (favorite, used);
+"""
+
+# External-content FTS table kept in sync by triggers, so text is stored once
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS formulas_fts USING fts5(
+    formula, latex, name, tags, content='formulas', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS formulas_ai AFTER INSERT ON formulas BEGIN
+    INSERT INTO formulas_fts (rowid, formula, latex, name, tags)
+    VALUES (new.id, new.formula, new.latex, new.name, new.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS formulas_ad AFTER DELETE ON formulas BEGIN
+    INSERT INTO formulas_fts (formulas_fts, rowid, formula, latex, name, tags)
+    VALUES ('delete', old.id, old.formula, old.latex, old.name, old.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS formulas_au AFTER UPDATE OF formula, latex, name, tags ON formulas BEGIN
+    INSERT INTO formulas_fts (formulas_fts, rowid, formula, latex, name, tags)
+    VALUES ('delete', old.id, old.formula, old.latex, old.name, old.tags);
+    INSERT INTO formulas_fts (rowid, formula, latex, name, tags)
+    VALUES (new.id, new.formula, new.latex, new.name, new.tags);
+END;
+"""
+
+_COLUMNS = "key, formula, latex, name, tags, favorite, render_hash, created, used, uses"
+
+_UPSERT = f"""
+INSERT INTO formulas ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1)
+ON CONFLICT (key) DO UPDATE SET
+    formula = excluded.formula,
+    latex = excluded.latex,
+    name = CASE WHEN excluded.name != '' THEN excluded.name ELSE name END,
+    tags = CASE WHEN excluded.tags != '' THEN excluded.tags ELSE tags END,
+    favorite = MAX(favorite, excluded.favorite),
+    render_hash = COALESCE(excluded.render_hash, render_hash),
+    used = MAX(used, excluded.used),
+    uses = uses + 1
+"""
+
+# Same upsert, but the given tags always win, so an empty string clears them
+_UPSERT_REPLACE_TAGS = f"""
+INSERT INTO formulas ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1)
+ON CONFLICT (key) DO UPDATE SET
+    formula = excluded.formula,
+    latex = excluded.latex,
+    name = CASE WHEN excluded.name != '' THEN excluded.name ELSE name END,
+    tags = excluded.tags,
+    favorite = MAX(favorite, excluded.favorite),
+    render_hash = COALESCE(excluded.render_hash, render_hash),
+    used = MAX(used, excluded.used),
+    uses = uses + 1
+"""
+
+# Bulk import never overwrites what the user already has
+_IMPORT = f"INSERT OR IGNORE INTO formulas ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1)"
+
+_MIN_TRIGRAM = 3
+
+
+# --- Helper: Tags as one space-separated, deduplicated string ---
+def _tag_text(tags):
+    if isinstance(tags, str):
+        tags = tags.replace(",", " ").split()
+    return " ".join(dict.fromkeys(tag.strip().lower() for tag in tags or () if tag.strip()))
+
+
+def _row_dict(row):
+    return {"key": row[0], "formula": row[1], "latex": row[2], "name": row[3], "tags": row[4],
+            "favorite": bool(row[5]), "render_hash": row[6], "created": row[7], "used": row[8], "uses": row[9]}
+
+
+# --- SQLite-backed formula library with a small connection pool ---
+class FormulaLibrary:
+    def __init__(self, path, pool_size=4):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._pool = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._opened = 0
+        self.version = 0  # Bumped by every write in this process; read caches key on it
+        self.pool_size = max(1, int(pool_size))
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+            try:
+                conn.executescript(_FTS_SCHEMA)
+                self.fts = True
+            except sqlite3.OperationalError:
+                self.fts = False  # SQLite built without FTS5 / trigram: search falls back to LIKE
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        # Connections are shared across sessions; each is used by one thread at a time
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._opened < self.pool_size
+                if can_open:
+                    self._opened += 1
+            conn = self._connect() if can_open else self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    @contextmanager
+    def _transaction(self):
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            with self._lock:
+                self.version += 1
+
+    # --- Writes ---
+    def save(self, formula, latex, name="", tags=(), favorite=False, render_hash=None, replace_tags=False):
+        # replace_tags: store `tags` even when empty (clearing them) instead of keeping the saved ones
+        now = time.time()
+        upsert = _UPSERT_REPLACE_TAGS if replace_tags else _UPSERT
+        with self._transaction() as conn:
+            conn.execute(upsert, (normalize_formula(formula), formula, latex, name, _tag_text(tags),
+                                  int(favorite), render_hash, now, now))
+
+    def set_favorite(self, formula, favorite=True):
+        with self._transaction() as conn:
+            conn.execute("UPDATE formulas SET favorite = ? WHERE key = ?", (int(favorite), normalize_formula(formula)))
+
+    def set_tags(self, formula, tags):
+        with self._transaction() as conn:
+            conn.execute("UPDATE formulas SET tags = ? WHERE key = ?", (_tag_text(tags), normalize_formula(formula)))
+
+    def delete(self, formula):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM formulas WHERE key = ?", (normalize_formula(formula),))
+
+    def import_records(self, records, batch_size=1000):
+        # Streams any iterable of {"formula", "latex", ...} dicts in fixed-size transactions
+        imported = skipped = 0
+        batch = []
+
+        def flush():
+            nonlocal imported, skipped
+            with self._transaction() as conn:
+                added = conn.executemany(_IMPORT, batch).rowcount  # Ignored duplicates count 0
+            imported += added
+            skipped += len(batch) - added
+            batch.clear()
+
+        now = time.time()
+        for record in records:
+            formula, latex = record.get("formula"), record.get("latex")
+            if not isinstance(formula, str) or not isinstance(latex, str) or not formula.strip():
+                skipped += 1
+                continue
+            used = record.get("used") if isinstance(record.get("used"), (int, float)) else now
+            batch.append((normalize_formula(formula), formula, latex, record.get("name") or "",
+                          _tag_text(record.get("tags")), int(bool(record.get("favorite"))),
+                          record.get("render_hash"), record.get("created") or used, used))
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+        return imported, skipped
+
+    # --- Reads ---
+    def _select(self, where="", params=(), order="used DESC", limit=50, offset=0):
+        sql = f"SELECT {_COLUMNS} FROM formulas {where} ORDER BY {order} LIMIT ? OFFSET ?"
+        with self._connection() as conn:
+            return [_row_dict(row) for row in conn.execute(sql, (*params, limit, offset))]
+
+    def get(self, formula):
+        rows = self._select("WHERE key = ?", (normalize_formula(formula),), limit=1)
+        return rows[0] if rows else None
+
+    def recent(self, limit=50, offset=0, favorites_only=False):
+        where = "WHERE favorite = 1" if favorites_only else ""
+        return self._select(where, (), limit=limit, offset=offset)
+
+    def search(self, text, limit=50, favorites_only=False):
+        terms = text.split()
+        if not terms:
+            return self.recent(limit, favorites_only=favorites_only)
+        favorite_filter = " AND f.favorite = 1" if favorites_only else ""
+        if self.fts and all(len(term) >= _MIN_TRIGRAM for term in terms):
+            # Every term as a quoted phrase: FTS5 syntax in user input is matched literally.
+            # Newest rows first: FTS5 walks its doclists in rowid order, so LIMIT stops early
+            # instead of scoring every match (bm25 over 50k hits took ~100 ms).
+            match = " AND ".join('"' + term.replace('"', '""') + '"' for term in terms)
+            sql = (f"SELECT {', '.join('f.' + c.strip() for c in _COLUMNS.split(','))} "
+                   f"FROM formulas_fts JOIN formulas f ON f.id = formulas_fts.rowid "
+                   f"WHERE formulas_fts MATCH ?{favorite_filter} "
+                   f"ORDER BY formulas_fts.rowid DESC LIMIT ?")
+            with self._connection() as conn:
+                return [_row_dict(row) for row in conn.execute(sql, (match, limit))]
+        clauses, params = [], []
+        for term in terms:
+            pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            clauses.append("(formula LIKE ? ESCAPE '\\' OR latex LIKE ? ESCAPE '\\' "
+                           "OR name LIKE ? ESCAPE '\\' OR tags LIKE ? ESCAPE '\\')")
+            params.extend([pattern] * 4)
+        where = "WHERE " + " AND ".join(clauses) + (" AND favorite = 1" if favorites_only else "")
+        return self._select(where, params, limit=limit)
+
+    def count(self, favorites_only=False):
+        sql = "SELECT COUNT(*) FROM formulas" + (" WHERE favorite = 1" if favorites_only else "")
+        with self._connection() as conn:
+            return conn.execute(sql).fetchone()[0]
+
+    def iter_records(self, batch_size=1000):
+        # Keyset pagination: memory stays flat and no connection is held between batches
+        last_id = 0
+        while True:
+            with self._connection() as conn:
+                rows = conn.execute(f"SELECT id, {_COLUMNS} FROM formulas WHERE id > ? ORDER BY id LIMIT ?",
+                                    (last_id, batch_size)).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                record = _row_dict(row[1:])
+                del record["key"]
+                yield record
+            last_id = rows[-1][0]
+
+    def export_ndjson(self, fileobj):
+        count = 0
+        for record in self.iter_records():
+            fileobj.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+        return count
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+# --- Function: Yield records from an NDJSON stream one line at a time (bad lines are skipped) ---
+def iter_ndjson(stream):
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(record, dict):
+            yield record
+
+
+# --- Function: Library at LATEXFORMULA_LIBRARY_PATH, or None when it is not configured ---
+def open_library():
+    path = os.environ.get("LATEXFORMULA_LIBRARY_PATH")
+    if not path:
+        return None
+    return FormulaLibrary(path, env_int("LATEXFORMULA_LIBRARY_POOL_SIZE", 4))
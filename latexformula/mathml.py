@@ -0,0 +1,103 @@
+"""Presentation MathML for "Copy for Word", generated on the server instead of in the browser."""
+from latexformula.cache import LRUCache, env_int
+from latexformula.convert import is_valid_formula, looks_like_latex, normalize_formula, parse_cached
+from latexformula.metrics import timed
+from latexformula.workers import POOL
+
+MATHML_NAMESPACE = "http://www.w3.org/1998/Math/MathML"
+# parse_latex can take seconds on long input, so the app runs it in a worker (same limits as transforms)
+MATHML_TIMEOUT = env_int("LATEXFORMULA_MATHML_TIMEOUT", 20)
+MATHML_MEMORY_MB = env_int("LATEXFORMULA_MATHML_MEMORY_MB", 512)
+
+# Keyed by ("formula", normalized text) or ("latex", source), shared by every session
+MATHML_CACHE = LRUCache(env_int("LATEXFORMULA_MATHML_CACHE_SIZE", 4096))
+
+# Registry symbols carry LaTeX names ("\\phi"); these have no Greek-letter name to fall back on
+_UNICODE_NAMES = {
+    r"\degree": "°",
+    r"\approx": "≈",
+    r"\ne": "≠",
+    r"\ge": "≥",
+    r"\le": "≤",
+    r"\dot{\gamma}": "γ̇",
+}
+_display_names = None
+
+
+# --- Helper: Map registry symbols to names the MathML printer understands ---
+def _symbol_names():
+    global _display_names
+    if _display_names is None:
+        import sympy as sp
+        from latexformula.parsing import SYMBOLS
+        names = {}
+        for obj in SYMBOLS.values():
+            if isinstance(obj, sp.Symbol) and obj.name.startswith("\\"):
+                # "\\alpha" -> "alpha", which the printer turns into the Unicode letter
+                names[obj] = sp.Symbol(_UNICODE_NAMES.get(obj.name, obj.name[1:]))
+        _display_names = names
+    return _display_names
+
+
+# --- Function: SymPy expression to a <math> element ---
+def expr_to_mathml(expr):
+    import sympy as sp
+    expr = sp.sympify(expr)  # "((a, b), (c, d))" parses to a plain tuple, which has no xreplace
+    body = sp.mathml(expr.xreplace(_symbol_names()), printer='presentation', order='none')
+    return f'<math xmlns="{MATHML_NAMESPACE}" display="block">{body}</math>'
+
+
+def _formula_mathml(formula):
+    valid, error_msg = is_valid_formula(formula)
+    if not valid:
+        return None, error_msg
+    try:
+        expr = parse_cached(formula)  # Usually the parse that produced the LaTeX
+        with timed("mathml"):
+            return expr_to_mathml(expr), None
+    except Exception as e:
+        return None, str(e)
+
+
+def _latex_mathml(latex_str):
+    try:
+        from sympy.parsing.latex import parse_latex
+        with timed("parse_latex"):
+            expr = parse_latex(latex_str)
+        with timed("mathml"):
+            return expr_to_mathml(expr), None
+    except ImportError:
+        return None, "LaTeX to MathML needs the antlr4-python3-runtime package"
+    except Exception as e:
+        return None, str(e)
+
+
+# --- Function: Formula text to MathML, returning (mathml, error) ---
+def formula_to_mathml(formula):
+    key = normalize_formula(formula)
+    return MATHML_CACHE.get_or_compute(("formula", key), lambda: _formula_mathml(key))
+
+
+# --- Function: Hand-written LaTeX to MathML, returning (mathml, error) ---
+def latex_to_mathml(latex_str):
+    latex_str = latex_str.strip()
+    return MATHML_CACHE.get_or_compute(("latex", latex_str), lambda: _latex_mathml(latex_str))
+
+
+# --- Function: Hand-written LaTeX to MathML: cached (mathml, error), or a background job computing it ---
+def submit_latex_mathml(latex_str):
+    key = ("latex", latex_str.strip())
+    cached = MATHML_CACHE.get(key)
+    if cached is not None:
+        return cached, None
+    job = POOL.submit(_latex_mathml, key[1], timeout=MATHML_TIMEOUT, memory_mb=MATHML_MEMORY_MB,
+                      on_done=lambda result: MATHML_CACHE.put(key, result))
+    return None, job
+
+
+# --- Function: Formula or LaTeX input to MathML, returning (mathml, error) ---
+def to_mathml(text):
+    text = text.strip()
+    if looks_like_latex(text):
+        return latex_to_mathml(text)
+    return formula_to_mathml(text)
@@ -0,0 +1,195 @@
+"""Process-wide latency/size metrics shared by every session, exportable as Prometheus text.
+
+Stages are timed with ``timed("parse")``. Inside ``collect_stages(sink)`` the same
+timings are also summed into ``sink`` so one rerun or request can show its own breakdown.
+"""
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Latency buckets in seconds (sub-millisecond parses up to multi-second renders)
+SECONDS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+_SINK = ContextVar("latexformula_stage_sink", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            i = len(self.buckets)
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-th observation (what Prometheus would estimate)
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (math.inf,), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return math.inf
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    pairs = []
+    for name, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+# --- Thread-safe registry of counters and histograms keyed by (name, labels) ---
+class MetricsRegistry:
+    def __init__(self, prefix="latexformula"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._help = {}
+        self._buckets = {}
+        self._counters = {}
+        self._histograms = {}
+
+    def describe(self, name, help_text, buckets=None):
+        self._help[name] = help_text
+        if buckets is not None:
+            self._buckets[name] = tuple(buckets)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self._buckets.get(name, SECONDS_BUCKETS))
+            histogram.observe(value)
+
+    def histogram_summary(self, name, label):
+        # {label value: count/mean/p50/p95} for the UI, e.g. per stage
+        with self._lock:
+            summary = {}
+            for (metric, labels), histogram in self._histograms.items():
+                if metric != name or not histogram.count:
+                    continue
+                summary[dict(labels).get(label, "")] = {
+                    "count": histogram.count,
+                    "mean": histogram.sum / histogram.count,
+                    "p50": histogram.quantile(0.5),
+                    "p95": histogram.quantile(0.95),
+                }
+            return summary
+
+    def to_prometheus(self):
+        lines = []
+        with self._lock:
+            for kind, series in (("counter", self._counters), ("histogram", self._histograms)):
+                for name in sorted({name for name, _labels in series}):
+                    full_name = f"{self.prefix}_{name}"
+                    if name in self._help:
+                        lines.append(f"# HELP {full_name} {self._help[name]}")
+                    lines.append(f"# TYPE {full_name} {kind}")
+                    for (metric, labels), value in sorted(series.items()):
+                        if metric != name:
+                            continue
+                        if kind == "counter":
+                            lines.append(f"{full_name}{_label_text(labels)} {value}")
+                            continue
+                        cumulative = 0
+                        for bound, count in zip(value.buckets + (math.inf,), value.counts):
+                            cumulative += count
+                            le = "+Inf" if bound == math.inf else repr(bound)
+                            lines.append(f"{full_name}_bucket{_label_text(labels + (('le', le),))} {cumulative}")
+                        lines.append(f"{full_name}_sum{_label_text(labels)} {value.sum!r}")
+                        lines.append(f"{full_name}_count{_label_text(labels)} {value.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path):
+        # Atomic replace so a scraper (e.g. node_exporter's textfile collector) never reads a partial file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+METRICS = MetricsRegistry()
+METRICS.describe("stage_seconds", "Time spent in each conversion/render stage.")
+METRICS.describe("stage_errors_total", "Stages that raised an exception.")
+METRICS.describe("payload_bytes", "Size of payloads sent to the browser.", buckets=BYTES_BUCKETS)
+METRICS.describe("reruns_total", "Streamlit script reruns.")
+METRICS.describe("requests_total", "HTTP requests by endpoint and status.")
+METRICS.describe("request_seconds", "HTTP request latency by endpoint.")
+
+
+# --- Function: Sum stage timings into `sink` (a dict) for everything run inside the block ---
+@contextmanager
+def collect_stages(sink):
+    token = _SINK.set(sink)
+    try:
+        yield sink
+    finally:
+        _SINK.reset(token)
+
+
+# --- Function: Record one stage timing in METRICS and in `sink` (default: the active collector) ---
+def record_stage(stage, seconds, sink=None):
+    METRICS.observe("stage_seconds", seconds, stage=stage)
+    if sink is None:
+        sink = _SINK.get()
+    if sink is not None:
+        sink[stage] = sink.get(stage, 0.0) + seconds
+
+
+# --- Function: Time a block as one stage ---
+@contextmanager
+def timed(stage, sink=None):
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        METRICS.inc("stage_errors_total", stage=stage)
+        raise
+    finally:
+        record_stage(stage, time.perf_counter() - start, sink)
+
+
+_last_export = [0.0]
+
+
+# --- Function: Write METRICS to $LATEXFORMULA_METRICS_FILE at most every `interval` seconds ---
+def export_metrics_file(interval=10.0):
+    path = os.environ.get("LATEXFORMULA_METRICS_FILE")
+    now = time.monotonic()
+    if not path or now - _last_export[0] < interval:
+        return False
+    _last_export[0] = now
+    try:
+        METRICS.write_textfile(path)
+    except OSError:
+        return False
+    return True
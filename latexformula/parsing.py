@@ -0,0 +1,141 @@
+import builtins
+import re
+import types
+from types import MappingProxyType
+
+import sympy as sp
+from sympy.parsing.sympy_parser import (
+    parse_expr, standard_transformations, implicit_multiplication_application, convert_xor
+)
+
+# --- Parser configuration (built once per process) ---
+TRANSFORMATIONS = standard_transformations + (
+    implicit_multiplication_application,
+    convert_xor
+)
+
+# parse_expr() rebuilds this namespace with `from sympy import *` on every call
+# unless one is passed in, so build it once and share it.
+_GLOBAL_DICT = {}
+exec('from sympy import *', _GLOBAL_DICT)
+for _name, _obj in vars(builtins).items():
+    if isinstance(_obj, types.BuiltinFunctionType):
+        _GLOBAL_DICT[_name] = _obj
+_GLOBAL_DICT['max'] = sp.Max
+_GLOBAL_DICT['min'] = sp.Min
+
+# --- Symbol registry: functions, Greek letters, petroleum aliases ---
+_FUNCTIONS = {
+    "sp": sp,
+    "sqrt": sp.sqrt,
+    "log": sp.log,
+    "ln": sp.log,
+    "sin": sp.sin,
+    "cos": sp.cos,
+    "tan": sp.tan,
+    "cot": sp.cot,
+    "sec": sp.sec,
+    "csc": sp.csc,
+    "asin": sp.asin,
+    "acos": sp.acos,
+    "atan": sp.atan,
+    "sinh": sp.sinh,
+    "cosh": sp.cosh,
+    "tanh": sp.tanh,
+    "exp": sp.exp,
+    "abs": sp.Abs,
+    "floor": sp.floor,
+    "ceiling": sp.ceiling,
+    "Sum": sp.Sum,
+    "Limit": sp.Limit,
+    "Integral": sp.Integral,
+    "Derivative": sp.Derivative,
+    "oo": sp.oo,
+    "pi": sp.pi,
+    "e": sp.E,
+    "I": sp.I,
+}
+
+_GREEK = [
+    "phi", "kappa", "mu", "alpha", "beta", "gamma", "delta", "Delta", "epsilon", "zeta",
+    "eta", "theta", "Theta", "iota", "lambda", "Lambda", "nu", "xi", "rho", "sigma",
+    "Sigma", "tau", "Phi", "omega", "Omega",
+    # Relation / unit names that render as LaTeX commands
+    "degree", "approx", "ne", "ge", "le",
+]
+
+# Petroleum engineering symbols
+_ALIASES = {
+    "porosity": r'\phi',
+    "permeability": r'\kappa',
+    "viscosity": r'\mu',
+    "density": r'\rho',
+    "shear_rate": r'\dot{\gamma}',
+}
+
+_PLAIN = ["k", "P", "q", "v", "S", "c", "B", "z", "R", "h"]
+
+
+def _build_symbols():
+    table = dict(_FUNCTIONS)
+    for name in _GREEK:
+        table[name] = sp.Symbol('\\' + name)
+    for name, latex_name in _ALIASES.items():
+        table[name] = sp.Symbol(latex_name)
+    for name in _PLAIN:
+        table[name] = sp.Symbol(name)
+    return table
+
+
+_LOCAL_DICT = _build_symbols()
+SYMBOLS = MappingProxyType(_LOCAL_DICT)
+
+# Reserved names to avoid parsing conflicts
+RESERVED = frozenset(_FUNCTIONS) - {"sp"}
+
+# Reverse mapping used when a transformed expression is written back as formula text
+_FORMULA_NAMES = {}
+for _name, _obj in _LOCAL_DICT.items():
+    if isinstance(_obj, sp.Symbol) and _obj.name != _name:
+        _FORMULA_NAMES.setdefault(_obj, sp.Symbol(_name))
+FORMULA_NAMES = MappingProxyType(_FORMULA_NAMES)
+
+SUBSCRIPT_PATTERN = re.compile(r'\b([a-zA-Z]+)_([a-zA-Z0-9]+)\b')
+
+
+# --- Helper: Local dictionary for a single formula ---
+def local_dict_for(formula):
+    overlay = {}
+    for base, subscript in SUBSCRIPT_PATTERN.findall(formula):
+        var_name = f"{base}_{subscript}"
+        if var_name not in _LOCAL_DICT and base not in RESERVED:
+            overlay[var_name] = sp.Symbol(var_name)
+    # parse_expr may stash bookkeeping entries in local_dict, so never hand it the shared table
+    local_dict = dict(_LOCAL_DICT)
+    local_dict.update(overlay)
+    return local_dict
+
+
+# --- Function: Parse formula text into a SymPy expression ---
+def parse_formula(formula):
+    parsed_formula = formula.replace("^", "**")
+    local_dict = local_dict_for(parsed_formula)
+
+    # Detect if there's an '=' (equation)
+    if "=" in parsed_formula:
+        lhs, rhs = parsed_formula.split("=", 1)
+        lhs_expr = parse_expr(lhs.strip(), local_dict=local_dict, global_dict=_GLOBAL_DICT,
+                              transformations=TRANSFORMATIONS)
+        rhs_expr = parse_expr(rhs.strip(), local_dict=local_dict, global_dict=_GLOBAL_DICT,
+                              transformations=TRANSFORMATIONS)
+        return sp.Eq(lhs_expr, rhs_expr)
+    return parse_expr(parsed_formula, local_dict=local_dict, global_dict=_GLOBAL_DICT,
+                      transformations=TRANSFORMATIONS)
+
+
+# --- Function: Write an expression back as formula text ---
+def expr_to_formula(expr):
+    expr = expr.xreplace(_FORMULA_NAMES)
+    if isinstance(expr, sp.Eq):
+        return f"{expr.lhs} = {expr.rhs}".replace("**", "^")
+    return str(expr).replace("**", "^")
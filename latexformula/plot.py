@@ -0,0 +1,175 @@
+"""Parameter sweeps of a compiled formula over one or two symbols, plotted with matplotlib.
+
+Three cache layers keep slider moves cheap: the compiled NumPy function
+(COMPILED_CACHE, per expression), the sampled arrays (SAMPLE_CACHE, per sweep and
+fixed values) and the rendered PNG (PLOT_CACHE, per samples and figure size).
+Moving a slider re-samples with the already-compiled function; returning to an
+earlier position, or changing only the figure size, skips sampling entirely.
+"""
+import math
+from io import BytesIO
+
+from latexformula.cache import LRUCache, env_int
+from latexformula.evaluate import real_values
+from latexformula.metrics import timed
+
+# Entries hold at most a few plot-widths of points (1-D) or one grid (2-D), not the raw sweep
+SAMPLE_CACHE = LRUCache(env_int("LATEXFORMULA_SAMPLE_CACHE_SIZE", 32))
+PLOT_CACHE = LRUCache(env_int("LATEXFORMULA_PLOT_CACHE_SIZE", 128))
+MAX_SWEEP_POINTS = 10 ** 6
+_BASE_SAMPLES = 1024  # Uniform start of an adaptive 1-D sweep
+_MAX_REFINE = 16  # Bisection rounds; each halves the spacing where the curve bends
+_TOLERANCE = 1e-3  # Allowed midpoint error, as a fraction of the y range
+_AXES_FRACTION = 0.8  # Share of the figure width taken by the axes
+_MARGINS = (80, 20, 50, 30)  # Figure margins in pixels: left, right, bottom, top
+
+
+# --- Helper: Adaptive 1-D samples: bisect only intervals where a straight line is a poor fit ---
+def _adaptive_1d(f, lo, hi, budget):
+    import numpy as np
+    x = np.linspace(lo, hi, min(budget, _BASE_SAMPLES))
+    y = f(x)
+    evaluated = len(x)
+    active = np.ones(len(x) - 1, dtype=bool)
+    for _ in range(_MAX_REFINE):
+        idx = np.flatnonzero(active)
+        room = budget - len(x)
+        if not len(idx) or room <= 0:
+            break
+        mid = (x[idx] + x[idx + 1]) / 2
+        ym = f(mid)
+        evaluated += len(mid)
+        finite = y[np.isfinite(y)]
+        span = float(finite.max() - finite.min()) if finite.size else 0.0
+        with np.errstate(invalid="ignore"):
+            err = np.abs(ym - (y[idx] + y[idx + 1]) / 2)
+        # Poles and domain edges keep refining; intervals undefined throughout do not
+        err[np.isnan(err)] = np.inf
+        err[np.isnan(ym) & np.isnan(y[idx]) & np.isnan(y[idx + 1])] = 0.0
+        split = err > _TOLERANCE * (span or 1.0)
+        if split.sum() > room:
+            worst = np.argsort(err)[::-1][:room]
+            split = np.zeros_like(split)
+            split[worst] = True
+        if not split.any():
+            break
+        at = idx[split] + 1
+        x = np.insert(x, at, mid[split])
+        y = np.insert(y, at, ym[split])
+        inserted = at + np.arange(len(at))  # Positions of the new points in the merged arrays
+        active = np.zeros(len(x) - 1, dtype=bool)
+        active[inserted - 1] = True
+        active[inserted] = True
+    return x, y, evaluated
+
+
+# --- Helper: At most four points per pixel column (first, min, max, last), so lines look the same ---
+def _envelope(x, y, columns):
+    import numpy as np
+    if len(x) <= 4 * columns or x[-1] == x[0]:
+        return x, y
+    bins = np.minimum(((x - x[0]) * (columns / (x[-1] - x[0]))).astype(np.int64), columns - 1)
+    starts = np.flatnonzero(np.diff(bins, prepend=-1))
+    ends = np.append(starts[1:], len(x)) - 1
+    lows = np.fmin.reduceat(y, starts)  # NaN only where a whole column is undefined (a gap)
+    highs = np.fmax.reduceat(y, starts)
+    return np.repeat(x[starts], 4), np.column_stack([y[starts], lows, highs, y[ends]]).ravel()
+
+
+def _sample(compiled, axes, fixed, points, adaptive, columns):
+    import numpy as np
+    values = dict(fixed)
+    if len(axes) == 1:
+        (name, lo, hi), = axes
+
+        def f(array):
+            return real_values(compiled.evaluate({**values, name: array}))
+
+        if adaptive:
+            x, y, evaluated = _adaptive_1d(f, lo, hi, points)
+        else:
+            x = np.linspace(lo, hi, points)
+            y, evaluated = f(x), points
+        finite = np.isfinite(y)
+        x, y = _envelope(x, y, columns)
+        return {"x": x, "y": y, "evaluated": evaluated, "invalid": int(len(finite) - finite.sum())}
+    (x_name, x_lo, x_hi), (y_name, y_lo, y_hi) = axes
+    n = max(2, math.isqrt(points))
+    if adaptive:
+        n = min(n, columns)  # Finer than one sample per pixel is not visible
+    values[x_name] = np.linspace(x_lo, x_hi, n)[np.newaxis, :]
+    values[y_name] = np.linspace(y_lo, y_hi, n)[:, np.newaxis]
+    z = real_values(np.broadcast_to(compiled.evaluate(values), (n, n))).astype(np.float32)
+    return {"z": z, "evaluated": n * n, "invalid": int(z.size - np.isfinite(z).sum())}
+
+
+# --- Helper: Axis label for an input or output name ("mu" -> $\mu$) ---
+def _label(compiled, name):
+    import sympy as sp
+    if name in compiled.names:
+        return f"${sp.latex(compiled.symbols[compiled.names.index(name)])}$"
+    if name in ("result", "residual"):
+        return name
+    from latexformula.parsing import SYMBOLS
+    symbol = SYMBOLS.get(name, sp.Symbol(name))
+    return f"${sp.latex(symbol)}$" if isinstance(symbol, sp.Symbol) else name
+
+
+def _draw(compiled, axes, fixed, data, width, height, dpi):
+    import numpy as np
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    from latexformula.engine import LAYOUT_LOCK  # Axis labels use the shared mathtext fonts
+    buf = BytesIO()
+    with LAYOUT_LOCK:
+        fig = Figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+        FigureCanvasAgg(fig)
+        # Fixed pixel margins: constrained layout measured every tick label and doubled the draw time
+        fig.subplots_adjust(left=_MARGINS[0] / width, right=1 - _MARGINS[1] / width,
+                            bottom=_MARGINS[2] / height, top=1 - _MARGINS[3] / height)
+        ax = fig.add_subplot()
+        if "z" in data:
+            (x_name, x_lo, x_hi), (y_name, y_lo, y_hi) = axes
+            image = ax.imshow(np.ma.masked_invalid(data["z"]), origin="lower", aspect="auto",
+                              extent=(x_lo, x_hi, y_lo, y_hi), interpolation="nearest", cmap="viridis")
+            fig.colorbar(image, ax=ax, label=_label(compiled, compiled.target))
+            ax.set_ylabel(_label(compiled, y_name))
+        else:
+            x_name = axes[0][0]
+            ax.plot(data["x"], data["y"], linewidth=1.2, color="#0f80c1")
+            ax.set_ylabel(_label(compiled, compiled.target))
+            ax.grid(alpha=0.3)
+        ax.set_xlabel(_label(compiled, x_name))
+        if fixed:
+            ax.set_title(", ".join(f"{_label(compiled, name)} = {value:g}" for name, value in fixed), fontsize=9)
+        # Fast zlib level: plots are cached and re-drawn on slider moves, so encode time matters more than size
+        fig.savefig(buf, format="png", dpi=dpi, pil_kwargs={"compress_level": 1})
+    return buf.getvalue()
+
+
+# --- Function: Sweep one or two symbols and plot, returning (png, samples) ---
+# axes: ((name, lo, hi),) or two of them; fixed: value for every other input name.
+def plot_sweep(compiled, axes, fixed, points=2000, adaptive=True, width=800, height=450, dpi=100):
+    axes = tuple((name, float(lo), float(hi)) for name, lo, hi in axes)
+    if not 1 <= len(axes) <= 2:
+        raise ValueError("Sweep one or two symbols")
+    swept = {name for name, _lo, _hi in axes}
+    missing = [name for name in compiled.names if name not in swept and name not in fixed]
+    if missing:
+        raise ValueError(f"No value for: {', '.join(missing)}")
+    fixed = tuple(sorted((name, float(fixed[name])) for name in compiled.names if name not in swept))
+    points = max(2, min(int(points), MAX_SWEEP_POINTS))
+    columns = max(16, int(width * _AXES_FRACTION))
+    sample_key = (compiled.key, axes, fixed, points, bool(adaptive), columns)
+
+    def sample():
+        with timed("sweep"):
+            return _sample(compiled, axes, fixed, points, adaptive, columns)
+
+    def draw():
+        with timed("plot"):
+            return _draw(compiled, axes, fixed, data, width, height, dpi)
+
+    data = SAMPLE_CACHE.get_or_compute(sample_key, sample)
+    png = PLOT_CACHE.get_or_compute((sample_key, width, height, dpi), draw)
+    return png, data
@@ -0,0 +1,71 @@
+import hashlib
+import json
+import os
+
+from latexformula.cache import TieredCache, env_int
+from latexformula.metrics import timed
+from latexformula.svg import minify_svg
+
+
+# --- Helper: Default on-disk location for rendered images ---
+def _default_cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "latexformula", "renders")
+
+
+# Shared by every session and surviving restarts; set LATEXFORMULA_RENDER_CACHE_DIR="" to disable the disk tier
+RENDER_CACHE = TieredCache(
+    memory_size=env_int("LATEXFORMULA_RENDER_CACHE_SIZE", 256),
+    directory=os.environ.get("LATEXFORMULA_RENDER_CACHE_DIR", _default_cache_dir()),
+    max_disk_bytes=env_int("LATEXFORMULA_RENDER_CACHE_BYTES", 256 * 1024 * 1024),
+)
+
+
+# Bumped whenever output pixels change so stale disk-cache entries are not served
+_ENGINE_VERSION = 3
+
+
+# --- Function: Render LaTeX to image bytes (png, or svg/pdf via the figure path) ---
+def render_latex(latex_str, font_size=20, bg_color='white', text_color='black', dpi=200, fmt='png'):
+    # matplotlib and numpy load with the first render instead of at import time
+    from latexformula.engine import render_image
+    return render_image(latex_str, font_size, bg_color, text_color, dpi, fmt)
+
+
+# --- Helper: Content address for a render request ---
+def render_key(latex_str, font_size=20, bg_color='white', text_color='black', dpi=200, fmt='png', minify=False):
+    fields = [_ENGINE_VERSION, latex_str, font_size, bg_color, text_color, dpi, fmt]
+    if minify:
+        fields.append("min")
+    payload = json.dumps(fields)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# --- Function: Render through the shared memory + disk cache (minify applies to svg) ---
+def cached_render(latex_str, font_size=20, bg_color='white', text_color='black', dpi=200, fmt='png', minify=False):
+    minify = minify and fmt == 'svg'
+    digest = render_key(latex_str, font_size, bg_color, text_color, dpi, fmt, minify)
+
+    def compute():
+        with timed("render"):
+            data = render_latex(latex_str, font_size, bg_color, text_color, dpi, fmt)
+        if minify:
+            with timed("minify_svg"):
+                data = minify_svg(data)
+        return data
+
+    return RENDER_CACHE.get_or_compute(digest, compute)
+
+
+# --- Function: PNGs for many formulas; cache misses are rendered together in one batch pass ---
+# Returns one entry per input, None where mathtext cannot lay the formula out.
+def cached_render_batch(latex_strs, font_size=20, bg_color='white', text_color='black', dpi=200):
+    digests = [render_key(latex_str, font_size, bg_color, text_color, dpi) for latex_str in latex_strs]
+    sources = dict(zip(digests, latex_strs))
+
+    def compute(missing):
+        from latexformula.engine import render_png_batch
+        with timed("render_batch"):
+            return render_png_batch([sources[digest] for digest in missing], font_size, bg_color, text_color, dpi)
+
+    return RENDER_CACHE.get_or_compute_many(digests, compute)
@@ -0,0 +1,215 @@
+"""Local HTTP rendering service.
+
+    python -m latexformula.server --port 8765 --workers 4
+
+Endpoints (query values must be URL-encoded: a bare "+" arrives as a space):
+    GET /latex?formula=x%5E2%2B1      -> text/plain LaTeX for x^2+1 (422 with the error for bad input)
+    GET /png?latex=%5Cfrac%7Ba%7D%7Bb%7D&size=20 -> image/png (optional dpi, bg, color)
+    GET /svg?latex=...&size=20        -> image/svg+xml (add min=1 for a minified SVG)
+    GET /pdf?latex=...&size=20        -> application/pdf
+    GET /stats                        -> JSON counters
+    GET /metrics                      -> Prometheus text (request counts and latency histograms)
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from latexformula.cache import LRUCache, env_int
+from latexformula.metrics import METRICS
+from latexformula.warmup import warm_up
+from latexformula.workers import POOL
+
+CACHE_CONTROL = "public, max-age=86400"
+CONTENT_TYPES = {"latex": "text/plain; charset=utf-8", "png": "image/png", "svg": "image/svg+xml",
+                 "pdf": "application/pdf"}
+
+
+# --- Worker side: runs in pool processes that warm_up() already loaded ---
+def _work(kind, params):
+    if kind == "latex":
+        from latexformula.convert import to_latex
+        latex_str, error = to_latex(params["formula"])
+        if error:
+            raise ValueError(error)
+        return latex_str.encode("utf-8")
+    from latexformula.render import cached_render
+    return cached_render(params["latex"], params["size"], params["bg"], params["color"],
+                         params["dpi"], fmt=kind, minify=params.get("min", False))
+
+
+# --- Request coalescing and result caching in front of the process pool ---
+class RenderService:
+    def __init__(self, workers=None, cache_size=1024):
+        self.workers = workers or POOL.max_workers
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=POOL.context,
+                                            initializer=warm_up)
+        self.cache = LRUCache(cache_size)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.coalesced = 0
+
+    def prewarm(self):
+        # Start every worker now rather than on the first requests
+        for future in [self.executor.submit(os.getpid) for _ in range(self.workers)]:
+            future.result()
+
+    def get(self, kind, params):
+        key = (kind, tuple(sorted(params.items())))
+        with self._lock:
+            self.requests += 1
+        body = self.cache.get(key)
+        if body is not None:
+            return body
+
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self.coalesced += 1
+        if not owner:
+            return future.result()  # Identical request already running: share its result
+
+        try:
+            body = self.executor.submit(_work, kind, params).result()
+            self.cache.put(key, body)
+            future.set_result(body)
+            return body
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def stats(self):
+        return {"workers": self.workers, "requests": self.requests, "coalesced": self.coalesced,
+                "inflight": len(self._inflight), "cache": self.cache.stats()}
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+# --- Helper: Validated parameters for one endpoint ---
+def _params(kind, query):
+    def first(name, default=None):
+        values = query.get(name)
+        return values[0] if values else default
+
+    if kind == "latex":
+        formula = first("formula")
+        if not formula:
+            raise ValueError("missing 'formula' parameter")
+        return {"formula": formula}
+    latex_str = first("latex")
+    if not latex_str:
+        raise ValueError("missing 'latex' parameter")
+    size = int(first("size", 20))
+    dpi = int(first("dpi", 200))
+    if not 4 <= size <= 200 or not 20 <= dpi <= 600:
+        raise ValueError("size must be 4-200 and dpi 20-600")
+    params = {"latex": latex_str, "size": size, "dpi": dpi,
+              "bg": first("bg", "white"), "color": first("color", "black")}
+    if kind == "svg" and first("min", "0") not in ("0", ""):
+        params["min"] = True
+    return params
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    service = None
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        start = time.perf_counter()
+        kind = urlsplit(self.path).path.strip("/")
+        status = self._handle(kind)
+        endpoint = kind if kind in CONTENT_TYPES or kind in ("stats", "metrics") else "other"
+        METRICS.inc("requests_total", endpoint=endpoint, status=status)
+        METRICS.observe("request_seconds", time.perf_counter() - start, endpoint=endpoint)
+
+    def _handle(self, kind):
+        if kind == "stats":
+            return self._send(200, json.dumps(self.service.stats()).encode("utf-8"), "application/json")
+        if kind == "metrics":
+            return self._send(200, METRICS.to_prometheus().encode("utf-8"),
+                              "text/plain; version=0.0.4; charset=utf-8")
+        if kind not in CONTENT_TYPES:
+            return self._send(404, b"not found\n", "text/plain")
+        try:
+            params = _params(kind, parse_qs(urlsplit(self.path).query))
+        except ValueError as e:
+            return self._send(400, f"{e}\n".encode("utf-8"), "text/plain")
+        try:
+            body = self.service.get(kind, params)
+        except Exception as e:
+            return self._send(422, f"{e}\n".encode("utf-8"), "text/plain")
+
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+        if self.headers.get("If-None-Match") == etag:
+            return self._send(304, b"", None, headers)
+        return self._send(200, body, CONTENT_TYPES[kind], headers)
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+        return status
+
+    def log_message(self, format, *args):
+        if os.environ.get("LATEXFORMULA_SERVER_LOG"):
+            super().log_message(format, *args)
+
+
+class RenderHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # The default backlog of 5 drops connections under concurrent load
+
+
+# --- Function: Build a server bound to host:port (port 0 picks a free port) ---
+def make_server(host="127.0.0.1", port=8765, workers=None):
+    service = RenderService(workers, env_int("LATEXFORMULA_SERVER_CACHE_SIZE", 1024))
+    service.prewarm()
+    handler = type("BoundRequestHandler", (RequestHandler,), {"service": service})
+    server = RenderHTTPServer((host, port), handler)
+    server.service = service
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m latexformula.server",
+                                     description="Serve formula LaTeX and rendered images over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None, help="render processes (default: cores - 1)")
+    args = parser.parse_args(argv)
+
+    server = make_server(args.host, args.port, args.workers)
+    print(f"Serving on http://{args.host}:{server.server_address[1]} "
+          f"with {server.service.workers} warm workers", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
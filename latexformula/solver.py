@@ -0,0 +1,230 @@
+"""Solve an equation, or a system entered one equation per line, for chosen symbols.
+
+Each solve runs in a killable worker process (see workers.py) and tries, within a
+time budget, ``sp.solve``, then ``sp.solveset`` (single equation), then ``sp.nsolve``
+(when every other symbol is numeric). Results are cached by canonical equation,
+so "q = k*A/mu" and "k*A/mu = q" share one entry.
+"""
+import signal
+import threading
+import time
+from contextlib import contextmanager
+
+import sympy as sp
+from sympy.logic.boolalg import BooleanAtom
+
+from latexformula.cache import LRUCache, env_int
+from latexformula.convert import is_valid_formula, parse_cached
+from latexformula.parsing import FORMULA_NAMES, expr_to_formula
+from latexformula.workers import POOL
+
+SOLVE_TIMEOUT = env_int("LATEXFORMULA_SOLVE_TIMEOUT", 20)
+SOLVE_MEMORY_MB = env_int("LATEXFORMULA_SOLVE_MEMORY_MB", 512)
+
+# Keyed by (canonical equations, target symbols), shared by all sessions
+SOLVE_CACHE = LRUCache(env_int("LATEXFORMULA_SOLVE_CACHE_SIZE", 1024))
+
+# Share of a task's budget each method may use before the next one is tried
+_SOLVE_SHARE = 0.5
+_SOLVESET_SHARE = 0.3
+_NSOLVE_GUESSES = (1, 0.5, 2, 10, -1, 0.1, 100, -10)
+
+
+class _StageTimeout(BaseException):
+    """Raised by SIGALRM; a BaseException so SymPy's own `except Exception` cannot swallow it."""
+
+
+# --- Helper: Interrupt the block after `seconds` (worker processes run it on their main thread) ---
+@contextmanager
+def _time_limit(seconds):
+    if not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+        yield  # In-process callers (threads, Windows) rely on the worker-level timeout instead
+        return
+
+    def interrupt(_signum, _frame):
+        raise _StageTimeout()
+
+    previous = signal.signal(signal.SIGALRM, interrupt)
+    signal.setitimer(signal.ITIMER_REAL, max(seconds, 0.01))
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+# --- Helper: Formula-text name of a symbol ("\\mu" -> "mu") ---
+def symbol_name(symbol):
+    return FORMULA_NAMES.get(symbol, symbol).name
+
+
+# --- Function: Equations from text, one per line ("x + 1" means "x + 1 = 0"), returning (equations, error) ---
+def parse_system(text):
+    equations = []
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        valid, error_msg = is_valid_formula(line)
+        if not valid:
+            return None, f"Line {line_number}: {error_msg}"
+        try:
+            expr = parse_cached(line)
+        except Exception as e:
+            return None, f"Line {line_number}: {str(e)}"
+        if isinstance(expr, (sp.Eq, BooleanAtom)):
+            equation = expr
+        elif isinstance(expr, sp.Expr) and not isinstance(expr, sp.MatrixBase):
+            equation = sp.Eq(expr, 0)
+        else:
+            # x < 3, x != 1, And(...), tuples ("x, y"), lists, matrices
+            return None, f"Line {line_number}: only equations can be solved"
+        if equation is sp.true or equation is sp.false:
+            return None, f"Line {line_number}: the equation is always {'true' if equation else 'false'}"
+        equations.append(equation)
+    if not equations:
+        return None, "Enter at least one equation"
+    return equations, None
+
+
+# --- Function: Symbols that can be solved for, by formula-text name, in a stable order ---
+def symbol_choices(equations):
+    symbols = set().union(*(eq.free_symbols for eq in equations))
+    return {symbol_name(symbol): symbol for symbol in sorted(symbols, key=lambda symbol: symbol.name)}
+
+
+# --- Helper: lhs - rhs with a fixed sign, so swapped or negated sides give the same key ---
+def _canonical(equation):
+    diff = equation.lhs - equation.rhs
+    if diff.could_extract_minus_sign():
+        diff = -diff
+    return sp.srepr(diff)
+
+
+def _solution(targets, values):
+    # One {"formula", "latex"} per target; formula is None when it cannot be typed back in
+    rows = []
+    for target in targets:
+        if target not in values:
+            continue
+        equation = sp.Eq(target, values[target], evaluate=False)
+        rows.append({"formula": expr_to_formula(equation), "latex": sp.latex(equation, order='none')})
+    return rows
+
+
+def _try_solve(equations, targets):
+    found = sp.solve(equations, targets, dict=True)
+    return [_solution(targets, values) for values in found]
+
+
+def _try_solveset(equation, target):
+    result = sp.solveset(equation, target, domain=sp.S.Complexes)
+    if isinstance(result, sp.ConditionSet):
+        return None  # SymPy could not decide; let nsolve try
+    if result is sp.S.EmptySet:
+        return []  # Proven: no solution
+    if isinstance(result, sp.FiniteSet):
+        return [_solution((target,), {target: value}) for value in result]
+    # Infinite families (e.g. sin(x) = 0) are shown as a set, not loadable as a formula
+    return [[{"formula": None, "latex": f"{sp.latex(target)} \\in {sp.latex(result)}"}]]
+
+
+def _same_root(values, root):
+    return all(abs(v - r) <= 1e-9 * max(1, abs(r)) for v, r in zip(values, root))
+
+
+def _try_nsolve(equations, targets, deadline):
+    functions = [eq.lhs - eq.rhs for eq in equations]
+    roots = []
+    for guess in _NSOLVE_GUESSES:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            with _time_limit(remaining):
+                values = [sp.N(v, 12) for v in sp.nsolve(functions, targets, [guess] * len(targets))]
+        except (ValueError, ZeroDivisionError, TypeError):
+            continue  # No convergence from this starting point
+        except _StageTimeout:
+            break  # Keep the roots found so far
+        if not any(_same_root(values, root) for root in roots):
+            roots.append(values)
+    return [_solution(targets, dict(zip(targets, root))) for root in roots]
+
+
+# --- Worker: Solve one (equations, targets) task within `budget` seconds ---
+def solve_equations(equations, targets, budget):
+    start = time.monotonic()
+    deadline = start + budget
+    result = {"targets": [symbol_name(t) for t in targets], "method": None, "solutions": [], "note": None}
+    notes = []
+    try:
+        with _time_limit(budget * _SOLVE_SHARE):
+            solutions = _try_solve(equations, targets)
+        if solutions:
+            result.update(method="solve", solutions=solutions)
+    except _StageTimeout:
+        notes.append(f"solve gave up after {budget * _SOLVE_SHARE:.0f} s")
+    except (NotImplementedError, ValueError, TypeError) as e:
+        notes.append(f"solve: {str(e) or type(e).__name__}")
+
+    if not result["method"] and len(equations) == 1 and len(targets) == 1:
+        try:
+            with _time_limit(min(budget * _SOLVESET_SHARE, deadline - time.monotonic())):
+                solutions = _try_solveset(equations[0], targets[0])
+            if solutions is not None:
+                result.update(method="solveset", solutions=solutions)
+        except _StageTimeout:
+            notes.append("solveset ran out of time")
+        except (NotImplementedError, ValueError, TypeError) as e:
+            notes.append(f"solveset: {str(e) or type(e).__name__}")
+
+    if not result["method"]:
+        others = set().union(*(eq.free_symbols for eq in equations)) - set(targets)
+        if others:
+            notes.append("numeric solving needs values for " + ", ".join(sorted(map(symbol_name, others))))
+        elif len(equations) != len(targets):
+            notes.append("numeric solving needs as many equations as unknowns")
+        else:
+            solutions = _try_nsolve(equations, targets, deadline)
+            if solutions:
+                result.update(method="nsolve", solutions=solutions)
+            else:
+                notes.append("nsolve did not converge")
+    if not result["method"]:
+        result["note"] = "; ".join(notes) or "no solution"
+    result["seconds"] = time.monotonic() - start
+    return result
+
+
+# --- Worker: Several tasks in one process, splitting the time budget between them ---
+def solve_batch(tasks, budget):
+    results = []
+    for i, (equations, targets) in enumerate(tasks):
+        share = (budget - sum(r["seconds"] for r in results)) / (len(tasks) - i)
+        results.append(solve_equations(list(equations), list(targets), max(share, 0.1)))
+    return results
+
+
+# --- Function: Cached results, or a background job computing the missing ones ---
+# each=True solves a single equation for every target separately (one task per target).
+def submit_solve(equations, targets, each=False):
+    if each and len(equations) == 1:
+        tasks = [(tuple(equations), (target,)) for target in targets]
+    else:
+        tasks = [(tuple(equations), tuple(targets))]
+    canonical = tuple(sorted({_canonical(eq) for eq in equations}))  # Shared by every task
+    keys = [(canonical, tuple(sp.srepr(t) for t in task_targets)) for _eqs, task_targets in tasks]
+    results = [SOLVE_CACHE.get(key) for key in keys]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if not missing:
+        return results, None
+
+    def store(batch):
+        for i, result in zip(missing, batch):
+            SOLVE_CACHE.put(keys[i], result)
+
+    # The stage budgets end before the job timeout, so a slow solve still reports what it tried
+    job = POOL.submit(solve_batch, [tasks[i] for i in missing], SOLVE_TIMEOUT * 0.8,
+                      timeout=SOLVE_TIMEOUT, memory_mb=SOLVE_MEMORY_MB, on_done=store)
+    return results, job
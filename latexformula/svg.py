@@ -0,0 +1,37 @@
+"""Size reduction for the SVGs matplotlib writes (pure text processing, no matplotlib import)."""
+import re
+
+_PROLOG = re.compile(rb"<\?xml[^>]*\?>|<!DOCTYPE[^>]*>|<!--.*?-->|<metadata>.*?</metadata>", re.S)
+_BETWEEN_TAGS = re.compile(rb">\s+<")
+# Not transform: its scale(0.015625) maps font units to points, and rounding it distorts every glyph
+_GEOMETRY_ATTR = re.compile(rb'\b(d|x|y|width|height|viewBox|points)="([^"]*)"')
+_NUMBER = re.compile(rb"-?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][-+]?\d+)?")
+_PATH_SPACES = re.compile(rb"\s*([MLHVCSQTAZmlhvcsqtaz])\s*")
+
+
+# --- Helper: Shortest text for a number rounded to `precision` decimals ---
+def _short_number(match, precision):
+    text = f"{round(float(match.group()), precision):.{precision}f}".rstrip("0").rstrip(".")
+    if text in ("-0", ""):
+        text = "0"
+    if text.startswith("0."):
+        text = text[1:]
+    elif text.startswith("-0."):
+        text = "-" + text[2:]
+    return text.encode("ascii")
+
+
+def _minify_attr(match, precision):
+    name, value = match.group(1), match.group(2)
+    value = _NUMBER.sub(lambda number: _short_number(number, precision), value)
+    if name == b"d":
+        # Path commands need no surrounding whitespace: "M 1 2 L 3 4 z" -> "M1 2L3 4z"
+        value = _PATH_SPACES.sub(rb"\1", value)
+    return name + b'="' + b" ".join(value.split()) + b'"'
+
+
+# --- Function: Drop metadata/whitespace and round coordinates to `precision` decimals ---
+def minify_svg(svg, precision=2):
+    svg = _PROLOG.sub(b"", svg)
+    svg = _BETWEEN_TAGS.sub(b"><", svg).strip()
+    return _GEOMETRY_ATTR.sub(lambda match: _minify_attr(match, precision), svg)
@@ -0,0 +1,145 @@
+"""Lightweight LaTeX math syntax check for hand-edited LaTeX (no matplotlib involved).
+
+Only structural errors that make KaTeX / mathtext fail are reported: unbalanced
+groups, \\left without \\right, mismatched environments, commands or scripts missing
+their argument, stray '&' and '$'. Unknown commands are accepted so anything the
+browser renderer supports still gets through.
+"""
+import re
+
+from latexformula.cache import LRUCache, env_int
+
+_TOKEN = re.compile(r"\\(begin|end)\s*\{([^{}]*)\}|\\([A-Za-z]+|.?)|([{}&$^_])|\s+|[^\\{}&$^_\s]",
+                    re.DOTALL)
+_ENVIRONMENT_NAME = re.compile(r"[A-Za-z]+\*?")
+
+# Commands and how many mandatory arguments they take
+_ARITY = dict.fromkeys(
+    ["sqrt", "text", "textrm", "textbf", "textit", "mathrm", "mathbf", "mathit", "mathcal", "mathbb",
+     "mathsf", "mathtt", "mathfrak", "boldsymbol", "operatorname", "hat", "widehat", "bar", "vec",
+     "dot", "ddot", "tilde", "widetilde", "overline", "underline", "overbrace", "underbrace",
+     "overrightarrow", "not", "pmod"], 1)
+_ARITY.update(dict.fromkeys(["frac", "dfrac", "tfrac", "cfrac", "binom", "dbinom", "tbinom",
+                             "overset", "underset", "stackrel"], 2))
+
+# Delimiters accepted after \left / \right (besides single characters like "(" or ".")
+_DELIMITER_COMMANDS = {
+    "{", "}", "|", "langle", "rangle", "lvert", "rvert", "lVert", "rVert", "vert", "Vert",
+    "lfloor", "rfloor", "lceil", "rceil", "lbrace", "rbrace", "lbrack", "rbrack", "backslash",
+    "uparrow", "downarrow", "updownarrow", "Uparrow", "Downarrow", "Updownarrow",
+}
+
+# Shared by every session; the same edited string is checked on every rerun
+VALIDATE_CACHE = LRUCache(env_int("LATEXFORMULA_VALIDATE_CACHE_SIZE", 4096))
+
+
+class _SyntaxProblem(Exception):
+    def __init__(self, message, pos):
+        super().__init__(f"{message} at position {pos + 1}")
+
+
+# --- Helper: (kind, value, position) tokens; whitespace dropped ---
+def _tokenize(latex_str):
+    tokens = []
+    for match in _TOKEN.finditer(latex_str):
+        environment, name, command, special = match.group(1, 2, 3, 4)
+        if environment is not None:
+            if not _ENVIRONMENT_NAME.fullmatch(name.strip()):
+                raise _SyntaxProblem(f"Invalid environment name '{name}'", match.start())
+            tokens.append((environment, name.strip(), match.start()))
+        elif command is not None:
+            if command == "":
+                raise _SyntaxProblem("Trailing backslash", match.start())
+            if command in ("begin", "end"):
+                raise _SyntaxProblem(f"Missing environment name after \\{command}", match.start())
+            tokens.append(("command", command, match.start()))
+        elif special is not None:
+            tokens.append((special, special, match.start()))
+        elif not match.group().isspace():
+            tokens.append(("char", match.group(), match.start()))
+    return tokens
+
+
+# --- Helper: Index just past the argument starting at tokens[i] ---
+def _skip_argument(tokens, i, closing, what, pos):
+    if i >= len(tokens) or tokens[i][0] in ("}", "&", "^", "_"):
+        raise _SyntaxProblem(f"Missing argument for {what}", pos)
+    if tokens[i][0] == "{":
+        return closing[i] + 1
+    return i + 1
+
+
+def _check(latex_str):
+    tokens = _tokenize(latex_str)
+
+    # Pass 1: groups, \left...\right and environments must nest properly
+    closing = {}
+    stack = []
+    i = 0
+    while i < len(tokens):
+        kind, value, pos = tokens[i]
+        if kind == "{":
+            stack.append(("{", i, pos))
+        elif kind == "}":
+            if not stack or stack[-1][0] != "{":
+                raise _SyntaxProblem("Unexpected '}'", pos)
+            closing[stack.pop()[1]] = i
+        elif kind == "$":
+            raise _SyntaxProblem("Unexpected '$' (enter LaTeX without $ delimiters)", pos)
+        elif kind == "&" and not any(entry[0] == "begin" for entry in stack):
+            raise _SyntaxProblem("'&' outside an environment", pos)
+        elif kind == "command" and value in ("left", "right"):
+            if i + 1 >= len(tokens) or not (
+                    tokens[i + 1][0] == "char" or tokens[i + 1][1] in _DELIMITER_COMMANDS):
+                raise _SyntaxProblem(f"Missing delimiter after \\{value}", pos)
+            if value == "left":
+                stack.append(("left", i, pos))
+            elif not stack or stack[-1][0] != "left":
+                raise _SyntaxProblem("\\right without matching \\left", pos)
+            else:
+                stack.pop()
+            i += 1  # The delimiter itself
+        elif kind == "begin":
+            stack.append(("begin", value, pos))
+        elif kind == "end":
+            if not stack or stack[-1][0] != "begin":
+                raise _SyntaxProblem(f"\\end{{{value}}} without matching \\begin", pos)
+            if stack[-1][1] != value:
+                raise _SyntaxProblem(f"\\end{{{value}}} does not match \\begin{{{stack[-1][1]}}}", pos)
+            stack.pop()
+        i += 1
+    if stack:
+        opener, _index, pos = stack[-1]
+        what = {"{": "'{'", "left": "\\left", "begin": "\\begin"}[opener]
+        raise _SyntaxProblem(f"Unclosed {what}", pos)
+
+    # Pass 2: scripts and commands need their arguments
+    for i, (kind, value, pos) in enumerate(tokens):
+        if kind in ("^", "_"):
+            _skip_argument(tokens, i + 1, closing, f"'{kind}'", pos)
+        elif kind == "command" and value in _ARITY:
+            what = f"\\{value}"
+            j = i + 1
+            if value == "sqrt" and j < len(tokens) and tokens[j][1] == "[":
+                while j < len(tokens) and tokens[j][1] != "]":
+                    j += 1
+                if j >= len(tokens):
+                    raise _SyntaxProblem("Unclosed '[' in \\sqrt", pos)
+                j += 1
+            for _ in range(_ARITY[value]):
+                j = _skip_argument(tokens, j, closing, what, pos)
+
+
+# --- Function: Check edited LaTeX, returning (valid, error) ---
+def validate_latex(latex_str):
+    return VALIDATE_CACHE.get_or_compute(latex_str, lambda: _validate(latex_str))
+
+
+def _validate(latex_str):
+    if not latex_str.strip():
+        return False, "LaTeX is empty."
+    try:
+        _check(latex_str)
+    except _SyntaxProblem as e:
+        return False, str(e)
+    return True, ""
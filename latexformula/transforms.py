@@ -0,0 +1,40 @@
+import sympy as sp
+
+from latexformula.cache import LRUCache, env_int
+from latexformula.convert import parse_cached
+from latexformula.parsing import expr_to_formula
+from latexformula.workers import POOL
+
+TRANSFORMS = {
+    "simplify": sp.simplify,
+    "expand": sp.expand,
+    "factor": sp.factor,
+}
+
+TRANSFORM_TIMEOUT = env_int("LATEXFORMULA_TRANSFORM_TIMEOUT", 20)
+TRANSFORM_MEMORY_MB = env_int("LATEXFORMULA_TRANSFORM_MEMORY_MB", 512)
+
+# Keyed by (operation, srepr of the parsed expression), shared by all sessions
+TRANSFORM_CACHE = LRUCache(env_int("LATEXFORMULA_TRANSFORM_CACHE_SIZE", 1024))
+
+
+# --- Worker: apply one transform, returning (formula text, LaTeX, result expression) ---
+def apply_transform(op, expr):
+    result = TRANSFORMS[op](expr)
+    return expr_to_formula(result), sp.latex(result, order='none'), result
+
+
+# --- Function: Cached result, or a background job computing it ---
+# `expr` is the caller's own expression for `formula` (a session chaining transforms); results are
+# only ever shared by srepr, never under formula text, so conversions stay independent of transforms.
+def submit_transform(op, formula, expr=None):
+    if expr is None:
+        expr = parse_cached(formula)  # The expression behind the LaTeX on screen, not a new parse
+    key = (op, sp.srepr(expr))
+    cached = TRANSFORM_CACHE.get(key)
+    if cached is not None:
+        return cached, None
+    job = POOL.submit(apply_transform, op, expr,
+                      timeout=TRANSFORM_TIMEOUT, memory_mb=TRANSFORM_MEMORY_MB,
+                      on_done=lambda result: TRANSFORM_CACHE.put(key, result))
+    return None, job
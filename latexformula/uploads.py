@@ -0,0 +1,11 @@
+"""Uploaded files (formula lists, CSV data, history and library imports) read as text."""
+import io
+
+
+# --- Function: Open an upload (bytes or text stream) as text without reading it all ---
+def text_stream(fileobj):
+    # utf-8-sig drops the BOM spreadsheet exports start with, so the first header or formula stays clean;
+    # undecodable bytes become U+FFFD rather than failing the whole upload
+    if isinstance(fileobj, io.TextIOBase):
+        return fileobj
+    return io.TextIOWrapper(fileobj, encoding="utf-8-sig", errors="replace", newline="")
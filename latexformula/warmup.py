@@ -0,0 +1,21 @@
+import threading
+
+from latexformula.cache import env_int
+
+WARMUP_FORMULA = "x^2 + sqrt(y)/(2*alpha)"
+
+
+# --- Function: Import SymPy/matplotlib and run one conversion + render so fonts are loaded ---
+def warm_up():
+    from latexformula.convert import formula_to_latex
+    from latexformula.render import render_latex
+    render_latex(formula_to_latex(WARMUP_FORMULA)[0])
+
+
+# --- Function: Warm up in a daemon thread (LATEXFORMULA_WARMUP=0 disables it) ---
+def start_warmup():
+    if not env_int("LATEXFORMULA_WARMUP", 1):
+        return None
+    thread = threading.Thread(target=warm_up, name="latexformula-warmup", daemon=True)
+    thread.start()
+    return thread
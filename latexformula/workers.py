@@ -0,0 +1,197 @@
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from latexformula.cache import env_int
+
+try:
+    import resource
+except ImportError:  # Windows: no per-process memory limit
+    resource = None
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+TIMEOUT = "timeout"
+CANCELLED = "cancelled"
+FINISHED = (DONE, FAILED, TIMEOUT, CANCELLED)
+
+
+# --- Helper: Start method - forkserver keeps SymPy preloaded so workers start fast ---
+def _context():
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload(["latexformula.parsing"])
+        return ctx
+    return multiprocessing.get_context("spawn")
+
+
+# --- Helper: Cap the worker's address space at its current size plus memory_mb ---
+def _limit_memory(memory_mb):
+    if resource is None or not memory_mb:
+        return
+    try:
+        with open("/proc/self/statm") as f:
+            current = int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return
+    limit = current + memory_mb * 1024 * 1024
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ValueError, OSError):
+        pass
+
+
+def _child_main(conn, func, args, memory_mb):
+    _limit_memory(memory_mb)
+    try:
+        conn.send((DONE, func(*args)))
+    except MemoryError:
+        conn.send((FAILED, f"memory limit of {memory_mb} MB exceeded"))
+    except Exception as e:
+        conn.send((FAILED, str(e)))
+    finally:
+        conn.close()
+
+
+# --- One unit of work running in its own killable process ---
+class Job:
+    def __init__(self, pool, func, args, timeout, memory_mb, on_done=None):
+        self._pool = pool
+        self._on_done = on_done
+        self._func = func
+        self._args = args
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+        self._cancel = threading.Event()
+        self._finished = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def done(self):
+        return self._finished.is_set()
+
+    def wait(self, timeout=None):
+        return self._finished.wait(timeout)
+
+    def cancel(self):
+        self._cancel.set()
+
+    def elapsed(self):
+        end = self.finished_at or time.monotonic()
+        return end - self.submitted_at
+
+    def _finish(self, status, result=None, error=None):
+        self.status = status
+        self.result = result
+        self.error = error
+        self.finished_at = time.monotonic()
+        self._finished.set()
+
+    def _run(self):
+        # Queue for a slot, checking periodically whether we were cancelled while waiting
+        while not self._pool._slots.acquire(timeout=0.1):
+            if self._cancel.is_set():
+                self._finish(CANCELLED)
+                return
+        try:
+            if self._cancel.is_set():
+                self._finish(CANCELLED)
+                return
+            self._execute()
+        except Exception as e:
+            if not self.done():
+                self._finish(FAILED, error=str(e))
+        finally:
+            self._pool._slots.release()
+
+    def _execute(self):
+        ctx = self._pool.context
+        parent_conn, child_conn = ctx.Pipe(duplex=False)
+        process = ctx.Process(target=_child_main, args=(child_conn, self._func, self._args, self.memory_mb),
+                              daemon=True)
+        self.status = RUNNING
+        self.started_at = time.monotonic()
+        process.start()
+        child_conn.close()
+        try:
+            deadline = self.started_at + self.timeout
+            while True:
+                if self._cancel.is_set():
+                    self._finish(CANCELLED)
+                    return
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._finish(TIMEOUT, error=f"gave up after {self.timeout:g} s")
+                    return
+                if parent_conn.poll(min(remaining, 0.1)):
+                    try:
+                        status, payload = parent_conn.recv()
+                    except EOFError:
+                        self._finish(FAILED, error="worker process exited unexpectedly")
+                        return
+                    if status == DONE:
+                        if self._on_done is not None:
+                            self._on_done(payload)
+                        self._finish(DONE, result=payload)
+                    else:
+                        self._finish(FAILED, error=payload)
+                    return
+                if not process.is_alive() and not parent_conn.poll():
+                    self._finish(FAILED, error=f"worker process died (exit code {process.exitcode})")
+                    return
+        finally:
+            parent_conn.close()
+            if process.is_alive():
+                process.kill()
+            process.join(timeout=1)
+
+
+# --- Bounded pool: at most max_workers jobs run at once, the rest queue ---
+class WorkerPool:
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self._slots = threading.BoundedSemaphore(self.max_workers)
+        self._context = None
+        self._context_lock = threading.Lock()
+
+    @property
+    def context(self):
+        with self._context_lock:
+            if self._context is None:
+                self._context = _context()
+            return self._context
+
+    def submit(self, func, *args, timeout=20.0, memory_mb=512, on_done=None):
+        return Job(self, func, args, timeout, memory_mb, on_done)
+
+
+# Shared by every session so a burst of heavy transforms cannot claim every core
+POOL = WorkerPool(env_int("LATEXFORMULA_WORKERS", 0) or None)
+
+
+# --- Function: Ordered parallel map that keeps at most `window` results in flight ---
+def imap_bounded(func, items, max_workers=None, window=None):
+    max_workers = max_workers or POOL.max_workers
+    window = window or max_workers * 4
+    executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=POOL.context)
+    pending = deque()
+    try:
+        for item in items:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)